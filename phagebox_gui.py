@@ -13,12 +13,17 @@ import tkinter as tk
 from tkinter import ttk
 import sys
 import atexit
+import threading
+import time
 # non-standard library
 import argparse
 import customtkinter
 # in-house packages
-from src.phagebox_gui.phagebox_view import PhageBoxGUI
 from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.calibration_choice import add_calibration_arguments, check_calibration_arguments, choose_calibration
+from src.phagebox_gui.port_discovery import discover_phageboxes
+# the view (matplotlib, PIL) and the run logger (numpy) are imported once
+# the window is up; see App.connect().
 
 
 
@@ -38,11 +43,19 @@ def parseArgs(argv=None) -> argparse.Namespace:
         returns a argparse.Namespace object
     """
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("-s", "--serial_port", help="Specify the serial port", required=True)
-    parser.add_argument("-m", "--slope", type=float, default=1.2, help="Slope of (Chip Temp vs Peltier Temp) [Default 1.2 @RT]", required=False)
-    parser.add_argument("-b", "--intercept", type=float, default=-2, help="y-intercept (Chip Temp vs Peltier Temp) [Default -2 @RT]", required=False)
+    parser.add_argument("-s", "--serial_port", help="Specify the serial port [Default: search for a PhageBox]", required=False)
+    parser.add_argument("-r", "--baudrate", type=int, default=ArduinoController.DEFAULT_BAUDRATE, help="Baud rate the device starts at [Default 9600]", required=False)
+    parser.add_argument("--max_baudrate", type=int, default=115200, help="Baud rate to switch to once connected [Default 115200]", required=False)
+    parser.add_argument("--capture_rate", type=float, default=10.0, help="Times per second samples are moved into the history [Default 10]", required=False)
+    parser.add_argument("--plot_rate", type=float, default=1.0, help="Plot redraws per second [Default 1]", required=False)
+    parser.add_argument("--device_time", action="store_true", help="Stamp samples with the device clock instead of the receive time", required=False)
+    add_calibration_arguments(parser)
+    parser.add_argument("-l", "--log_file", default=time.strftime("phagebox_run_%Y%m%d_%H%M%S.pblog"), help="File the run is streamed to [Default phagebox_run_<date>_<time>.pblog]", required=False)
     parser.add_argument("-v", "--verbose", action="store_true", help="prints output figures and debug info", required=False)
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    check_calibration_arguments(parser, args)
+    return args
+
 
 class App(customtkinter.CTk):
     """
@@ -53,20 +66,108 @@ class App(customtkinter.CTk):
     WIDTH = 900
     HEIGHT = 600
 
-    def __init__(self, serial_port, y_int, slope):
+    # milliseconds between checks for the device while connecting
+    CONNECT_POLL = 50
+
+    def __init__(self, serial_port, y_int, slope, log_file, baudrate=ArduinoController.DEFAULT_BAUDRATE, max_baudrate=None,
+                 device_time=False, capture_rate=10.0, plot_rate=1.0, calibration_file=None):
         super().__init__()
         super().columnconfigure(0, weight=1)
         super().rowconfigure(0, weight=1)
+        self.serial_port = serial_port
+        self.y_int = y_int
+        self.slope = slope
+        self.log_file = log_file
+        self.baudrate = baudrate
+        self.max_baudrate = max_baudrate
+        self.device_time = device_time
+        self.capture_rate = capture_rate
+        self.plot_rate = plot_rate
+        self.calibration_file = calibration_file
+        self.view = None
+        self.model = None
+        self.run_logger = None
 
         # add title for the GUI
         self.title('PhageBox')
 
+        # show the window right away; the view is built once the device answers
+        self.status_label = customtkinter.CTkLabel(master=self,
+                                                   text=f"Connecting to {serial_port}...",
+                                                   text_font=("Roboto Medium", 20))
+        self.status_label.grid(row=0, column=0, padx=10, pady=10)
+        if serial_port is None:
+            self.status_label.configure(text="Looking for a PhageBox...")
+            self.after(0, self.discover)
+        else:
+            self.after(0, self.connect)
+
+    def discover(self):
+        """
+        Description:
+            Probes the serial ports for a PhageBox on a worker thread
+            (each probe waits for the board to come out of reset) and
+            polls for the result, so the window stays responsive.
+        """
+        self.found_ports = None
+        def probe():
+            self.found_ports = discover_phageboxes(baudrate=self.baudrate)
+        threading.Thread(target=probe, daemon=True).start()
+        self.after(self.CONNECT_POLL, self.wait_for_discovery)
+
+    def wait_for_discovery(self):
+        """
+        Description:
+            Connects to the first PhageBox found once discovery is done.
+        """
+        if self.found_ports is None:
+            self.after(self.CONNECT_POLL, self.wait_for_discovery)
+            return
+        if not self.found_ports:
+            self.status_label.configure(text="No PhageBox found; pass its port with -s")
+            return
+        if len(self.found_ports) > 1:
+            print(f"found PhageBoxes on {', '.join(self.found_ports)}")
+        self.serial_port = self.found_ports[0]
+        print(f"using {self.serial_port}")
+        self.status_label.configure(text=f"Connecting to {self.serial_port}...")
+        self.connect()
+
+    def connect(self):
+        """
+        Description:
+            Opens the port without waiting for the board and starts
+            polling for its first valid line.
+        """
         # arduino-adapter instantiation 
-        self.model = ArduinoController(serial_port)
+        self.model = ArduinoController(self.serial_port, connect_timeout=0, baudrate=self.baudrate,
+                                       max_baudrate=self.max_baudrate, device_time=self.device_time)
+        self.connect_deadline = time.monotonic() + ArduinoController.CONNECT_TIMEOUT
+        self.after(self.CONNECT_POLL, self.wait_for_device)
+
+    def wait_for_device(self):
+        """
+        Description:
+            Builds the view once the device is ready (or the connect
+            timeout passed), keeping the window responsive meanwhile.
+        """
+        if not self.model.is_ready() and time.monotonic() < self.connect_deadline:
+            self.after(self.CONNECT_POLL, self.wait_for_device)
+            return
+        from src.phagebox_gui.phagebox_view import PhageBoxGUI
+        from src.phagebox_gui.run_logger import RunLogger
+        from src.phagebox_gui.calibration import Calibration
+        calibration = Calibration.load(self.calibration_file) if self.calibration_file else None
+
+        # stream every sample to disk while the run is in progress
+        self.run_logger = RunLogger(self.log_file)
+        self.model.attach_logger(self.run_logger)
 
         # create a view and place it on the root window
-        view = PhageBoxGUI(self, self.model, y_int, slope)
-        view.grid(row=0, column=0, padx=10, pady=10)
+        self.status_label.destroy()
+        self.view = PhageBoxGUI(self, self.model, self.y_int, self.slope, capture_rate=self.capture_rate,
+                                plot_rate=self.plot_rate, calibration=calibration)
+        self.view.grid(row=0, column=0, padx=10, pady=10)
 
     def stop_now(self):
         """
@@ -74,11 +175,23 @@ class App(customtkinter.CTk):
             This destroys the window when exiting, and ensures a
             'distructor like call to the model class'.
         """
-        self.model.stop_now()
+        if self.view is not None:
+            self.view.scheduler.stop()
+            print(self.view.scheduler.format())
+            self.view.close_history()
+        if self.model is not None:
+            self.model.stop_now()
+        if self.run_logger is not None:
+            self.run_logger.close()
         self.destroy()
 
 if __name__ == '__main__':
     args = parseArgs(sys.argv[1:])
-    app = App(args.serial_port, args.intercept, args.slope)
+    calibration_file, slope, intercept = choose_calibration(args)
+    if calibration_file:
+        print(f"using calibration {calibration_file}")
+    # without -s the App looks for a PhageBox once its window is up
+    app = App(args.serial_port, intercept, slope, args.log_file, args.baudrate, args.max_baudrate,
+              args.device_time, args.capture_rate, args.plot_rate, calibration_file)
     app.wm_protocol("WM_DELETE_WINDOW", app.stop_now)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Description:
+    This file runs the phagebox without the GUI (no Tk, no matplotlib).
+    PCR programs come from the command line or a program file and the
+    telemetry is streamed to a run log or to stdout as CSV.
+
+Example:
+    python phagebox_headless.py -s /dev/ttyUSB0 -p 1,32,15,90,20,50,60,72 > run.csv
+
+    Without -s the serial ports are searched for a PhageBox.
+"""
+# standard library
+import sys
+import contextlib
+# non-standard library
+import argparse
+# in-house packages
+from src.phagebox_gui.headless import HeadlessRunner, parse_program, read_program_file
+from src.phagebox_gui.calibration_choice import add_calibration_arguments, check_calibration_arguments, choose_calibration
+from src.phagebox_gui.port_discovery import find_phagebox
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT: 
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--serial_port", help="Specify the serial port [Default: search for a PhageBox]", required=False)
+    parser.add_argument("-r", "--baudrate", type=int, default=9600, help="Baud rate the device starts at [Default 9600]", required=False)
+    parser.add_argument("--max_baudrate", type=int, default=115200, help="Baud rate to switch to once connected [Default 115200]", required=False)
+    parser.add_argument("--device_time", action="store_true", help="Stamp samples with the device clock instead of the receive time", required=False)
+    parser.add_argument("-p", "--pcr", action="append", default=[], help="PCR program PELTIER,CYCLES,D_TIME,D_TEMP,A_TIME,A_TEMP,E_TIME,E_TEMP (repeatable)", required=False)
+    parser.add_argument("-f", "--program_file", help="File with one PCR program per line", required=False)
+    parser.add_argument("-o", "--log_file", help="Stream telemetry to this run log instead of stdout", required=False)
+    parser.add_argument("-d", "--duration", type=float, help="Seconds to run [Default: until the programs finish]", required=False)
+    add_calibration_arguments(parser)
+    args = parser.parse_args(argv)
+    check_calibration_arguments(parser, args)
+    return args
+
+
+if __name__ == '__main__':
+    args = parseArgs(sys.argv[1:])
+    programs = [parse_program(program) for program in args.pcr]
+    if args.program_file:
+        programs += read_program_file(args.program_file)
+    telemetry_out = sys.stdout
+    # device chatter goes to stderr so stdout stays clean CSV
+    with contextlib.redirect_stdout(sys.stderr):
+        serial_port = args.serial_port or find_phagebox(args.baudrate)
+        calibration = None
+        calibration_file, slope, intercept = choose_calibration(args)
+        if calibration_file:
+            from src.phagebox_gui.calibration import Calibration # pulls in numpy
+            print(f"using calibration {calibration_file}")
+            calibration = Calibration.load(calibration_file)
+        runner = HeadlessRunner(serial_port, intercept, slope, args.log_file, telemetry_out,
+                                baudrate=args.baudrate, max_baudrate=args.max_baudrate, device_time=args.device_time,
+                                calibration=calibration)
+        runner.run(programs, args.duration)
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    This script screens a panel of primer pairs and restriction enzymes
+    against every FASTA genome of a directory, in parallel, and writes
+    the genome x primer binding matrices and the digests to one
+    compressed .npz file.
+
+    The genomes (from the genome_store.py cache) are copied once into a
+    shared memory block; the worker processes index and scan views of
+    it, so no genome is copied or pickled again. The work is split
+    into a digest task per genome and a primer task per genome and
+    block of --chunk pairs, handed out largest genome first, so the
+    pool stays busy until the end.
+
+    The .npz holds (np.load(path)):
+        genomes, genome_lengths     - genome names (file stems) and sizes
+        pairs, primers              - pair names and the 2 * pairs primers
+                                      (forward, reverse of pair i at 2i, 2i + 1)
+        hits                        - (genomes, primers) binding sites on
+                                      either strand
+        products                    - (genomes, pairs) products the pairs
+                                      were designed for (orientation 1)
+        best_mismatches             - (genomes, pairs) fewest mismatches of
+                                      those products, -1 if none
+        product_table               - every product (PRODUCT_DTYPE + genome)
+        enzymes, enzyme_sites       - enzyme names and sites
+        sites                       - every cut site (SITE_DTYPE + genome,
+                                      record)
+        lanes                       - the enzymes and "all" (every enzyme)
+        fragments, fragment_counts  - fragment lengths of each genome and
+                                      lane laid end to end, and their
+                                      (genomes, lanes) counts
+USAGE:
+    python batch_screen.py [-g <genome dir>] [-p <primer CSV>] [-m <mismatches>] [-j <processes>] [-o <output .npz>]
+EXAMPLE:
+    python batch_screen.py -g genomes -p primer_db.csv -m 1 -o screen.npz
+"""
+# standard library
+import argparse
+import glob
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+# non-standard library
+import numpy as np
+# in-house packages
+from genome_store import load_genome
+from primer_index import K, MAX_PRODUCT, PRODUCT_DTYPE, GenomeIndex, find_products, search_primers
+from restriction_digest import RE_DB, SITE_DTYPE, enzymes_from_table, find_sites, fragment_lengths
+from sequences import read_primers
+
+
+
+# primer pairs per task.
+PAIR_CHUNK = 256
+
+SCREEN_PRODUCT_DTYPE = np.dtype([("genome", "<i4")] + PRODUCT_DTYPE.descr)
+SCREEN_SITE_DTYPE = np.dtype([("genome", "<i4"), ("record", "<i4")] + SITE_DTYPE.descr)
+
+# set in each worker by _attach
+_worker = {}
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-g", "--genomes", default="genomes", help="directory of FASTA genomes [Default genomes]")
+    parser.add_argument("-p", "--primers", default="primer_db.csv", help="primer CSV [Default primer_db.csv]")
+    parser.add_argument("-e", "--enzymes", nargs="+", metavar="NAME=SITE",
+                        help="enzymes, e.g. EcoRI=G^AATTC [Default the PCRcheck.ipynb enzymes]")
+    parser.add_argument("-m", "--mismatches", type=int, default=0, help="mismatches allowed per primer [Default 0]")
+    parser.add_argument("-l", "--max_length", type=int, default=MAX_PRODUCT, help=f"longest product [Default {MAX_PRODUCT}]")
+    parser.add_argument("-c", "--circular", nargs="+", default=[], metavar="GENOME", help="genomes (file stems) to digest as circular")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes [Default: one per core]")
+    parser.add_argument("--chunk", type=int, default=PAIR_CHUNK, help=f"primer pairs per task [Default {PAIR_CHUNK}]")
+    parser.add_argument("-o", "--output", default="screen.npz", help="output .npz file [Default screen.npz]")
+    return parser.parse_args(argv)
+
+
+def _attach(name, genomes, primers, table, settings):
+    """
+    Description:
+        Pool initializer: maps the shared genome codes and keeps the
+        panel for the tasks.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    _worker.update(memory=memory, genomes=genomes, primers=primers,
+                   enzymes=enzymes_from_table(table), settings=settings,
+                   codes=np.ndarray((memory.size,), dtype=np.uint8, buffer=memory.buf))
+
+
+def _genome_codes(genome):
+    """
+    Description:
+        (codes view, records) of a genome in the shared block.
+    """
+    offset, length, records = _worker["genomes"][genome]
+    return _worker["codes"][offset:offset + length], records
+
+
+def _screen_primers(genome, first_pair, last_pair):
+    """
+    Description:
+        Task: hits per primer and products of pairs [first_pair,
+        last_pair) in a genome.
+    """
+    settings = _worker["settings"]
+    codes, records = _genome_codes(genome)
+    primers = _worker["primers"][2 * first_pair:2 * last_pair]
+    # a genome's tasks are handed out together: keep its index for the next one
+    if _worker.get("index", (None,))[0] != genome:
+        _worker["index"] = genome, GenomeIndex.from_codes(codes, records, settings["k"])
+    index = _worker["index"][1]
+    hits = search_primers(index, primers, settings["mismatches"])
+    pairs = np.arange(len(primers)).reshape(-1, 2)
+    products = find_products(hits, pairs, [len(primer) for primer in primers], settings["max_length"])
+    found = np.zeros(len(products), dtype=SCREEN_PRODUCT_DTYPE)
+    for field in PRODUCT_DTYPE.names:
+        found[field] = products[field]
+    found["genome"] = genome
+    found["pair"] += first_pair
+    return "primers", genome, first_pair, np.bincount(hits["primer"], minlength=len(primers)), found
+
+
+def _digest(genome):
+    """
+    Description:
+        Task: cut sites of every record of a genome and fragment
+        lengths of every lane.
+    """
+    enzymes = _worker["enzymes"]
+    codes, records = _genome_codes(genome)
+    circular = _worker["settings"]["circular"][genome]
+    sites, lanes = [], [[] for _ in range(len(enzymes) + 1)]
+    for number, (_, start, length) in enumerate(records):
+        record_sites = find_sites(codes[start:start + length], enzymes, circular)
+        for lane in range(len(enzymes)):
+            lanes[lane].append(fragment_lengths(record_sites, length, circular, [lane]))
+        lanes[-1].append(fragment_lengths(record_sites, length, circular))
+        found = np.zeros(len(record_sites), dtype=SCREEN_SITE_DTYPE)
+        for field in SITE_DTYPE.names:
+            found[field] = record_sites[field]
+        found["genome"], found["record"] = genome, number
+        sites.append(found)
+    return ("digest", genome, np.concatenate(sites + [np.zeros(0, SCREEN_SITE_DTYPE)]),
+            [np.concatenate(lane + [np.zeros(0, np.int64)]) for lane in lanes])
+
+
+def _run(task):
+    """
+    Description:
+        Runs a (function name, arguments) task in a worker.
+    """
+    function, arguments = task
+    return {"primers": _screen_primers, "digest": _digest}[function](*arguments)
+
+
+def load_genomes(paths):
+    """
+    Description:
+        (codes, [(offset, length, records)]) of FASTA files: the cached
+        codes of every genome (see genome_store.py) laid end to end and
+        where each genome and its records are.
+    """
+    parts, genomes, offset = [], [], 0
+    for path in paths:
+        genome = load_genome(path)
+        parts.append(genome.codes)
+        genomes.append((offset, len(genome), genome.records))
+        offset += len(genome)
+    return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)), genomes
+
+
+def screen(paths, primer_pairs, table=RE_DB, mismatches=0, max_length=MAX_PRODUCT, circular=(),
+           jobs=None, chunk=PAIR_CHUNK, k=K):
+    """
+    Description:
+        Screens [(forward, reverse)] primer pairs and a {name: site}
+        enzyme table against FASTA genomes over a pool of jobs
+        processes (jobs=1 runs in this process). circular holds the
+        genome names (file stems) digested as circular. Returns the
+        arrays of the .npz (see DESCRIPTION), without names.
+    """
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    primers = [primer for pair in primer_pairs for primer in pair]
+    codes, genomes = load_genomes(paths)
+    settings = {"mismatches": mismatches, "max_length": max_length, "k": k,
+                "circular": [name in circular for name in names]}
+    tasks = []
+    for genome in sorted(range(len(paths)), key=lambda genome: -genomes[genome][1]):
+        tasks.append(("digest", (genome,)))
+        tasks += [("primers", (genome, first, min(first + chunk, len(primer_pairs))))
+                  for first in range(0, len(primer_pairs), chunk)]
+
+    memory = shared_memory.SharedMemory(create=True, size=max(len(codes), 1))
+    try:
+        np.ndarray((len(codes),), dtype=np.uint8, buffer=memory.buf)[:] = codes
+        del codes
+        arguments = (memory.name, genomes, primers, table, settings)
+        if jobs == 1:
+            _attach(*arguments)
+            results = [_run(task) for task in tasks]
+            _worker.clear()
+        else:
+            with Pool(jobs, initializer=_attach, initargs=arguments) as pool:
+                results = list(pool.imap_unordered(_run, tasks))
+    finally:
+        memory.close()
+        memory.unlink()
+
+    lanes = len(table) + 1
+    hits = np.zeros((len(paths), len(primers)), dtype=np.int32)
+    product_tables, site_tables = [], []
+    fragments = [[None] * lanes for _ in paths]
+    for result in results:
+        if result[0] == "primers":
+            _, genome, first_pair, counts, found = result
+            hits[genome, 2 * first_pair:2 * first_pair + len(counts)] = counts
+            product_tables.append(found)
+        else:
+            _, genome, found, lengths = result
+            site_tables.append(found)
+            fragments[genome] = lengths
+    product_table = np.concatenate(product_tables) if product_tables else np.zeros(0, SCREEN_PRODUCT_DTYPE)
+    product_table = product_table[np.lexsort((product_table["start"], product_table["record"],
+                                              product_table["pair"], product_table["genome"]))]
+    sites = np.concatenate(site_tables) if site_tables else np.zeros(0, SCREEN_SITE_DTYPE)
+    sites = sites[np.lexsort((sites["cut"], sites["record"], sites["genome"]))]
+
+    designed = product_table[product_table["orientation"] == 1]
+    products = np.zeros((len(paths), len(primer_pairs)), dtype=np.int32)
+    np.add.at(products, (designed["genome"], designed["pair"]), 1)
+    best_mismatches = np.full((len(paths), len(primer_pairs)), np.iinfo(np.int8).max, dtype=np.int8)
+    np.minimum.at(best_mismatches, (designed["genome"], designed["pair"]), designed["mismatches"])
+    best_mismatches[products == 0] = -1
+    return {"genome_lengths": np.array([length for _, length, _ in genomes], dtype=np.int64),
+            "hits": hits, "products": products, "best_mismatches": best_mismatches,
+            "product_table": product_table, "sites": sites,
+            "fragments": np.concatenate([lane for genome in fragments for lane in genome] + [np.zeros(0, np.int64)]),
+            "fragment_counts": np.array([[len(lane) for lane in genome] for genome in fragments],
+                                        dtype=np.int64).reshape(len(paths), lanes)}
+
+
+def main():
+    """
+    This is the flow of the script: screen the genome directory and
+    write the .npz.
+    """
+    arguments = parseArgs(sys.argv[1:])
+    paths = sorted(glob.glob(os.path.join(arguments.genomes, "*.fa")) + glob.glob(os.path.join(arguments.genomes, "*.fasta")))
+    if not paths:
+        sys.exit(f"no .fa/.fasta genomes in {arguments.genomes}")
+    pairs = read_primers(arguments.primers)
+    table = dict(enzyme.split("=", 1) for enzyme in arguments.enzymes) if arguments.enzymes else RE_DB
+
+    start = time.perf_counter()
+    results = screen(paths, [(forward, reverse) for _, forward, reverse in pairs], table, arguments.mismatches,
+                     arguments.max_length, arguments.circular, arguments.jobs, arguments.chunk)
+    elapsed = time.perf_counter() - start
+    np.savez_compressed(arguments.output,
+                        genomes=np.array([os.path.splitext(os.path.basename(path))[0] for path in paths]),
+                        pairs=np.array([name for name, _, _ in pairs]),
+                        primers=np.array([primer for _, forward, reverse in pairs for primer in (forward, reverse)]),
+                        enzymes=np.array(list(table)), enzyme_sites=np.array(list(table.values())),
+                        lanes=np.array(list(table) + ["all"]), **results)
+    print(f"{len(paths)} genomes x {len(pairs)} primer pairs x {len(table)} enzymes in {elapsed:.2f} s "
+          f"({arguments.jobs} processes): {int((results['products'] > 0).sum())} genome/pair products, "
+          f"{len(results['sites'])} cut sites -> {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Description:
+------------
+    This module keeps the genomes of the RE/PCR analysis encoded on
+    disk, so a FASTA file is parsed once and every later load is a
+    memory map.
+
+    A genome is cached as its base codes (see sequences.py, one uint8
+    per base, records laid end to end as encode_records() does) in a
+    .npy file, plus a .json index of its records and of the FASTA file
+    it came from (size and modification time). A load whose FASTA file
+    still matches the index maps the .npy read only; otherwise the
+    FASTA is encoded and cached again. The cache lives in CACHE_DIR next
+    to the FASTA files unless another directory is given.
+
+    The codes are kept one byte per base rather than packed 2 bits per
+    base: the maps are then usable as they are by the NumPy searches
+    (primer_index.py, restriction_digest.py), and bases other than
+    A/C/G/T are kept.
+
+Reverse Complement
+------------------
+    Genome.reverse_complement() does not copy the genome: it is a
+    reversed view of the mapped codes, complemented only where it is
+    read (a slice or a base at a time).
+
+Useful Methods/Classes
+----------------------
+    1. load_genome - Genome of a FASTA file, from the cache.
+    2. Genome - mapped codes and records of a genome.
+    3. ReverseComplement - zero-copy reverse complement of a Genome.
+"""
+# standard library
+import json
+import os
+# non-standard library
+import numpy as np
+# in-house packages
+from sequences import SEPARATOR, UNKNOWN, decode, encode_records, read_fasta
+
+
+
+# directory (next to the genomes) cached genomes are kept in.
+CACHE_DIR = ".genome_cache"
+
+# code -> code of the complementary base (UNKNOWN and SEPARATOR stay)
+_COMPLEMENT_CODES = np.arange(256, dtype=np.uint8)
+_COMPLEMENT_CODES[:4] = (3, 2, 1, 0)
+_COMPLEMENT_CODES[[UNKNOWN, SEPARATOR]] = (UNKNOWN, SEPARATOR)
+
+
+class Genome:
+    """
+    Description:
+        Base codes (a read-only memory map when cached) and records
+        [(name, start, length)] of a genome.
+    """
+
+    def __init__(self, codes, records, name=""):
+        self.codes = codes
+        self.records = [tuple(record) for record in records]
+        self.name = name
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return f"Genome({self.name!r}, {len(self)} bases, {len(self.records)} records)"
+
+    def record(self, record=0):
+        """
+        Description:
+            Codes (a view) of a record, by number or name.
+        """
+        if not isinstance(record, int):
+            record = [name for name, _, _ in self.records].index(record)
+        _, start, length = self.records[record]
+        return self.codes[start:start + length]
+
+    def sequence(self, start=0, end=None):
+        """
+        Description:
+            Sequence string of codes[start:end].
+        """
+        return decode(self.codes[start:end])
+
+    def reverse_complement(self):
+        return ReverseComplement(self)
+
+
+class ReverseComplement:
+    """
+    Description:
+        The reverse complement of a Genome, as a reversed view of its
+        codes. Position i is the complement of the genome's base
+        len - 1 - i; indexing and slicing complement just what they
+        return.
+    """
+
+    def __init__(self, genome):
+        self.genome = genome
+        self.codes = genome.codes[::-1]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        return _COMPLEMENT_CODES[self.codes[key]]
+
+    def __array__(self, dtype=None, copy=None):
+        # a whole array is asked for: the complement is made in full
+        return _COMPLEMENT_CODES[self.codes].astype(dtype or np.uint8, copy=False)
+
+    def sequence(self, start=0, end=None):
+        """
+        Description:
+            Sequence string of positions start to end of the reverse
+            complement.
+        """
+        return decode(self[start:end])
+
+    def reverse_complement(self):
+        return self.genome
+
+
+def cache_files(fasta_path, cache_dir=None):
+    """
+    Description:
+        (codes .npy, index .json) paths of a FASTA file's cache entry.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(fasta_path)), CACHE_DIR)
+    stem = os.path.join(cache_dir, os.path.splitext(os.path.basename(fasta_path))[0])
+    return f"{stem}.npy", f"{stem}.json"
+
+
+def _source(fasta_path):
+    status = os.stat(fasta_path)
+    return {"path": os.path.abspath(fasta_path), "size": status.st_size, "mtime_ns": status.st_mtime_ns}
+
+
+def load_genome(fasta_path, cache_dir=None, mmap=True):
+    """
+    Description:
+        Genome of a FASTA file: mapped from the cache (default CACHE_DIR
+        next to the file) if the file has not changed since it was
+        cached, encoded and cached otherwise. Without mmap the codes
+        are read into memory.
+    """
+    codes_path, index_path = cache_files(fasta_path, cache_dir)
+    name = os.path.splitext(os.path.basename(fasta_path))[0]
+    source = _source(fasta_path)
+    try:
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        if index["source"] == source:
+            return Genome(np.load(codes_path, mmap_mode="r" if mmap else None), index["records"], name)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    codes, records = encode_records(read_fasta(fasta_path))
+    os.makedirs(os.path.dirname(codes_path), exist_ok=True)
+    # the index goes last: it only names codes that are complete
+    temporary = f".tmp{os.getpid()}"
+    np.save(codes_path + temporary, codes)
+    os.replace(codes_path + temporary + ".npy", codes_path)
+    with open(index_path + temporary, "w") as index_file:
+        json.dump({"source": source, "records": records}, index_file)
+    os.replace(index_path + temporary, index_path)
+    if mmap:
+        codes = np.load(codes_path, mmap_mode="r")
+    return Genome(codes, records, name)
@@ -0,0 +1,431 @@
+"""
+Description:
+------------
+    This module finds where primers bind in a genome, and the PCR
+    products a primer pair would make, for many primers at once.
+
+    A GenomeIndex holds the genome as base codes (see sequences.py) and
+    the k-mer starting at every position, sorted (a suffix array cut to
+    its first k bases). Any seed of up to k bases is then one
+    searchsorted range. Indexes are built once per genome and cached on
+    disk next to the genomes; a cached index is memory-mapped, not
+    rebuilt.
+
+Searching
+---------
+    A primer with at most m mismatches has, by the pigeonhole
+    principle, at least one of m + 1 non-overlapping seeds matching
+    exactly. The seeds of every primer (and of its reverse complement,
+    for the - strand) are looked up together; the candidate sites they
+    give are then compared base by base against the primer in blocks,
+    all in NumPy (as XOR/popcount of packed 2-bit words for primers of
+    up to 32 bases). Genome bases that are not A/C/G/T never match, and a
+    site may not run across two records of a multi-record FASTA.
+
+    Sites are reported by their leftmost position on the + strand of
+    their record. A hit on the - strand is where the primer's reverse
+    complement reads on the + strand (the primer anneals to +).
+
+PCR Products
+------------
+    A pair makes a product where one primer binds the + strand and the
+    other the - strand downstream, within max_length bases: the forward
+    primer on + and the reverse primer on - (orientation 1, what the
+    pair was designed for), or the other way round (orientation -1).
+    The product length includes both primers.
+
+Useful Methods/Classes
+----------------------
+    1. GenomeIndex - sorted k-mer index of a genome; build, cached, find.
+    2. search_primers - + and - strand hits of many primers (HIT_DTYPE).
+    3. find_products - products of primer pairs from their hits
+       (PRODUCT_DTYPE).
+    4. screen_genome - products of primer pairs in a FASTA genome.
+"""
+# standard library
+import hashlib
+import json
+import os
+import shutil
+# non-standard library
+import numpy as np
+# in-house packages
+from sequences import SEPARATOR, UNKNOWN, encode, encode_records, read_fasta, reverse_complement
+
+
+
+# bases per indexed k-mer; 4**10 ~ 1M distinct k-mers, so a 10-mer seed
+# is rare in a phage genome while the index stays 8 bytes per base.
+K = 10
+
+# longest PCR product (bases) reported.
+MAX_PRODUCT = 5000
+
+# candidate sites compared against their primers per block.
+VERIFY_BLOCK = 1 << 18
+
+# bases compared as one packed 64 bit word.
+PACKED_WIDTH = 32
+EVEN_BITS = np.uint64(0x5555555555555555)
+_BYTE_BITS = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+# directory (next to the genomes) cached indexes are kept in.
+CACHE_DIR = ".index_cache"
+
+HIT_DTYPE = np.dtype([
+    ("primer", "<i4"),     # index of the primer
+    ("strand", "i1"),      # 1: + strand, -1: - strand
+    ("record", "<i4"),     # FASTA record
+    ("start", "<i8"),      # leftmost position on the + strand of the record
+    ("mismatches", "i1"),
+])
+
+PRODUCT_DTYPE = np.dtype([
+    ("pair", "<i4"),        # index of the primer pair
+    ("orientation", "i1"),  # 1: forward on +, reverse on -; -1: the other way round
+    ("record", "<i4"),
+    ("start", "<i8"),       # first base of the product (+ strand)
+    ("end", "<i8"),         # one past its last base
+    ("length", "<i8"),
+    ("mismatches", "i1"),   # of both primers
+])
+
+
+def kmer_codes(codes, k):
+    """
+    Description:
+        The k-mer code (2 bits per base, first base highest) starting at
+        every position of codes; positions near the end are padded.
+        Bases that are not A/C/G/T get arbitrary bits; the sites found
+        through them fail verification.
+    """
+    dtype = np.uint32 if k <= 16 else np.uint64
+    padded = np.concatenate([codes & 3, np.zeros(k - 1, dtype=np.uint8)]).astype(dtype)
+    kmers = np.zeros(len(codes), dtype=dtype)
+    for offset in range(k):
+        kmers <<= dtype(2)
+        kmers |= padded[offset:offset + len(codes)]
+    return kmers
+
+
+def encode_queries(sequences):
+    """
+    Description:
+        (codes, lengths) of sequences as one matrix, one row per
+        sequence padded with UNKNOWN.
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    codes = np.full((len(sequences), max(lengths, default=0)), UNKNOWN, dtype=np.uint8)
+    row = np.repeat(np.arange(len(sequences)), lengths)
+    column = np.arange(len(row)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    codes[row, column] = encode("".join(sequences))
+    return codes, lengths
+
+
+class GenomeIndex:
+    """
+    Description:
+        Base codes and sorted k-mer index of a genome (all records of a
+        FASTA, concatenated with a SEPARATOR between them).
+    """
+
+    def __init__(self, codes, kmers, positions, records, k=K, name=""):
+        """
+        Description:
+            codes - uint8 base codes.
+            kmers, positions - sorted k-mer codes and where they start.
+            records - [(name, start, length)] of the FASTA records.
+        """
+        self.codes = codes
+        self.kmers = kmers
+        self.positions = positions
+        self.records = [tuple(record) for record in records]
+        self.k = k
+        self.name = name
+        self.record_starts = np.array([start for _, start, _ in self.records], dtype=np.int64)
+        self._packed = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, records, k=K, name=""):
+        """
+        Description:
+            Indexes [(name, sequence)] records.
+        """
+        codes, table = encode_records(records)
+        return cls.from_codes(codes, table, k, name)
+
+    @classmethod
+    def from_codes(cls, codes, records, k=K, name=""):
+        """
+        Description:
+            Indexes base codes already laid out as build() does, given
+            their [(name, start, length)] records. codes is kept, not
+            copied (e.g. a view of shared memory).
+        """
+        if not 1 <= k <= 31:
+            raise ValueError("k must be between 1 and 31")
+        kmers = kmer_codes(codes, k)
+        order = np.argsort(kmers, kind="stable")
+        positions = order.astype(np.uint32 if len(codes) < 1 << 32 else np.int64)
+        return cls(codes, kmers[order], positions, records, k, name)
+
+    @classmethod
+    def from_fasta(cls, path, k=K):
+        return cls.build(read_fasta(path), k, os.path.splitext(os.path.basename(path))[0])
+
+    def save(self, directory):
+        """
+        Description:
+            Writes the index to directory (created; replaced atomically
+            if another process wrote it meanwhile).
+        """
+        temporary = f"{directory}.tmp{os.getpid()}"
+        os.makedirs(temporary, exist_ok=True)
+        np.save(os.path.join(temporary, "codes.npy"), self.codes)
+        np.save(os.path.join(temporary, "kmers.npy"), self.kmers)
+        np.save(os.path.join(temporary, "positions.npy"), self.positions)
+        with open(os.path.join(temporary, "index.json"), "w") as meta_file:
+            json.dump({"name": self.name, "k": self.k, "records": self.records}, meta_file)
+        try:
+            os.rename(temporary, directory)
+        except OSError: # already cached by another process
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Description:
+            Reads an index written by save(); with mmap the arrays are
+            read-only memory maps.
+        """
+        mode = "r" if mmap else None
+        with open(os.path.join(directory, "index.json")) as meta_file:
+            meta = json.load(meta_file)
+        return cls(np.load(os.path.join(directory, "codes.npy"), mmap_mode=mode),
+                   np.load(os.path.join(directory, "kmers.npy"), mmap_mode=mode),
+                   np.load(os.path.join(directory, "positions.npy"), mmap_mode=mode),
+                   meta["records"], meta["k"], meta["name"])
+
+    @classmethod
+    def cached(cls, fasta_path, k=K, cache_dir=None):
+        """
+        Description:
+            Index of a FASTA file from the cache (default CACHE_DIR next
+            to the file), built and cached if missing. The cache entry
+            is keyed by the file's content, so an edited genome is
+            indexed again.
+        """
+        with open(fasta_path, "rb") as fasta_file:
+            digest = hashlib.sha1(fasta_file.read()).hexdigest()[:16]
+        cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(fasta_path)), CACHE_DIR)
+        stem = os.path.splitext(os.path.basename(fasta_path))[0]
+        directory = os.path.join(cache_dir, f"{stem}-{digest}-k{k}")
+        if os.path.exists(os.path.join(directory, "index.json")):
+            return cls.load(directory)
+        os.makedirs(cache_dir, exist_ok=True)
+        index = cls.from_fasta(fasta_path, k)
+        index.save(directory)
+        return index
+
+    def find(self, queries, lengths, max_mismatches=0):
+        """
+        Description:
+            Sites of many query sequences at once. queries/lengths as
+            encode_queries() returns them. Returns (query, start,
+            mismatches) arrays, start in genome coordinates.
+        """
+        m = max_mismatches
+        span = lengths // (m + 1)
+        if np.any(span < 1):
+            raise ValueError(f"queries must be longer than {m} bases for {m} mismatches")
+        seed_length = np.minimum(span, self.k)
+
+        # seeds: m + 1 per query, seed i starting at i * span
+        query = np.repeat(np.arange(len(lengths)), m + 1)
+        offset = np.tile(np.arange(m + 1), len(lengths)) * span[query]
+        length = seed_length[query]
+        code = np.zeros(len(query), dtype=np.uint64)
+        invalid = np.zeros(len(query), dtype=bool)
+        for base in range(int(length.max(initial=0))):
+            inside = base < length
+            column = queries[query, np.minimum(offset + base, queries.shape[1] - 1)]
+            code = np.where(inside, (code << np.uint64(2)) | (column & 3).astype(np.uint64), code)
+            invalid |= inside & (column >= UNKNOWN)
+        shift = (2 * (self.k - length)).astype(np.uint64)
+        left = np.searchsorted(self.kmers, code << shift)
+        right = np.searchsorted(self.kmers, (code + np.uint64(1)) << shift)
+        counts = np.where(invalid, 0, right - left)
+
+        # every candidate site of every seed
+        seed = np.repeat(np.arange(len(query)), counts)
+        rank = np.arange(len(seed)) - np.repeat(np.cumsum(counts) - counts, counts)
+        starts = self.positions[left[seed] + rank].astype(np.int64) - offset[seed]
+        candidates = query[seed]
+        inside = (starts >= 0) & (starts + lengths[candidates] <= len(self.codes))
+        candidates, starts = candidates[inside], starts[inside]
+
+        mismatches = self.count_mismatches(queries, lengths, candidates, starts, m)
+        # a site found through several seeds is reported once
+        found = mismatches <= m
+        key = candidates[found] * (len(self.codes) + 1) + starts[found]
+        order = np.argsort(key, kind="stable")
+        key, mismatches = key[order], mismatches[found][order]
+        first = np.ones(len(key), dtype=bool)
+        first[1:] = key[1:] != key[:-1]
+        return key[first] // (len(self.codes) + 1), key[first] % (len(self.codes) + 1), mismatches[first]
+
+    def packed_windows(self):
+        """
+        Description:
+            The PACKED_WIDTH bases starting at every position, 2 bits
+            each (first base highest), and the running count of bases
+            that are not A/C/G/T. Built on first use.
+        """
+        if self._packed is None:
+            unknown = np.concatenate([[0], np.cumsum(np.asarray(self.codes) >= UNKNOWN)])
+            self._packed = (kmer_codes(np.asarray(self.codes), PACKED_WIDTH), unknown)
+        return self._packed
+
+    def count_mismatches(self, queries, lengths, candidates, starts, max_mismatches):
+        """
+        Description:
+            Mismatches between every candidate site and its query;
+            sites across two records get max_mismatches + 1. Sites and
+            queries of A/C/G/T only, up to PACKED_WIDTH bases, are
+            compared as packed 2-bit words (XOR and popcount); the rest
+            base by base.
+        """
+        windows, unknown = self.packed_windows()
+        packed, clean = pack_queries(queries, lengths)
+        length = lengths[candidates]
+        fast = clean[candidates] & (unknown[starts + length] == unknown[starts])
+        mismatches = np.empty(len(starts), dtype=np.int64)
+
+        mask = ~np.uint64(0) << (2 * (PACKED_WIDTH - length[fast])).astype(np.uint64)
+        difference = (windows[starts[fast]] ^ packed[candidates[fast]]) & mask
+        mismatches[fast] = popcount((difference | (difference >> np.uint64(1))) & EVEN_BITS)
+
+        slow = np.flatnonzero(~fast)
+        width = queries.shape[1]
+        padded = np.concatenate([self.codes, np.full(width, UNKNOWN, dtype=np.uint8)])
+        columns = np.arange(width)
+        for block in range(0, len(slow), VERIFY_BLOCK):
+            sites = slow[block:block + VERIFY_BLOCK]
+            rows = candidates[sites]
+            window = padded[starts[sites, None] + columns]
+            expected = queries[rows]
+            used = columns < lengths[rows, None]
+            wrong = ((window != expected) | (expected >= UNKNOWN)) & used
+            crossing = np.any((window == SEPARATOR) & used, axis=1)
+            mismatches[sites] = np.where(crossing, max_mismatches + 1, wrong.sum(axis=1))
+        return mismatches
+
+
+def pack_queries(queries, lengths):
+    """
+    Description:
+        (packed, clean): the first PACKED_WIDTH bases of every query
+        packed like GenomeIndex.packed_windows(), and whether the query
+        is all A/C/G/T and fits in one word.
+    """
+    width = min(queries.shape[1], PACKED_WIDTH)
+    packed = np.zeros(len(queries), dtype=np.uint64)
+    for column in range(width):
+        packed |= (queries[:, column] & 3).astype(np.uint64) << np.uint64(2 * (PACKED_WIDTH - 1 - column))
+    used = np.arange(queries.shape[1]) < lengths[:, None]
+    clean = (lengths <= PACKED_WIDTH) & ~np.any((queries >= UNKNOWN) & used, axis=1)
+    return packed, clean
+
+
+def popcount(values):
+    """
+    Description:
+        Set bits of every uint64.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def search_primers(index, primers, max_mismatches=0):
+    """
+    Description:
+        Every site (HIT_DTYPE) of the primers (sequence strings) on
+        either strand of the indexed genome, sorted by primer, strand,
+        record and start.
+    """
+    queries, lengths = encode_queries(list(primers) + [reverse_complement(primer) for primer in primers])
+    query, start, mismatches = index.find(queries, lengths, max_mismatches)
+    record = np.searchsorted(index.record_starts, start, side="right") - 1
+    hits = np.zeros(len(query), dtype=HIT_DTYPE)
+    hits["primer"] = query % len(primers)
+    hits["strand"] = np.where(query < len(primers), 1, -1)
+    hits["record"] = record
+    hits["start"] = start - index.record_starts[record]
+    hits["mismatches"] = mismatches
+    return hits[np.lexsort((hits["start"], hits["record"], -hits["strand"], hits["primer"]))]
+
+
+def find_products(hits, pairs, primer_lengths, max_length=MAX_PRODUCT):
+    """
+    Description:
+        PCR products (PRODUCT_DTYPE) of primer pairs. hits as
+        search_primers() returns them; pairs is an (n, 2) array of
+        (forward, reverse) primer indexes; primer_lengths the length of
+        every primer.
+    """
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    primer_lengths = np.asarray(primer_lengths, dtype=np.int64)
+    records = int(hits["record"].max(initial=0)) + 1
+    stride = int(hits["start"].max(initial=0)) + max_length + 2
+    # hits are sorted by (primer, strand, record, start): one increasing key
+    group = (hits["primer"].astype(np.int64) * 2 + (hits["strand"] < 0)) * records + hits["record"]
+    key = group * stride + hits["start"]
+
+    products = []
+    for orientation, (left_column, right_column) in ((1, (0, 1)), (-1, (1, 0))):
+        left_primer, right_primer = pairs[:, left_column], pairs[:, right_column]
+        # + strand hits of each pair's left primer
+        first = np.searchsorted(key, left_primer * 2 * records * stride)
+        last = np.searchsorted(key, (left_primer * 2 + 1) * records * stride)
+        pair = np.repeat(np.arange(len(pairs)), last - first)
+        left = first[pair] + np.arange(len(pair)) - np.repeat(np.cumsum(last - first) - (last - first), last - first)
+        # - strand hits of the right primer on the same record, within max_length
+        right_length = primer_lengths[right_primer[pair]]
+        right_group = (right_primer[pair] * 2 + 1) * records + hits["record"][left]
+        start = hits["start"][left]
+        low = np.searchsorted(key, right_group * stride + start)
+        high = np.searchsorted(key, right_group * stride + start + max_length - right_length, side="right")
+        counts = np.maximum(high - low, 0)
+        match = np.repeat(np.arange(len(left)), counts)
+        right = low[match] + np.arange(len(match)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        found = np.zeros(len(match), dtype=PRODUCT_DTYPE)
+        found["pair"] = pair[match]
+        found["orientation"] = orientation
+        found["record"] = hits["record"][left[match]]
+        found["start"] = start[match]
+        found["end"] = hits["start"][right] + right_length[match]
+        found["length"] = found["end"] - found["start"]
+        found["mismatches"] = hits["mismatches"][left[match]] + hits["mismatches"][right]
+        products.append(found)
+    products = np.concatenate(products)
+    return products[np.lexsort((products["start"], products["record"], products["pair"]))]
+
+
+def screen_genome(fasta_path, primer_pairs, max_mismatches=0, max_length=MAX_PRODUCT, k=K, cache_dir=None):
+    """
+    Description:
+        (hits, products) of [(forward, reverse)] primer pairs in a FASTA
+        genome, using its cached index. Primer i of the hits is
+        forward of pair i // 2 if i is even, its reverse otherwise.
+    """
+    index = GenomeIndex.cached(fasta_path, k, cache_dir)
+    primers = [primer for pair in primer_pairs for primer in pair]
+    hits = search_primers(index, primers, max_mismatches)
+    pairs = np.arange(len(primers)).reshape(-1, 2)
+    products = find_products(hits, pairs, [len(primer) for primer in primers], max_length)
+    return hits, products
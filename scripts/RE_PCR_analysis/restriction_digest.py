@@ -0,0 +1,254 @@
+"""
+Description:
+------------
+    This module finds restriction sites and digests genomes in silico,
+    for every enzyme of a restriction enzyme table in one pass over the
+    genome.
+
+    The genome is read as a uint8 array of base codes and turned into
+    one bit per base (A=1, C=2, G=4, T=8). A site is a bit mask per
+    position (IUPAC codes set several bits), so a site matches where
+    every genome bit shares a bit with its mask. The genome is scanned
+    in blocks; in each block every enzyme's first site position picks
+    the candidate starts and each further position filters them, so
+    the work shrinks about four times per base of the site.
+
+Enzyme Sites
+------------
+    Sites are written 5'->3' on the top strand in IUPAC code, with the
+    top strand cut marked:
+        "G^AATTC"     - cut inside the site; the bottom strand is cut
+                        at the mirrored position (palindromic enzymes).
+        "GGTCTC(1/5)" - cut outside the site: top strand 1 base and
+                        bottom strand 5 bases after its 3' end.
+        "GAATTC"      - no cut marked: only the sites are reported
+                        (cut at the start of the site).
+    Non-palindromic sites are also searched as their reverse complement
+    (the enzyme bound to the bottom strand), with mirrored cuts.
+
+Useful Methods/Classes
+----------------------
+    1. RE_DB - the enzymes of PCRcheck.ipynb with their cut positions.
+    2. Enzyme - a parsed enzyme site.
+    3. find_sites - every site of every enzyme on both strands
+       (SITE_DTYPE).
+    4. fragment_lengths - fragment lengths of a digest with any set of
+       enzymes.
+    5. digest - fragment lengths of every enzyme (and of all together).
+    6. gel_bands - fragment counts per lane and size bin, for a virtual
+       gel.
+"""
+# standard library
+import re
+# non-standard library
+import numpy as np
+# in-house packages
+from sequences import encode, reverse_complement
+
+
+
+# enzymes of PCRcheck.ipynb
+RE_DB = {"BamHI": "G^GATCC",
+         "EcoRI": "G^AATTC",
+         "BSU15i": "AT^CGAT",
+         "BSURi": "GG^CC",
+         "Hind3": "A^AGCTT"}
+
+# IUPAC code -> bases it stands for
+IUPAC = {"A": "A", "C": "C", "G": "G", "T": "T", "U": "T",
+         "R": "AG", "Y": "CT", "S": "CG", "W": "AT", "K": "GT", "M": "AC",
+         "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT"}
+
+# bases scanned per block (plus the longest site - 1 of overlap).
+SCAN_BLOCK = 1 << 20
+
+SITE_DTYPE = np.dtype([
+    ("enzyme", "<i4"),     # index of the enzyme
+    ("strand", "i1"),      # 1: site read on the top strand, -1: on the bottom strand
+    ("start", "<i8"),      # leftmost base of the site (top strand coordinates)
+    ("cut", "<i8"),        # top strand cut: the top strand is cut before this base
+    ("bottom_cut", "<i8"), # bottom strand cut, in top strand coordinates
+])
+
+# base code -> bit (UNKNOWN and other codes match nothing)
+_BASE_BITS = np.zeros(256, dtype=np.uint8)
+_BASE_BITS[:4] = (1, 2, 4, 8)
+
+
+def site_masks(site):
+    """
+    Description:
+        Bit mask per position of an IUPAC site.
+    """
+    try:
+        return np.array([sum(1 << "ACGT".index(base) for base in IUPAC[letter]) for letter in site.upper()],
+                        dtype=np.uint8)
+    except KeyError as error:
+        raise ValueError(f"{site!r} is not an IUPAC site") from error
+
+
+class Enzyme:
+    """
+    Description:
+        A restriction site with the cut positions of both strands,
+        counted from the first base of the site on the top strand.
+    """
+
+    def __init__(self, name, site):
+        """
+        Description:
+            site - see Enzyme Sites.
+        """
+        self.name = name
+        self.notation = site
+        outside = re.fullmatch(r"([A-Za-z]+)\((-?\d+)/(-?\d+)\)", site)
+        if outside:
+            self.site = outside.group(1).upper()
+            self.cut = len(self.site) + int(outside.group(2))
+            self.bottom_cut = len(self.site) + int(outside.group(3))
+        elif "^" in site:
+            self.site = site.replace("^", "").upper()
+            self.cut = site.index("^")
+            self.bottom_cut = len(self.site) - self.cut
+        else:
+            self.site = site.upper()
+            self.cut = self.bottom_cut = 0
+        self.masks = site_masks(self.site)
+        self.reverse_masks = site_masks(reverse_complement(self.site))
+        self.palindromic = bool(np.array_equal(self.masks, self.reverse_masks))
+
+    def __len__(self):
+        return len(self.site)
+
+    def __repr__(self):
+        return f"Enzyme({self.name!r}, {self.notation!r})"
+
+
+def enzymes_from_table(table):
+    """
+    Description:
+        [Enzyme] of a {name: site} table (e.g. RE_DB).
+    """
+    return [Enzyme(name, site) for name, site in table.items()]
+
+
+def genome_bits(genome):
+    """
+    Description:
+        One bit per base of a genome given as a sequence string or as
+        base codes (see sequences.py).
+    """
+    codes = encode(genome) if isinstance(genome, str) else np.asarray(genome, dtype=np.uint8)
+    return _BASE_BITS[codes]
+
+
+def _match(bits, masks, limit):
+    """
+    Description:
+        Starts (below limit) where masks match bits.
+    """
+    starts = np.flatnonzero(bits[:limit] & masks[0])
+    for offset in range(1, len(masks)):
+        starts = starts[(bits[starts + offset] & masks[offset]) != 0]
+    return starts
+
+
+def find_sites(genome, enzymes, circular=False):
+    """
+    Description:
+        Every site (SITE_DTYPE) of the enzymes (Enzyme list, or a
+        {name: site} table) in a genome (sequence string or base
+        codes), sorted by cut. A palindromic site is reported once, on
+        the top strand. In a circular genome sites may span the origin;
+        their coordinates are taken modulo the genome length.
+    """
+    if isinstance(enzymes, dict):
+        enzymes = enzymes_from_table(enzymes)
+    bits = genome_bits(genome)
+    length = len(bits)
+    longest = max((len(enzyme) for enzyme in enzymes), default=1)
+    if circular and length:
+        # np.resize repeats the genome, should it be shorter than a site
+        bits = np.concatenate([bits, np.resize(bits, longest - 1)])
+    patterns = [(number, 1, enzyme.masks) for number, enzyme in enumerate(enzymes)]
+    patterns += [(number, -1, enzyme.reverse_masks) for number, enzyme in enumerate(enzymes)
+                 if not enzyme.palindromic]
+
+    found = {pattern: [] for pattern in range(len(patterns))}
+    for block in range(0, length, SCAN_BLOCK):
+        window = bits[block:block + SCAN_BLOCK + longest - 1]
+        for pattern, (_, _, masks) in enumerate(patterns):
+            # starts inside this block whose site fits in the (possibly wrapped) genome
+            limit = min(SCAN_BLOCK, (length if circular else length - len(masks) + 1) - block)
+            if limit > 0:
+                found[pattern].append(block + _match(window, masks, limit))
+
+    sites = []
+    for pattern, (number, strand, masks) in enumerate(patterns):
+        starts = np.concatenate(found[pattern]) if found[pattern] else np.zeros(0, dtype=np.int64)
+        enzyme = enzymes[number]
+        pattern_sites = np.zeros(len(starts), dtype=SITE_DTYPE)
+        pattern_sites["enzyme"] = number
+        pattern_sites["strand"] = strand
+        pattern_sites["start"] = starts
+        if strand == 1:
+            pattern_sites["cut"] = starts + enzyme.cut
+            pattern_sites["bottom_cut"] = starts + enzyme.bottom_cut
+        else:
+            # the enzyme reads the bottom strand: its cuts mirror into the site
+            pattern_sites["cut"] = starts + len(enzyme) - enzyme.bottom_cut
+            pattern_sites["bottom_cut"] = starts + len(enzyme) - enzyme.cut
+        sites.append(pattern_sites)
+    sites = np.concatenate(sites) if sites else np.zeros(0, dtype=SITE_DTYPE)
+    if circular and length:
+        for field in ("cut", "bottom_cut"):
+            sites[field] %= length
+    return sites[np.argsort(sites["cut"], kind="stable")]
+
+
+def fragment_lengths(sites, genome_length, circular=False, enzymes=None):
+    """
+    Description:
+        Lengths (top strand) of the fragments left by the sites of the
+        given enzyme indexes (default all), in genome order. Cuts
+        outside a linear genome are ignored.
+    """
+    if enzymes is not None:
+        sites = sites[np.isin(sites["enzyme"], list(enzymes))]
+    cuts = np.unique(sites["cut"])
+    if not circular:
+        cuts = cuts[(cuts > 0) & (cuts < genome_length)]
+        return np.diff(np.concatenate([[0], cuts, [genome_length]]))
+    if len(cuts) == 0:
+        return np.array([genome_length])
+    # the last fragment runs through the origin
+    return np.diff(np.concatenate([cuts, [cuts[0] + genome_length]]))
+
+
+def digest(genome, table=RE_DB, circular=False):
+    """
+    Description:
+        {enzyme name: fragment lengths} of single digests with every
+        enzyme of a {name: site} table, plus "all" for the digest with
+        all of them.
+    """
+    enzymes = enzymes_from_table(table)
+    length = len(genome)
+    sites = find_sites(genome, enzymes, circular)
+    lanes = {enzyme.name: fragment_lengths(sites, length, circular, [number])
+             for number, enzyme in enumerate(enzymes)}
+    lanes["all"] = fragment_lengths(sites, length, circular)
+    return lanes
+
+
+def gel_bands(lanes, bins=None):
+    """
+    Description:
+        (counts, bins): fragments per lane (rows, in the order of
+        lanes, a {name: lengths} dict) and size bin (columns). bins
+        defaults to 100 log-spaced sizes from 10 bp to 100 kbp, the way
+        a gel resolves them.
+    """
+    bins = np.geomspace(10, 100000, 101) if bins is None else np.asarray(bins)
+    counts = np.array([np.histogram(lengths, bins)[0] for lengths in lanes.values()])
+    return counts, bins
@@ -0,0 +1,117 @@
+"""
+Description:
+------------
+    This module reads the inputs of the RE/PCR analysis (FASTA genomes,
+    the primer CSV) without Biopython, and encodes DNA as small
+    integer codes for the NumPy searches.
+
+Sequence Codes
+--------------
+    A=0, C=1, G=2, T=3 (so a base's complement is 3 - code), any other
+    base (N, IUPAC ambiguity) = 4, and 5 separates the records of a
+    multi-record FASTA once they are concatenated. Codes 4 and 5 never
+    match a primer base.
+
+Useful Methods/Classes
+----------------------
+    1. read_fasta - (name, sequence) records of a FASTA file.
+    2. encode, decode - sequence <-> uint8 codes.
+    3. encode_records - codes of FASTA records laid end to end.
+    4. reverse_complement - of a sequence string.
+    5. read_primers - primer pairs of primer_db.csv.
+"""
+# standard library
+import csv
+# non-standard library
+import numpy as np
+# in-house packages
+
+
+
+UNKNOWN = 4   # code of a base that is not A, C, G or T
+SEPARATOR = 5 # code between concatenated records
+
+BASES = "ACGT"
+
+# byte -> code lookup table
+_CODES = np.full(256, UNKNOWN, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _CODES[ord(_base)] = _CODES[ord(_base.lower())] = _code
+
+_COMPLEMENT = str.maketrans("ACGTRYKMBVDHNacgtrykmbvdhn", "TGCAYRMKVBHDNtgcayrmkvbhdn")
+
+
+def read_fasta(path):
+    """
+    Description:
+        Returns [(name, sequence)] for the records of a FASTA file;
+        name is the first word of the header, sequence is upper case.
+    """
+    records = []
+    name, lines = None, []
+    with open(path) as fasta_file:
+        for line in fasta_file:
+            if line.startswith(">"):
+                if name is not None:
+                    records.append((name, "".join(lines).upper()))
+                header = line[1:].split()
+                name, lines = header[0] if header else "", []
+            elif name is not None:
+                lines.append(line.strip())
+    if name is not None:
+        records.append((name, "".join(lines).upper()))
+    return records
+
+
+def encode(sequence):
+    """
+    Description:
+        uint8 codes of a sequence string (see Sequence Codes).
+    """
+    return _CODES[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+
+
+def encode_records(records):
+    """
+    Description:
+        (codes, [(name, start, length)]) of [(name, sequence)] records
+        concatenated with a SEPARATOR between them.
+    """
+    parts, table, offset = [], [], 0
+    for number, (name, sequence) in enumerate(records):
+        if number:
+            parts.append(np.array([SEPARATOR], dtype=np.uint8))
+            offset += 1
+        parts.append(encode(sequence))
+        table.append((name, offset, len(sequence)))
+        offset += len(sequence)
+    return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)), table
+
+
+def decode(codes):
+    """
+    Description:
+        Sequence string of codes (4 -> N, 5 -> '|').
+    """
+    return np.frombuffer(b"ACGTN|", dtype=np.uint8)[np.asarray(codes)].tobytes().decode("ascii")
+
+
+def reverse_complement(sequence):
+    """
+    Description:
+        Reverse complement of a sequence string (IUPAC codes included).
+    """
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def read_primers(primer_csv):
+    """
+    Description:
+        [(name, forward, reverse)] of a primer CSV with primerpair_name,
+        forward and reverse columns (primer_db.csv); rows without a
+        name or a primer are skipped.
+    """
+    with open(primer_csv, newline="") as primer_file:
+        return [(row["primerpair_name"], row["forward"].strip().upper(), row["reverse"].strip().upper())
+                for row in csv.DictReader(primer_file)
+                if row["primerpair_name"] and row["forward"] and row["reverse"]]
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures how the parallel batch screen
+    (scripts/RE_PCR_analysis/batch_screen.py) scales with worker
+    processes: the genomes of -g against primer_db.csv plus -n random
+    pairs and the PCRcheck.ipynb enzymes, with 1, 2, 4, ... processes
+    up to -j (default one per core). The speed up is relative to one
+    process; the results of every run are checked against it.
+USAGE:
+    python scripts/benchmarks/batch_screen_benchmark.py [-n <pairs>] [-m <mismatches>] [-j <processes>] [-g <genome dir>]
+EXAMPLE:
+    python scripts/benchmarks/batch_screen_benchmark.py -n 4000 -m 1
+"""
+# standard library
+import argparse
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+# non-standard library
+import numpy as np
+# in-house packages
+ANALYSIS_DIR = Path(__file__).resolve().parents[1] / "RE_PCR_analysis"
+sys.path.insert(0, str(ANALYSIS_DIR))
+from batch_screen import screen
+from primer_search_benchmark import random_pairs
+from sequences import read_fasta, read_primers
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--pairs", type=int, default=4000, help="random primer pairs added to primer_db.csv [Default 4000]")
+    parser.add_argument("-m", "--mismatches", type=int, default=1, help="mismatches per primer [Default 1]")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="most worker processes [Default: one per core]")
+    parser.add_argument("-g", "--genomes", default=str(ANALYSIS_DIR / "genomes"), help="directory of FASTA genomes")
+    return parser.parse_args(argv)
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    paths = sorted(glob.glob(os.path.join(arguments.genomes, "*.fa")))
+    genomes = [read_fasta(path)[0][1] for path in paths]
+    pairs = [(forward, reverse) for _, forward, reverse in read_primers(ANALYSIS_DIR / "primer_db.csv")]
+    pairs += random_pairs(genomes, arguments.pairs)
+    print(f"{len(pairs)} primer pairs x {len(paths)} genomes ({sum(map(len, genomes)) / 1e6:.2f} Mbp), "
+          f"{os.cpu_count()} cores")
+
+    jobs, baseline = 1, None
+    while jobs <= arguments.jobs:
+        start = time.perf_counter()
+        results = screen(paths, pairs, mismatches=arguments.mismatches, jobs=jobs)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, reference = elapsed, results
+        elif not all(np.array_equal(results[name], reference[name]) for name in reference):
+            sys.exit(f"{jobs} processes gave different results")
+        print(f"{jobs:3d} processes: {elapsed:8.3f} s  ({baseline / elapsed:.2f}x, "
+              f"{int((results['products'] > 0).sum())} genome/pair products)")
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
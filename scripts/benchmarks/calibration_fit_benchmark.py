@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures calibration fitting (src/phagebox_gui/calibration_fit.py)
+    on a synthetic temperature_plotter.py sweep: set points x positions
+    x samples rows, streamed from disk. Reports the time to read the
+    sweep and the time of the per-position, per-set point and
+    calibration fits.
+USAGE:
+    python scripts/benchmarks/calibration_fit_benchmark.py [-s <set points>] [-p <positions>] [-n <samples>] [-o <sweep csv>]
+EXAMPLE:
+    python scripts/benchmarks/calibration_fit_benchmark.py -s 10 -p 8 -n 1000
+"""
+# standard library
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+# non-standard library
+import numpy as np
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.calibration_fit import (SweepAccumulator, fit_calibration, fit_positions, fit_setpoints,
+                                              read_plotter_csv)
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--setpoints", type=int, default=10, help="set points of the sweep [Default 10]")
+    parser.add_argument("-p", "--positions", type=int, default=8, help="marker positions [Default 8]")
+    parser.add_argument("-n", "--samples", type=int, default=1000, help="samples per set point and position [Default 1000]")
+    parser.add_argument("-o", "--outputfile", help="sweep csv [Default: temporary file]")
+    return parser.parse_args(argv)
+
+
+def write_sweep(path, setpoints, positions, samples):
+    """
+    This method writes a sweep in the temperature_plotter.py format:
+    chip temperature falling off linearly along the chip, settling
+    exponentially after each move, with sensor noise.
+    """
+    rng = np.random.default_rng(0)
+    settling = np.exp(-np.arange(samples) / 3.0)
+    with open(path, "w") as sweep_file:
+        sweep_file.write("set temp,marker position,measured temperature\n")
+        for setpoint in np.linspace(50, 95, setpoints):
+            for position in range(positions):
+                steady = (1.1 - 0.08 * position) * setpoint - 2.0
+                chip = steady - 20 * settling + rng.normal(0, 0.2, samples)
+                rows = np.column_stack([np.full(samples, setpoint), np.full(samples, position), chip])
+                np.savetxt(sweep_file, rows, fmt=("%g", "%d", "%.2f"), delimiter=",")
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    path = arguments.outputfile or os.path.join(tempfile.mkdtemp(), "sweep.csv")
+    write_sweep(path, arguments.setpoints, arguments.positions, arguments.samples)
+    rows = arguments.setpoints * arguments.positions * arguments.samples
+
+    start = time.perf_counter()
+    accumulator = SweepAccumulator().add_stream(read_plotter_csv(path))
+    read_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fit_positions(accumulator)
+    fit_setpoints(accumulator)
+    calibration = fit_calibration(accumulator, {"front": ["0", "1"], "back": ["2", "3"]})
+    fit_time = time.perf_counter() - start
+
+    print(f"{rows:,} rows ({os.path.getsize(path) / 1e6:.1f} MB): read {read_time:.3f} s "
+          f"({rows / read_time:,.0f} rows/s), fit {fit_time * 1000:.1f} ms")
+    print(f"front: {calibration.model('front').to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
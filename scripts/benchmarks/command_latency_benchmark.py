@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures the command-to-acknowledgement latency of the
+    ArduinoController command pipeline against the PhageBox simulator
+    running at a given baud rate while it streams telemetry. It sends a
+    PCR program to both peltiers and then clicks the magnet and
+    backlight toggles at random. It prints how long the calls took
+    for the caller (the GUI thread), how the commands ended (acked,
+    coalesced, ...) and a latency histogram per command type.
+USAGE:
+    python scripts/benchmarks/command_latency_benchmark.py [-b <baud>] [-r <lines/sec>] [-n <clicks>] [-i <seconds>]
+EXAMPLE:
+    python scripts/benchmarks/command_latency_benchmark.py -b 9600 -r 50 -n 100 -i 0.02
+"""
+# standard library
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-b", "--baudrate", type=int, default=9600, help="simulated baud rate [Default 9600]")
+    parser.add_argument("-r", "--rate", type=float, default=50, help="telemetry lines per second [Default 50]")
+    parser.add_argument("-n", "--clicks", type=int, default=100, help="toggle clicks to send [Default 100]")
+    parser.add_argument("-i", "--interval", type=float, default=0.02, help="seconds between clicks [Default 0.02]")
+    return parser.parse_args(argv)
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    clicker = random.Random(0)
+    call_times = []
+    with PhageBoxSimulator(rate=arguments.rate, chatter=False, baudrate=arguments.baudrate) as simulator:
+        controller = ArduinoController(simulator.port)
+        start = time.perf_counter()
+        controller.start_pcr(3, 30, 90, 15, 50, 20, 72, 60)
+        call_times.append(time.perf_counter() - start)
+        for _ in range(arguments.clicks):
+            toggle = clicker.choice([controller.toggleMagnet, controller.toggleBacklight])
+            start = time.perf_counter()
+            toggle()
+            call_times.append(time.perf_counter() - start)
+            time.sleep(arguments.interval)
+        controller.commands.flush(timeout=30)
+        controller.stop_now()
+        consistent = (controller.magnetOn, controller.backlightOn) == (simulator.magnet_on, simulator.led_on)
+    pipeline = controller.commands
+    print(f"baud {arguments.baudrate}, {arguments.rate:g} telemetry lines/s, {arguments.clicks} clicks "
+          f"every {1000 * arguments.interval:g} ms")
+    print(f"caller time per call: max {1000 * max(call_times):.3f} ms")
+    print("commands: " + ", ".join(f"{status} {count}" for status, count in sorted(pipeline.counts.items())))
+    print(f"unexpected acks {pipeline.unexpected_acks}, mismatched acks {pipeline.mismatched_acks}, "
+          f"toggle state matches device: {consistent}")
+    for kind, histogram in sorted(pipeline.latency.items()):
+        print(f"\n<{kind},...> write-to-ack latency")
+        print(histogram.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Compares loading a genome through the memory-mapped genome cache
+    (scripts/RE_PCR_analysis/genome_store.py) with parsing its FASTA
+    file every time, and the zero-copy reverse complement with a full
+    reverse complemented copy.
+
+    The genome is a random -s Mbp FASTA (host genomes such as E. coli
+    are ~5 Mbp) written to a temporary directory, with its cache.
+USAGE:
+    python scripts/benchmarks/genome_store_benchmark.py [-s <Mbp>] [-r <repeats>]
+EXAMPLE:
+    python scripts/benchmarks/genome_store_benchmark.py -s 5
+"""
+# standard library
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+# non-standard library
+import numpy as np
+# in-house packages
+ANALYSIS_DIR = Path(__file__).resolve().parents[1] / "RE_PCR_analysis"
+sys.path.insert(0, str(ANALYSIS_DIR))
+from genome_store import load_genome
+from sequences import encode_records, read_fasta, reverse_complement
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--size", type=float, default=5.0, help="genome size in Mbp [Default 5]")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="loads timed per method [Default 5]")
+    return parser.parse_args(argv)
+
+
+def timed(function, repeats):
+    """
+    This method returns the mean seconds per call of function.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "host.fa")
+        bases = np.frombuffer(b"ACGT", dtype=np.uint8)[np.random.default_rng(0).integers(0, 4, int(arguments.size * 1e6))]
+        with open(path, "w") as fasta_file:
+            fasta_file.write(">host\n")
+            for line in range(0, len(bases), 80):
+                fasta_file.write(bases[line:line + 80].tobytes().decode("ascii") + "\n")
+        print(f"{len(bases) / 1e6:.1f} Mbp genome")
+
+        parse = timed(lambda: encode_records(read_fasta(path)), arguments.repeats)
+        start = time.perf_counter()
+        load_genome(path)
+        cold = time.perf_counter() - start
+        warm = timed(lambda: load_genome(path), arguments.repeats)
+        print(f"parse + encode FASTA : {parse * 1e3:9.2f} ms")
+        print(f"first load (caches)  : {cold * 1e3:9.2f} ms")
+        print(f"cached load (mmap)   : {warm * 1e3:9.2f} ms  ({parse / warm:.0f}x parsing)")
+
+        genome = load_genome(path)
+        sequence = genome.sequence()
+        copy = timed(lambda: reverse_complement(sequence), arguments.repeats)
+        view = timed(lambda: genome.reverse_complement().sequence(1000, 1100), arguments.repeats)
+        print(f"reverse complement   : {copy * 1e3:9.2f} ms full copy, {view * 1e3:.3f} ms view + 100 bp read")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
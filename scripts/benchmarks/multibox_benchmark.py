@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures how the asyncio MultiBoxController scales with the number
+    of boxes. Simulated PhageBoxes (pseudo-terminals) run in a separate
+    process; the controller runs on a single event loop pinned to one
+    core. The simulators stamp every T_METAL line with the time it was
+    generated, giving the latency from generation until the line is
+    parsed and stored. The CPU column is the controller process only.
+USAGE:
+    python scripts/benchmarks/multibox_benchmark.py [-b <box counts>] [-r <lines/sec per box>] [-d <seconds>]
+EXAMPLE:
+    python scripts/benchmarks/multibox_benchmark.py -b 1,4,16,32 -r 100 -d 5
+"""
+# standard library
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+# non-standard library
+import numpy as np
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+from src.phagebox_gui.multibox import MultiBoxController
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-b", "--boxes", default="1,4,16", help="comma separated box counts [Default 1,4,16]")
+    parser.add_argument("-r", "--rate", type=float, default=100, help="telemetry lines per second per box [Default 100]")
+    parser.add_argument("-d", "--duration", type=float, default=5, help="seconds to measure each count [Default 5]")
+    return parser.parse_args(argv)
+
+
+def run_simulators(count, rate, connection):
+    """ child process: runs count simulators until told to stop """
+    simulators = [PhageBoxSimulator(rate=rate, seed=index, chatter=False, probe=True) for index in range(count)]
+    for simulator in simulators:
+        simulator.start()
+    connection.send([simulator.port for simulator in simulators])
+    connection.recv()
+    for simulator in simulators:
+        simulator.stop()
+
+
+async def measure(ports, duration):
+    """ returns (samples, cpu seconds, wall seconds, latencies in s, boxes not ready) """
+    last_probe = [None] * len(ports)
+    latencies = []
+
+    def on_sample(box):
+        probe = box.current_temperatures[0]
+        if probe != last_probe[box.index]:
+            last_probe[box.index] = probe
+            latencies.append(time.monotonic() - probe)
+
+    async with MultiBoxController(ports, on_sample=on_sample) as controller:
+        not_ready = [box.index for box in controller.boxes if not box.is_ready()]
+        latencies.clear()
+        samples_start = len(controller.store)
+        cpu_start, wall_start = time.process_time(), time.monotonic()
+        await asyncio.sleep(duration)
+        cpu, wall = time.process_time() - cpu_start, time.monotonic() - wall_start
+        samples = len(controller.store) - samples_start
+    return samples, cpu, wall, np.array(latencies), not_ready
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    print(f"{'boxes':>6}{'lines/s':>10}{'cpu %':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}")
+    for count in [int(count) for count in arguments.boxes.split(",")]:
+        parent_end, child_end = multiprocessing.Pipe()
+        simulators = multiprocessing.Process(target=run_simulators, args=(count, arguments.rate, child_end))
+        simulators.start()
+        ports = parent_end.recv()
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {min(os.sched_getaffinity(0))}) # controller on one core
+        samples, cpu, wall, latencies, not_ready = asyncio.run(measure(ports, arguments.duration))
+        parent_end.send("stop")
+        simulators.join()
+        if not_ready:
+            print(f"boxes {not_ready} were not ready")
+        p50, p99, worst = (1000 * np.percentile(latencies, [50, 99, 100])) if len(latencies) else (np.nan,) * 3
+        print(f"{count:>6}{samples / wall:>10.0f}{100 * cpu / wall:>8.1f}{p50:>10.2f}{p99:>10.2f}{worst:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Microbenchmark for the telemetry line parser. Reports parsed
+    lines/sec for the original str-based parsing in read_serial and
+    for the bytes-based TelemetryParser.
+USAGE:
+    python scripts/benchmarks/parser_benchmark.py [-n <lines>] [-c <chunk bytes>]
+EXAMPLE:
+    python scripts/benchmarks/parser_benchmark.py -n 200000 -c 64
+"""
+# standard library
+import argparse
+import sys
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.telemetry_parser import TelemetryParser
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--lines", type=int, default=200000, help="number of telemetry lines [Default 200000]")
+    parser.add_argument("-c", "--chunk", type=int, default=64, help="bytes per simulated Serial.read [Default 64]")
+    return parser.parse_args(argv)
+
+
+def make_stream(line_count):
+    """ builds a telemetry byte stream cycling through every tag (firmware ends lines with \\n) """
+    tags = [b"T_METAL", b"T_FRONT", b"T_BACK", b"T_FRONT_SET", b"T_BACK_SET"]
+    return b"".join(b"%s,%.2f\n" % (tags[i % 5], 20 + (i % 700) / 10) for i in range(line_count))
+
+
+def legacy_parse(lines, current_temperatures, set_temperatures):
+    """ the parsing done by the original ArduinoController.read_serial """
+    for raw_line in lines:
+        serial_in_string = str(raw_line).strip("b").strip("'").strip("\\n").strip("\r")
+        pelt_identifier = serial_in_string.split(",")[0]
+        if pelt_identifier == "T_METAL":
+            current_temperatures[0] = float(serial_in_string.split(",")[-1])
+        elif pelt_identifier == "T_FRONT":
+            current_temperatures[1] = float(serial_in_string.split(",")[-1])
+        elif pelt_identifier == "T_BACK":
+            current_temperatures[2] = float(serial_in_string.split(",")[-1])
+        elif pelt_identifier == "T_FRONT_SET":
+            set_temperatures[0] = float(serial_in_string.split(",")[-1])
+        elif pelt_identifier == "T_BACK_SET":
+            set_temperatures[1] = float(serial_in_string.split(",")[-1])
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    stream = make_stream(arguments.lines)
+
+    # original: one readline() per line, then str parsing.
+    lines = stream.splitlines(keepends=True)
+    start = time.perf_counter()
+    legacy_parse(lines, [-1, -1, -1], [-1, -1])
+    legacy_rate = arguments.lines / (time.perf_counter() - start)
+
+    # TelemetryParser fed with fixed-size chunks, splitting lines anywhere.
+    chunks = [stream[i:i + arguments.chunk] for i in range(0, len(stream), arguments.chunk)]
+    parser = TelemetryParser([-1, -1, -1], [-1, -1])
+    start = time.perf_counter()
+    parsed = sum(parser.feed(chunk) for chunk in chunks)
+    parser_rate = parsed / (time.perf_counter() - start)
+    assert parsed == arguments.lines
+
+    print(f"{'parser':<20}{'lines/sec':>14}")
+    print(f"{'legacy str parse':<20}{legacy_rate:>14,.0f}")
+    print(f"{'TelemetryParser':<20}{parser_rate:>14,.0f}")
+    print(f"speedup: {parser_rate / legacy_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures the time to draw one frame of the live temperature plot
+    with a history of 1k, 100k and 1M samples. The original animate()
+    (remove all lines, plot five lines, rebuild the legend, full draw)
+    is compared against the blitted LiveTemperaturePlot. Rendering
+    uses the Agg canvas, so no display is needed.
+USAGE:
+    python scripts/benchmarks/plot_frame_benchmark.py [-f <frames>] [-s <sizes>...]
+EXAMPLE:
+    python scripts/benchmarks/plot_frame_benchmark.py -f 10 -s 1000 100000 1000000
+"""
+# standard library
+import argparse
+import sys
+import time
+from pathlib import Path
+# non-standard library
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.live_plot import LiveTemperaturePlot, LIVE_LINES
+from src.phagebox_gui.telemetry_store import TelemetryStore
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-f", "--frames", type=int, default=10, help="frames timed per size [Default 10]")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[1000, 100000, 1000000], help="history lengths")
+    return parser.parse_args(argv)
+
+
+def make_store(sample_count):
+    """ a store holding a synthetic PCR trace sampled at 1 Hz """
+    store = TelemetryStore(initial_capacity=sample_count + 1)
+    t = np.arange(sample_count, dtype=np.float64)
+    rows = np.zeros(sample_count, dtype=store.dtype)
+    rows["time"] = t
+    rows["metal"] = 25 + np.sin(t / 300)
+    rows["front"] = 70 + 20 * np.sin(t / 95)
+    rows["back"] = 70 + 20 * np.cos(t / 95)
+    rows["front_set"] = np.where((t // 95) % 2, 90, 50)
+    rows["back_set"] = np.where((t // 95) % 2, 50, 90)
+    store.extend(rows)
+    return store
+
+
+def make_axes():
+    fig = Figure(figsize=(8, 5), dpi=100)
+    FigureCanvasAgg(fig)
+    return fig.add_subplot(111)
+
+
+def next_sample(store):
+    """ appends one sample that stays inside the current data range """
+    last = store.view()[-1].copy()
+    last["time"] += 1
+    store.append(last)
+
+
+def legacy_frame(ax, store):
+    """ the original DisplayFrame animate() """
+    while len(ax.lines) >= 1:
+        ax.lines[0].remove()
+    times = store.column("time")
+    for field, color, _ in LIVE_LINES:
+        ax.plot(times, store.column(field), color=color)
+    ax.legend([label for _, _, label in LIVE_LINES])
+    ax.figure.canvas.draw()
+
+
+def time_frames(frame, store, frames):
+    """ mean seconds per frame, after one warm-up frame """
+    frame()
+    start = time.perf_counter()
+    for _ in range(frames):
+        next_sample(store)
+        frame()
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    print(f"{'samples':>10}{'legacy (ms)':>14}{'blitted (ms)':>14}")
+    for size in arguments.sizes:
+        store = make_store(size)
+        ax = make_axes()
+        legacy = time_frames(lambda: legacy_frame(ax, store), store, arguments.frames)
+        store = make_store(size)
+        live_plot = LiveTemperaturePlot(make_axes())
+        blitted = time_frames(lambda: live_plot.update(store), store, arguments.frames)
+        print(f"{size:>10,}{1000 * legacy:>14.1f}{1000 * blitted:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Compares primer screening of the RE/PCR genomes with the indexed
+    search (scripts/RE_PCR_analysis/primer_index.py) against the
+    PCRcheck.ipynb loop, which calls find() for the forward primer and
+    for the reverse complement of the reverse primer, pair by pair and
+    genome by genome.
+
+    The pairs are those of primer_db.csv plus -n random pairs sampled
+    from the genomes (so most have a product). Times are reported for
+    the find loop, building the indexes, loading them from the cache
+    and the bulk searches (exact and with -m mismatches).
+USAGE:
+    python scripts/benchmarks/primer_search_benchmark.py [-n <pairs>] [-m <mismatches>] [-g <genome dir>]
+EXAMPLE:
+    python scripts/benchmarks/primer_search_benchmark.py -n 2000 -m 2
+"""
+# standard library
+import argparse
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+# in-house packages
+ANALYSIS_DIR = Path(__file__).resolve().parents[1] / "RE_PCR_analysis"
+sys.path.insert(0, str(ANALYSIS_DIR))
+from primer_index import GenomeIndex, screen_genome
+from sequences import read_fasta, read_primers, reverse_complement
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--pairs", type=int, default=2000, help="random primer pairs added to primer_db.csv [Default 2000]")
+    parser.add_argument("-m", "--mismatches", type=int, default=2, help="mismatches of the tolerant search [Default 2]")
+    parser.add_argument("-g", "--genomes", default=str(ANALYSIS_DIR / "genomes"), help="directory of FASTA genomes")
+    return parser.parse_args(argv)
+
+
+def random_pairs(genomes, count, seed=0):
+    """
+    This method samples primer pairs (20 bases, 100-1000 apart) from the
+    genomes.
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        sequence = rng.choice(genomes)
+        start = rng.randrange(len(sequence) - 1100)
+        end = start + rng.randint(100, 1000)
+        pairs.append((sequence[start:start + 20], reverse_complement(sequence[end - 20:end])))
+    return pairs
+
+
+def find_loop(genomes, pairs):
+    """
+    This method is the notebook's screen: first forward and reverse
+    complement site per pair and genome, exact matches only.
+    """
+    found = 0
+    for sequence in genomes:
+        for forward, reverse in pairs:
+            forward_site = sequence.find(forward)
+            reverse_site = sequence.find(reverse_complement(reverse))
+            if forward_site != -1 and reverse_site != -1:
+                found += 1
+    return found
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    paths = sorted(glob.glob(os.path.join(arguments.genomes, "*.fa")))
+    genomes = [read_fasta(path)[0][1] for path in paths]
+    pairs = [(forward, reverse) for _, forward, reverse in read_primers(ANALYSIS_DIR / "primer_db.csv")]
+    pairs += random_pairs(genomes, arguments.pairs)
+    print(f"{len(pairs)} primer pairs x {len(paths)} genomes ({sum(map(len, genomes)) / 1e6:.2f} Mbp)")
+
+    start = time.perf_counter()
+    loop_found = find_loop(genomes, pairs)
+    loop_time = time.perf_counter() - start
+    print(f"find loop            : {loop_time:8.3f} s  ({loop_found} pair/genome hits)")
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        for path in paths:
+            GenomeIndex.cached(path, cache_dir=cache_dir)
+        print(f"build + cache indexes: {time.perf_counter() - start:8.3f} s")
+        start = time.perf_counter()
+        for path in paths:
+            GenomeIndex.cached(path, cache_dir=cache_dir)
+        print(f"load cached indexes  : {time.perf_counter() - start:8.3f} s")
+
+        for mismatches in sorted({0, arguments.mismatches}):
+            start = time.perf_counter()
+            products = [screen_genome(path, pairs, mismatches, cache_dir=cache_dir)[1] for path in paths]
+            elapsed = time.perf_counter() - start
+            designed = sum(int((found["orientation"] == 1).sum()) for found in products)
+            print(f"indexed, {mismatches} mismatches : {elapsed:8.3f} s  ({designed} products, "
+                  f"{loop_time / elapsed:.1f}x the find loop)")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
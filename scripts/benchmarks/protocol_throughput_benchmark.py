@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures the telemetry samples/sec that reach ArduinoController at
+    9600 and 115200 baud with the text protocol and the binary float16
+    and float32 frames. The PhageBox simulator produces samples faster
+    than the link can carry and paces its output at the given baud rate,
+    so the numbers are what the link allows. A real board also spends
+    time reading its sensors.
+USAGE:
+    python scripts/benchmarks/protocol_throughput_benchmark.py [-b <bauds>] [-d <seconds>]
+EXAMPLE:
+    python scripts/benchmarks/protocol_throughput_benchmark.py -b 9600,115200 -d 5
+"""
+# standard library
+import argparse
+import sys
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.binary_protocol import (BINARY_F16_PROTOCOL, BINARY_F32_PROTOCOL, PROTOCOL_NAMES,
+                                               TEXT_PROTOCOL)
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-b", "--bauds", default="9600,115200", help="comma separated baud rates [Default 9600,115200]")
+    parser.add_argument("-d", "--duration", type=float, default=5, help="seconds to measure each case [Default 5]")
+    return parser.parse_args(argv)
+
+
+class SampleCounter:
+    """ run logger stand-in that only counts samples """
+
+    def __init__(self):
+        self.samples = 0
+
+    def log(self, row):
+        self.samples += 1
+        return True
+
+
+def measure(baudrate, protocol, duration):
+    """ returns (samples/sec, frame errors) """
+    with PhageBoxSimulator(rate=baudrate, chatter=False, baudrate=baudrate) as simulator:
+        controller = ArduinoController(simulator.port, protocol=protocol)
+        deadline = time.monotonic() + 5
+        while controller.protocol != protocol and time.monotonic() < deadline:
+            time.sleep(0.01)
+        counter = SampleCounter()
+        controller.attach_logger(counter)
+        time.sleep(duration)
+        samples = counter.samples
+        controller.stop_now()
+        controller.ser.close()
+    return samples / duration, controller.parser.frame_errors
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    print(f"{'baud':>8}  {'protocol':<18}{'samples/s':>10}{'per sensor':>12}{'errors':>8}")
+    for baudrate in [int(baud) for baud in arguments.bauds.split(",")]:
+        for protocol in (TEXT_PROTOCOL, BINARY_F16_PROTOCOL, BINARY_F32_PROTOCOL):
+            rate, errors = measure(baudrate, protocol, arguments.duration)
+            print(f"{baudrate:>8}  {PROTOCOL_NAMES[protocol]:<18}{rate:>10.0f}{rate / 5:>12.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures the CPU used by the ArduinoController serial reader thread.
+    The PhageBox simulator (a pseudo-terminal) sends telemetry lines at
+    a fixed rate. The blocking reader is compared against the original
+    in_waiting spin loop. The CPU time includes the simulator's own
+    threads, which is the same for both readers.
+USAGE:
+    python scripts/benchmarks/reader_cpu_benchmark.py [-r <lines/sec>] [-d <seconds>]
+EXAMPLE:
+    python scripts/benchmarks/reader_cpu_benchmark.py -r 20 -d 10
+"""
+# standard library
+import argparse
+import sys
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.binary_protocol import TEXT_PROTOCOL
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--rate", type=float, default=20, help="telemetry lines per second [Default 20]")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds to measure each reader [Default 10]")
+    return parser.parse_args(argv)
+
+
+class SpinningController(ArduinoController):
+    """ the original reader: polls in_waiting without ever sleeping """
+
+    def read_serial(self):
+        while not self.stopped():
+            if self.ser.in_waiting:
+                self.parser.feed(self.ser.readline())
+
+
+def measure(controller_class, rate, duration):
+    """ returns (cpu seconds, wall seconds, stop delay) while the reader runs """
+    with PhageBoxSimulator(rate=rate, chatter=False) as simulator:
+        controller = controller_class(simulator.port, protocol=TEXT_PROTOCOL) # the spin loop reads lines
+        cpu_start, wall_start = time.process_time(), time.monotonic()
+        time.sleep(duration)
+        cpu, wall = time.process_time() - cpu_start, time.monotonic() - wall_start
+        stop_start = time.monotonic()
+        controller.stop_now()
+        stop_delay = time.monotonic() - stop_start
+        controller.ser.close()
+    return cpu, wall, stop_delay
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    print(f"{'reader':<12}{'cpu (s)':>10}{'wall (s)':>10}{'cpu %':>8}{'stop (ms)':>11}")
+    for name, controller_class in [("spin", SpinningController), ("blocking", ArduinoController)]:
+        cpu, wall, stop_delay = measure(controller_class, arguments.rate, arguments.duration)
+        print(f"{name:<12}{cpu:>10.2f}{wall:>10.2f}{100 * cpu / wall:>8.1f}{1000 * stop_delay:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Compares restriction site scanning of the RE/PCR genomes with the
+    vectorised digest (scripts/RE_PCR_analysis/restriction_digest.py)
+    against the PCRcheck.ipynb find_binding_regions loop, which slides
+    over the genome once per enzyme, top strand only.
+
+    Both scan every genome of -g for the enzymes of the notebook's
+    re_db; the digest also scans the bottom strand of non-palindromic
+    sites and works out the fragment lengths of every lane.
+USAGE:
+    python scripts/benchmarks/restriction_digest_benchmark.py [-g <genome dir>]
+EXAMPLE:
+    python scripts/benchmarks/restriction_digest_benchmark.py
+"""
+# standard library
+import argparse
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+# in-house packages
+ANALYSIS_DIR = Path(__file__).resolve().parents[1] / "RE_PCR_analysis"
+sys.path.insert(0, str(ANALYSIS_DIR))
+from restriction_digest import RE_DB, Enzyme, digest, find_sites
+from sequences import read_fasta
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-g", "--genomes", default=str(ANALYSIS_DIR / "genomes"), help="directory of FASTA genomes")
+    return parser.parse_args(argv)
+
+
+def find_binding_regions(re_seq, genome):
+    """
+    This method is the notebook's scan: every window of the genome
+    compared with the site, cut 3 bases in.
+    """
+    cut_sites = []
+    genome_f = list(genome)
+    for genome_index in range(0, len(genome_f) - len(re_seq)):
+        genome_subseq_f = "".join(genome_f[genome_index:genome_index+len(re_seq)])
+        if re_seq == genome_subseq_f: cut_sites.append(genome_index + 3)
+    return cut_sites
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    paths = sorted(glob.glob(os.path.join(arguments.genomes, "*.fa")))
+    genomes = [read_fasta(path)[0][1] for path in paths]
+    sites = [Enzyme(name, site).site for name, site in RE_DB.items()]
+    print(f"{len(RE_DB)} enzymes x {len(paths)} genomes ({sum(map(len, genomes)) / 1e6:.2f} Mbp)")
+
+    start = time.perf_counter()
+    loop_found = sum(len(find_binding_regions(site, sequence)) for sequence in genomes for site in sites)
+    loop_time = time.perf_counter() - start
+    print(f"find_binding_regions : {loop_time:8.3f} s  ({loop_found} sites)")
+
+    start = time.perf_counter()
+    found = sum(len(find_sites(sequence, RE_DB)) for sequence in genomes)
+    elapsed = time.perf_counter() - start
+    print(f"find_sites           : {elapsed:8.3f} s  ({found} sites, {loop_time / elapsed:.0f}x the loop)")
+
+    start = time.perf_counter()
+    fragments = sum(len(lengths) for sequence in genomes for lengths in digest(sequence).values())
+    elapsed = time.perf_counter() - start
+    print(f"digest (all lanes)   : {elapsed:8.3f} s  ({fragments} fragments, {loop_time / elapsed:.0f}x the loop)")
+
+
+if __name__ == "__main__":
+    main()
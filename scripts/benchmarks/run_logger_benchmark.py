@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Measures the RunLogger. First the write throughput when rows are
+    logged as fast as possible; then a paced run at a telemetry-like
+    rate, reporting the worst-case data loss window:
+      - app crash: rows still queued (at most the flush interval).
+      - power loss: rows written but not yet fsynced.
+USAGE:
+    python scripts/benchmarks/run_logger_benchmark.py [-n <rows>] [-r <rows/sec>] [-d <seconds>] [-o <log file>]
+EXAMPLE:
+    python scripts/benchmarks/run_logger_benchmark.py -n 1000000 -r 500 -d 10
+"""
+# standard library
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.run_logger import RunLogger, read_log
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=1000000, help="rows for the throughput test [Default 1000000]")
+    parser.add_argument("-r", "--rate", type=float, default=500, help="rows/sec for the paced test [Default 500]")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds of the paced test [Default 10]")
+    parser.add_argument("-o", "--outputfile", help="log file [Default: temporary file]")
+    return parser.parse_args(argv)
+
+
+def throughput(path, row_count):
+    logger = RunLogger(path, max_queue=row_count)
+    start = time.perf_counter()
+    for i in range(row_count):
+        logger.log((float(i), 25.0, 70.0, 71.0, 90.0, 50.0))
+    logger.close()
+    elapsed = time.perf_counter() - start
+    assert len(read_log(path)) == row_count
+    return elapsed, logger
+
+
+def paced(path, rate, duration):
+    logger = RunLogger(path)
+    max_lag = 0.0 # longest a row sat in memory before reaching the OS
+    period = 1.0 / rate
+    next_time = start = time.monotonic()
+    while next_time - start < duration:
+        logger.log((time.time(), 25.0, 70.0, 71.0, 90.0, 50.0))
+        max_lag = max(max_lag, (logger.rows_logged - logger.rows_written) * period)
+        next_time += period
+        time.sleep(max(0.0, next_time - time.monotonic()))
+    logger.close()
+    return logger, max_lag
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    path = arguments.outputfile or os.path.join(tempfile.mkdtemp(), "benchmark.pblog")
+
+    elapsed, logger = throughput(path, arguments.rows)
+    size = os.path.getsize(path)
+    print(f"throughput: {arguments.rows / elapsed:,.0f} rows/s, {size / elapsed / 1e6:.1f} MB/s "
+          f"({arguments.rows:,} rows, {size / 1e6:.1f} MB, dropped {logger.rows_dropped})")
+
+    logger, max_lag = paced(path, arguments.rate, arguments.duration)
+    print(f"paced {arguments.rate:g} rows/s for {arguments.duration:g} s: dropped {logger.rows_dropped}")
+    print(f"  app crash loss window  : {max_lag * 1000:.0f} ms measured (bound: flush interval {logger.flush_interval * 1000:.0f} ms)")
+    print(f"  power loss loss window : {(max_lag + logger.max_unsynced_age) * 1000:.0f} ms measured "
+          f"(bound: flush + fsync interval {(logger.flush_interval + logger.fsync_interval) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
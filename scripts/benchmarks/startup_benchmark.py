@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Startup-time budget for the entry points. Each module is imported
+    in a fresh interpreter with -X importtime, the cumulative import
+    time is compared with its budget, and the heaviest imports are
+    listed. Exits with status 1 if any module is over budget, so it can
+    run in CI.
+
+    phagebox_gui      - everything imported before the window appears.
+    phagebox_headless - the headless entry point (no GUI stack).
+USAGE:
+    python scripts/benchmarks/startup_benchmark.py [-r <repeats>] [-t <top imports>]
+EXAMPLE:
+    python scripts/benchmarks/startup_benchmark.py -r 5
+"""
+# standard library
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# module -> import time budget (ms)
+BUDGETS = {
+    "phagebox_gui": 400,
+    "phagebox_headless": 150,
+}
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="imports per module, best is kept [Default 5]")
+    parser.add_argument("-t", "--top", type=int, default=8, help="heaviest imports to list [Default 8]")
+    return parser.parse_args(argv)
+
+
+def import_times(module):
+    """
+    Description:
+        Imports module in a fresh interpreter. Returns (total ms,
+        [(cumulative ms, imported package)]) from -X importtime.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.splitlines()[-1]}")
+    entries = [] # (cumulative ms, depth, name), children come before their parent
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(cumulative) / 1000, depth, name.strip()))
+    end = max(index for index, (_, depth, name) in enumerate(entries) if depth == 0 and name == module)
+    start = max([index for index, (_, depth, _) in enumerate(entries[:end]) if depth == 0] + [-1]) + 1
+    total = entries[end][0]
+    children = [(ms, name) for ms, depth, name in entries[start:end] if depth == 1]
+    return total, sorted(children, reverse=True)
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    over_budget = False
+    for module, budget in BUDGETS.items():
+        try:
+            runs = [import_times(module) for _ in range(arguments.repeats)]
+        except RuntimeError as error:
+            print(f"{module}: {error}")
+            over_budget = True
+            continue
+        total, children = min(runs)
+        status = "OK" if total <= budget else "OVER BUDGET"
+        over_budget |= total > budget
+        print(f"{module}: {total:.0f} ms (budget {budget} ms) {status}")
+        for ms, name in children[:arguments.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Fits a calibration (raw peltier temperature -> chip temperature)
+    from temperature sweeps and writes the calibration file the GUI and
+    the headless runner load at startup (phagebox_calibration.json).
+
+    Sweeps are CSVs written by scripts/temperature_testing/temperature_plotter.py
+    (-i, positions 0-7) and/or captures of the arduino/temperature_calibration
+    sketch taken at one set point each (--sketch, positions front and back).
+    The default model is fitted over every position; --front/--back/--metal
+    fit a sensor's own model over the positions it stands for.
+USAGE:
+    python scripts/calibration/fit_calibration.py -i <sweep.csv> [--sketch <capture.txt> <set temp>] [--model linear|polynomial|piecewise] [--front <positions>] [--back <positions>] [-o <calibration.json>] [-r <report.csv>]
+EXAMPLE:
+    python scripts/calibration/fit_calibration.py -i scripts/temperature_testing/03142023_doubleTest.csv --front 1 2 --back 4 5
+"""
+# standard library
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.calibration_fit import (SETTLE, SweepAccumulator, fit_calibration, fit_positions,
+                                              fit_setpoints, read_plotter_csv, read_sketch_log)
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-i", "--input", nargs="+", default=[], help="temperature_plotter.py sweep CSV(s)")
+    parser.add_argument("--sketch", nargs=2, action="append", default=[], metavar=("CAPTURE", "SET_TEMP"),
+                        help="temperature_calibration sketch capture and the set point it was taken at (repeatable)")
+    parser.add_argument("--model", choices=("linear", "polynomial", "piecewise"), default="linear", help="calibration model [Default linear]")
+    parser.add_argument("--degree", type=int, default=2, help="degree of a polynomial model [Default 2]")
+    parser.add_argument("--settle", type=int, default=SETTLE, help=f"samples dropped at the start of each set point/position [Default {SETTLE}]")
+    parser.add_argument("--front", nargs="+", help="positions the front sensor is fitted over")
+    parser.add_argument("--back", nargs="+", help="positions the back sensor is fitted over")
+    parser.add_argument("--metal", nargs="+", help="positions the metal sensor is fitted over")
+    parser.add_argument("-o", "--output", default="phagebox_calibration.json", help="calibration file [Default phagebox_calibration.json]")
+    parser.add_argument("-r", "--report", help="CSV of the per-position and per-set point fits")
+    arguments = parser.parse_args(argv)
+    if not arguments.input and not arguments.sketch:
+        parser.error("give at least one sweep (-i or --sketch)")
+    return arguments
+
+
+def write_report(path, position_fits, setpoint_fits):
+    """
+    This method writes the per-position (chip vs set point) and per-set
+    point (chip vs position) fits to a CSV.
+    """
+    with open(path, "w", newline="") as report_file:
+        writer = csv.writer(report_file)
+        writer.writerow(["fit", "group", "coefficients", "rms", "samples"])
+        for fit_name, key, fits in (("position", "position", position_fits), ("setpoint", "setpoint", setpoint_fits)):
+            for fit in fits:
+                writer.writerow([fit_name, fit[key], " ".join(f"{value:.6g}" for value in fit["coefficients"]),
+                                 f"{fit['rms']:.3f}", fit["samples"]])
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    start = time.perf_counter()
+    accumulator = SweepAccumulator(arguments.settle)
+    for path in arguments.input:
+        accumulator.add_stream(read_plotter_csv(path))
+    for path, setpoint in arguments.sketch:
+        accumulator.add_stream(read_sketch_log(path, float(setpoint)))
+    sensor_positions = {sensor: positions for sensor, positions in
+                        (("front", arguments.front), ("back", arguments.back), ("metal", arguments.metal)) if positions}
+    calibration = fit_calibration(accumulator, sensor_positions, arguments.model, arguments.degree)
+    position_fits = fit_positions(accumulator)
+    setpoint_fits = fit_setpoints(accumulator)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'position':>10}{'slope':>10}{'intercept':>11}{'rms':>8}{'samples':>9}")
+    for fit in position_fits:
+        print(f"{fit['position']:>10}{fit['coefficients'][0]:>10.3f}{fit['coefficients'][1]:>11.2f}"
+              f"{fit['rms']:>8.2f}{fit['samples']:>9}")
+    calibration.save(arguments.output)
+    if arguments.report:
+        write_report(arguments.report, position_fits, setpoint_fits)
+    print(f"{int(accumulator.count.sum())} steady-state samples fitted in {elapsed:.3f} s -> {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
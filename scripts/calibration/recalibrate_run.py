@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+DESCRIPTION:
+    Applies a calibration to a recorded run without re-acquiring it.
+    The input is a run log streamed by the GUI/headless runner (.pblog)
+    or a saved run (.pbrun); both keep the raw peltier readings. The
+    calibrated run is written as a .pbrun (raw channels kept, the new
+    calibration in the metadata) or as CSV.
+USAGE:
+    python scripts/calibration/recalibrate_run.py -i <run.pblog|run.pbrun> -c <calibration.json> -o <out.pbrun|out.csv>
+EXAMPLE:
+    python scripts/calibration/recalibrate_run.py -i phagebox_run_20230314_101500.pblog -c calibration.json -o run.pbrun
+"""
+# standard library
+import argparse
+import sys
+from pathlib import Path
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.phagebox_gui.calibration import Calibration, recalibrate_log, recalibrate_run
+from src.phagebox_gui.run_format import save_csv, save_run
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-i", "--input", help="run log (.pblog) or saved run (.pbrun)", required=True)
+    parser.add_argument("-c", "--calibration", help="calibration file (JSON)", required=True)
+    parser.add_argument("-o", "--output", help="output .pbrun or .csv", required=True)
+    return parser.parse_args(argv)
+
+
+def main():
+    arguments = parseArgs(sys.argv[1:])
+    calibration = Calibration.load(arguments.calibration)
+    if arguments.input.endswith(".pbrun"):
+        columns, metadata = recalibrate_run(arguments.input, calibration)
+    else:
+        columns = recalibrate_log(arguments.input, calibration)
+        metadata = {"source": arguments.input, "calibration": calibration.to_dict()}
+    if arguments.output.endswith(".pbrun"):
+        save_run(arguments.output, columns, metadata)
+    else:
+        save_csv(arguments.output, columns)
+    print(f"{len(columns['time'])} samples recalibrated -> {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
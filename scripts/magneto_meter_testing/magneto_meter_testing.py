@@ -2,87 +2,107 @@
 """
 DESCRIPTION:
     This script is used in conjunction to the magnetometer
-    to collect data from the magenetometer. 
+    to collect data from the magenetometer. Complete x,y,z readings
+    are captured at the rate the sketch streams them, timestamped on
+    arrival and saved as a columnar .pbrun (or CSV if the output ends
+    in .csv) when the capture is stopped with Ctrl-C.
+
+    With --disc_test the switch state (e.g. ON/OFF) is typed in while
+    the capture keeps running; every reading is tagged with the state
+    in effect when it arrived.
 USAGE:
-    python magneto_meter_testing.py -p <path to UART port> -o <Output CSV> [--disc_test]
+    python magneto_meter_testing.py -p <path to UART port> -o <Output .pbrun|.csv> [--disc_test] [-t <seconds>]
 EXAMPLE:
     python magneto_meter_testing.py -p /dev/cu.usbmodem14101 -o OUTTEST.csv
 """
 # non-std packages
-from typing import List
-import serial
+from pathlib import Path
 import argparse
+import threading
+import time
 import sys
 import os
+# in-house packages
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from magnetometer_capture import MagnetometerCapture, SwitchAnnotations
 
 # Create an argparse.Namespace object from input args.
 def parseArgs(argv=None) -> argparse.Namespace:
     """
     This method takes in the arguments from the command and performs
     parsing.
-    INPUT: 
+    INPUT:
         Array of input arguments
     OUTPUT:
         returns a argparse.Namespace object
     """
-    parser = argparse.ArgumentParser(description=__doc__)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-v", "--verbose", action="store_true")
     parser.add_argument("-p", "--port", help="input port path", required=True)
-    group.add_argument("-d", "--disc_test", action="store_true")
-    parser.add_argument("-o", "--outputfile", help="output csv file path", required=True)
+    parser.add_argument("-b", "--baudrate", type=int, default=9600, help="baud rate of the sketch [Default 9600]")
+    group.add_argument("-d", "--disc_test", action="store_true", help="annotate the switch state from the console while capturing")
+    parser.add_argument("-t", "--duration", type=float, help="seconds to capture [Default: until Ctrl-C]")
+    parser.add_argument("-o", "--outputfile", help="output .pbrun (or .csv) file path", required=True)
     return parser.parse_args(argv)
 
 class ArduinoMagnetoMeterMonitor:
     """ object for pulling in data from arduino """
 
-    def __init__(self, port):
+    def __init__(self, port, baudrate=9600):
         self.port = port
-        self.serial = serial.Serial(port, 9600)
-        self.x = 0
-        self.y = 0
-        self.z = 0
+        self.baudrate = baudrate
+        self.annotations = SwitchAnnotations()
 
-    def writeMagneticOutputToCSV(self, outputCSV, discreet_tests=False):
+    def prompt_switches(self):
+        """
+        This method reads switch states from the console on its own
+        thread, so typing one never holds up the capture.
+        """
+        while True:
+            try:
+                state = input("SWITCH (state ON/OFF): ")
+            except EOFError:
+                return
+            if state.strip():
+                event = self.annotations.set(state)
+                print(f"switch {event['index']}: {event['label']}")
+
+    def writeMagneticOutputToCSV(self, outputCSV, discreet_tests=False, duration=None):
         """
         This method outputs the z,x,y readings of the
         magnetic flux to a file. It is assumed this will
-        be running continuously. 
+        be running continuously (until Ctrl-C or duration
+        seconds).
         """
         if os.path.exists(outputCSV):
             os.remove(outputCSV)
-        output_file = open(outputCSV, "a")
-        output_file.write(f"time_counter,x (uTesla),y (uTesla),z (uTesla)\n")
-        time_counter = 0
-        while True:
-            magnetic_measures: str = self.serial.readline().decode('ascii').strip(" ").strip("\n").strip("\r")
-            val_return = magnetic_measures.lower()
-            if "x:" in val_return:
-                self.x = val_return.split(":")[1]
-            elif "y:" in val_return:
-                self.y = val_return.split(":")[1]
-            elif "z:" in val_return:
-                self.z = val_return.split(":")[1]
-            else:
-                continue
-            output_file.write(f"{time_counter},{self.x},{self.y},{self.z}\n")
-            time_counter += 1
-            if time_counter % 10 == 0:
-                print(f"{time_counter} timepoints added", end="\r")
-            if (time_counter % 10 == 0) and discreet_tests:
-                val = input("SWITCH (state ON/OFF): ")
-                output_file.write(f"SWITCH {val} \n")
-                self.serial.reset_input_buffer()
+        capture = MagnetometerCapture(self.port, self.baudrate, outputCSV, self.annotations).start()
+        if discreet_tests:
+            threading.Thread(target=self.prompt_switches, daemon=True).start()
+        start = time.monotonic()
+        try:
+            while duration is None or time.monotonic() - start < duration:
+                time.sleep(0.5)
+                if not discreet_tests:
+                    print(f"{capture.triplets} timepoints added", end="\r")
+        except KeyboardInterrupt:
+            pass
+        columns = capture.stop()
+        elapsed = time.monotonic() - start
+        print(f"\n{len(columns['time'])} timepoints ({len(columns['time']) / elapsed:.1f}/s, "
+              f"{capture.assembler.partial} incomplete) -> {outputCSV}")
 
 def main():
-    """ 
+    """
     This is the flow of the script for measuring the
     magnetic flux produced by the magenetometer module,
     and collecting this information into a CSV.
     """
     arguments = parseArgs(sys.argv[1:])
-    mag_monitor = ArduinoMagnetoMeterMonitor(arguments.port)
-    mag_monitor.writeMagneticOutputToCSV(arguments.outputfile, discreet_tests=arguments.disc_test)
+    mag_monitor = ArduinoMagnetoMeterMonitor(arguments.port, arguments.baudrate)
+    mag_monitor.writeMagneticOutputToCSV(arguments.outputfile, discreet_tests=arguments.disc_test,
+                                         duration=arguments.duration)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
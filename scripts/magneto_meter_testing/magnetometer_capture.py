@@ -0,0 +1,226 @@
+"""
+Description:
+------------
+    This module captures the MLX90393 magnetometer (the
+    arduino/magneto_meter_ctrl sketch) at the rate it streams. The
+    sketch prints one axis per line ('x:<uT>', 'y:<uT>', 'z:<uT>');
+    lines are assembled into complete XYZ triplets, each stamped with
+    the time its last axis arrived, so no row mixes new and stale axes.
+
+    A reader thread only reads and assembles; triplets go to a RunLogger
+    (batched background writes, crash-safe) and the capture is saved as
+    a columnar .pbrun (see run_format.py) when it stops.
+
+    Switch annotations (e.g. the electromagnet turned ON/OFF) come from
+    a side channel: SwitchAnnotations.set() can be called from any
+    thread (a console prompt, a GUI) while acquisition goes on. Every
+    triplet carries the switch state current when it arrived, and the
+    changes are kept as events in the run metadata, timed on the same
+    monotonic seconds-since-start clock as the triplets.
+
+Capture Columns
+---------------
+    time (seconds since the capture started), x, y, z (uTesla), switch
+    (annotation index, -1 before the first annotation). The metadata
+    has the (wall clock) start time and the switch events; a CSV
+    capture gets them in <capture>.switches.csv.
+
+Useful Methods/Classes
+----------------------
+    1. TripletAssembler - axis lines -> complete (time, x, y, z).
+    2. SwitchAnnotations - thread-safe switch state and its events.
+    3. MagnetometerCapture - reader thread, batched logging and
+       columnar output.
+"""
+# standard library
+import os
+import threading
+import time
+# non-standard library
+import numpy as np
+from serial import Serial
+# in-house packages (run from the repository, or with it on sys.path)
+from src.phagebox_gui.run_format import save_run
+from src.phagebox_gui.run_logger import RunLogger, read_log
+
+
+
+MAGNETOMETER_DTYPE = np.dtype([
+    ("time", "<f8"),   # seconds since the capture started, when the triplet was completed
+    ("x", "<f4"),      # uTesla
+    ("y", "<f4"),      # uTesla
+    ("z", "<f4"),      # uTesla
+    ("switch", "<i2"), # index of the switch annotation in effect (-1: none)
+])
+
+AXES = (b"x", b"y", b"z")
+
+
+class TripletAssembler:
+    """
+    Description:
+        Turns the sketch's axis lines into complete triplets. A triplet
+        is x, y and z in that order; an axis out of order drops the
+        partial triplet (counted in partial) and starts over.
+    """
+
+    def __init__(self):
+        self.partial_line = b""
+        self.values = []
+        self.triplets = 0
+        self.partial = 0 # incomplete triplets dropped
+        self.other = 0   # lines that are not axis readings
+
+    def feed(self, data, received):
+        """
+        Description:
+            Parses data (bytes as read) and returns the completed
+            triplets as [(received, x, y, z)].
+        """
+        lines = (self.partial_line + data).split(b"\n")
+        self.partial_line = lines.pop()
+        completed = []
+        for line in lines:
+            axis, _, value = line.strip().lower().partition(b":")
+            if axis not in AXES or not value:
+                self.other += 1
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                self.other += 1
+                continue
+            index = AXES.index(axis)
+            if index != len(self.values):
+                if self.values:
+                    self.partial += 1
+                self.values = []
+                if index != 0:
+                    continue
+            self.values.append(value)
+            if len(self.values) == 3:
+                completed.append((received, *self.values))
+                self.values = []
+                self.triplets += 1
+        return completed
+
+
+class SwitchAnnotations:
+    """
+    Description:
+        Switch states set from a side channel while the capture runs.
+        state is replaced by one assignment, so the reader thread can
+        read it without a lock.
+    """
+
+    def __init__(self, start=None):
+        """
+        Description:
+            start - time.monotonic() the event times count from (now
+                    by default; MagnetometerCapture sets its own).
+        """
+        self.events = [] # [{"index", "time" (seconds since start), "label"}]
+        self.state = -1
+        self.start = time.monotonic() if start is None else start
+        self._lock = threading.Lock()
+
+    def set(self, label, timestamp=None):
+        """
+        Description:
+            Records a switch annotation (e.g. "ON"); triplets arriving
+            from now on carry its index. timestamp - seconds since
+            start (now by default).
+        """
+        with self._lock:
+            if timestamp is None:
+                timestamp = time.monotonic() - self.start
+            event = {"index": len(self.events), "time": timestamp, "label": str(label).strip()}
+            self.events.append(event)
+            self.state = event["index"]
+        return event
+
+
+class MagnetometerCapture:
+    """
+    Description:
+        Captures triplets from a serial port on a reader thread and
+        logs them in batches; stop() saves the columnar capture.
+    """
+
+    def __init__(self, port, baudrate=9600, path="magnetometer.pbrun", annotations=None,
+                 read_timeout=0.1, serial=None):
+        """
+        Description:
+            path - the capture (.pbrun, or .csv); the batches are
+                   logged to path + ".pblog" meanwhile.
+            serial - an already open port to read instead of port.
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.path = path
+        self.log_path = path + ".pblog"
+        self.annotations = annotations if annotations is not None else SwitchAnnotations()
+        self.assembler = TripletAssembler()
+        self.ser = serial if serial is not None else Serial(port, baudrate, timeout=read_timeout)
+        self.logger = RunLogger(self.log_path, dtype=MAGNETOMETER_DTYPE)
+        self.start_time = time.time()
+        # triplets and switch events are timed from here
+        self.start_monotonic = time.monotonic()
+        self.annotations.start = self.start_monotonic
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.read_serial, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def read_serial(self):
+        """
+        Description:
+            Body of the reader thread: blocks for the next bytes, takes
+            everything buffered and logs the completed triplets.
+        """
+        while not self._stop_event.is_set():
+            data = self.ser.read(self.ser.in_waiting or 1)
+            if not data:
+                continue
+            received = time.monotonic() - self.start_monotonic
+            state = self.annotations.state
+            for triplet in self.assembler.feed(data, received):
+                self.logger.log((*triplet, state))
+
+    @property
+    def triplets(self):
+        return self.assembler.triplets
+
+    def stop(self):
+        """
+        Description:
+            Stops reading, writes out the logged triplets and saves the
+            capture as columns. Returns the columns.
+        """
+        self._stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.ser.close()
+        self.logger.close()
+        rows = read_log(self.log_path)
+        columns = {name: np.array(rows[name]) for name in MAGNETOMETER_DTYPE.names}
+        if self.path.endswith(".csv"):
+            np.savetxt(self.path, np.column_stack(list(columns.values())), delimiter=",", comments="",
+                       fmt=("%.4f", "%.4f", "%.4f", "%.4f", "%d"),
+                       header="time,x (uTesla),y (uTesla),z (uTesla),switch")
+            with open(self.path + ".switches.csv", "w") as switch_file:
+                switch_file.write("switch,time,label\n")
+                switch_file.writelines(f"{event['index']},{event['time']:.4f},{event['label']}\n"
+                                       for event in self.annotations.events)
+        else:
+            save_run(self.path, columns, self.metadata())
+        del rows
+        os.remove(self.log_path)
+        return columns
+
+    def metadata(self):
+        return {"port": self.port, "baudrate": self.baudrate, "start_time": self.start_time,
+                "switch_events": list(self.annotations.events), "triplets": self.assembler.triplets,
+                "partial_triplets": self.assembler.partial, "dropped": self.logger.rows_dropped}
@@ -5,20 +5,36 @@ this module is used to collect temperature readings along the length
 of the chip. The accompanying notebook/script can be used to generate
 plots once this script outputs a CSV.
 
+Every reading the sensor sends is kept, stamped with the time it was
+read and whether the chip was steady at the time:
+    set temp,marker position,measured temperature,time,steady
+
+Without -s the sweep is interactive (Enter once the temperature and
+then each position is steady). With -s SCHEDULE it is scripted: each
+schedule line 'set temp,marker position,dwell seconds' is recorded for
+dwell seconds once the readings are steady, and the next step starts
+by itself. With --phagebox the set points are held on the PhageBox
+(both peltiers), so a whole sweep runs without anyone at the keyboard.
 """
 # non-std packages
+from collections import deque
 from typing import List
 import serial
 import argparse
 import sys
 import os
+import time
+
+
+# DS18B20 readings that are not temperatures (no sensor, power-on value).
+SENSOR_ERRORS = (-127.0, 85.0)
 
 
 def parseArgs(argv=None) -> argparse.Namespace:
     """
     This method takes in the arguments from the command and performs
     parsing.
-    INPUT: 
+    INPUT:
       Array of input arguments
     OUTPUT:
        returns a argparse.Namespace object
@@ -27,21 +43,127 @@ def parseArgs(argv=None) -> argparse.Namespace:
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-v", "--verbose", action="store_true")
     parser.add_argument("-p", "--port", help="input port path", required=True)
+    parser.add_argument("-b", "--baudrate", type=int, default=9600, help="baud rate of the sketch [Default 9600]")
     parser.add_argument("-o", "--outputfile",
                         help="output csv file path", required=True)
+    parser.add_argument("-s", "--schedule", help="schedule file (set temp,marker position,dwell seconds per line) [Default: interactive]")
+    parser.add_argument("--phagebox", help="PhageBox port; holds the schedule's set points on both peltiers")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds the readings must stay within --tolerance to be steady [Default 10]")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="largest spread (C) of steady readings [Default 0.5]")
+    parser.add_argument("--move_time", type=float, default=5.0, help="seconds to move the marker before steady state is looked for [Default 5]")
+    parser.add_argument("--max_settle", type=float, default=600.0, help="seconds to wait for steady state before recording anyway [Default 600]")
     return parser.parse_args(argv)
 
 
+def read_schedule(path):
+    """
+    This method reads a schedule file: one 'set temp,marker position,
+    dwell seconds' step per line; blank lines and lines starting with
+    '#' are skipped.
+    """
+    schedule = []
+    with open(path) as schedule_file:
+        for line_number, line in enumerate(schedule_file, 1):
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            try:
+                temperature, position, dwell = line.split(",")
+                schedule.append((float(temperature), int(position), float(dwell)))
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: expected 'set temp,marker position,dwell', got {line!r}")
+    return schedule
+
+
+class SteadyStateDetector:
+    """ readings are steady once they stayed within tolerance for window seconds """
+
+    def __init__(self, window=10.0, tolerance=0.5):
+        self.window = window
+        self.tolerance = tolerance
+        self.readings = deque()
+
+    def reset(self):
+        self.readings.clear()
+
+    def add(self, timestamp, temperature):
+        """
+        This method adds a reading and returns True if the readings of
+        the last window seconds are steady.
+        """
+        self.readings.append((timestamp, temperature))
+        while self.readings[0][0] < timestamp - self.window:
+            self.readings.popleft()
+        temperatures = [reading for _, reading in self.readings]
+        covered = timestamp - self.readings[0][0] >= self.window * 0.9
+        return covered and max(temperatures) - min(temperatures) <= self.tolerance
+
+
+class BatchWriter:
+    """ CSV rows buffered in memory and written in batches """
+
+    def __init__(self, outputCSV, header, batch_size=512, flush_interval=1.0):
+        self.file = open(outputCSV, "w")
+        self.file.write(header + "\n")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows = []
+        self.rows_written = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, row):
+        self.rows.append(",".join(str(value) for value in row) + "\n")
+        if len(self.rows) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.file.writelines(self.rows)
+        self.file.flush()
+        self.rows_written += len(self.rows)
+        self.rows = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
 class ArduinoTempMonitor:
     """ object for pulling in temp data from arduino """
 
-    def __init__(self, port):
+    def __init__(self, port, baudrate=9600):
         self.port = port
-        self.serial = serial.Serial(port, 9600)
+        self.serial = serial.Serial(port, baudrate, timeout=0.1)
+        self.partial = b""
+
+    def read_measurements(self):
+        """
+        This method returns every temperature received since the last
+        call as (time, temperature) pairs; waits up to the read timeout
+        for the first byte.
+        """
+        data = self.serial.read(self.serial.in_waiting or 1)
+        now = time.time()
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        measurements = []
+        for line in lines:
+            try:
+                temperature = float(line.decode("ascii").strip())
+            except (UnicodeDecodeError, ValueError):
+                continue
+            if temperature not in SENSOR_ERRORS:
+                measurements.append((now, temperature))
+        return measurements
+
+    def discard_pending(self):
+        """ drops the readings taken before now (e.g. while moving the marker) """
+        self.serial.reset_input_buffer()
+        self.partial = b""
 
     def writeOutputToCSV(self, outputCSV, number_of_measurements=50):
         """
-        This method saves the measured temperatures along the 
+        This method saves the measured temperatures along the
         phagebox chip to a specified output file.
         """
         # remove file if it exists
@@ -49,8 +171,7 @@ class ArduinoTempMonitor:
             os.remove(outputCSV)
 
         # open and initialize the output file
-        output_file = open(outputCSV, "a")
-        output_file.write(f"set temp,marker position,measured temperature\n")
+        output_file = BatchWriter(outputCSV, "set temp,marker position,measured temperature,time,steady")
 
         # find temperatures along the length of the device
         for temperature in range(60, 100, 10):
@@ -59,25 +180,91 @@ class ArduinoTempMonitor:
             for position in range(0, 8, 1):
                 print(f"Change position to {position}")
                 input("Press Enter once position steady...")
+                self.discard_pending()
                 # collect temperatures at the current position for a set temperature.
                 measurements = 0
                 while measurements < number_of_measurements:
-                    temp_measures: float = float(self.serial.readline().decode(
-                        'ascii').strip(" ").strip("\n").strip("\r").lower())
-                    print(temp_measures)
-                    # save to CSV
-                    output_file.write(
-                        f"{temperature},{position},{temp_measures}\n")
-                    # update counter and reset buffer.
-                    measurements += 1
-                    self.serial.reset_input_buffer()
+                    for timestamp, temp_measure in self.read_measurements():
+                        output_file.write((temperature, position, temp_measure, timestamp, 1))
+                        measurements += 1
+                print(f"{measurements} readings at position {position}")
+        output_file.close()
+
+    def runSchedule(self, outputCSV, schedule, detector, move_time=5.0, max_settle=600.0, phagebox=None):
+        """
+        This method runs a scripted sweep: for every (set temp, marker
+        position, dwell) step, readings are recorded as not steady
+        until the detector finds them steady, then as steady for dwell
+        seconds. max_settle is checked against the wall clock, so a
+        sensor that stops reporting cannot stall the sweep; a step that
+        does not settle in time is reported as timed out and its dwell
+        is recorded with steady=0, which keeps it out of calibration
+        fits. With a phagebox
+        (ArduinoController) each new set point is held on both
+        peltiers for as long as its steps may take.
+        """
+        output_file = BatchWriter(outputCSV, "set temp,marker position,measured temperature,time,steady")
+        sweep_start = time.time()
+        current_temperature = None
+        timed_out = []
+        for step, (temperature, position, dwell) in enumerate(schedule):
+            if temperature != current_temperature:
+                current_temperature = temperature
+                print(f"Set temperature to {temperature}")
+                if phagebox is not None:
+                    hold = sum(step_dwell + move_time + max_settle for step_temperature, _, step_dwell
+                               in schedule[step:] if step_temperature == temperature)
+                    phagebox.start_pcr(3, 1, temperature, hold, temperature, 0, temperature, 0)
+            print(f"[{step + 1}/{len(schedule)}] Change position to {position}")
+            detector.reset()
+            step_start = time.time()
+            settle_deadline = step_start + move_time + max_settle
+            steady_since = None # steady readings are recorded with steady=1
+            dwell_start = None # once steady or timed out
+            readings = 0
+            while dwell_start is None or time.time() - dwell_start < dwell:
+                for timestamp, temp_measure in self.read_measurements():
+                    moving = timestamp - step_start < move_time
+                    if dwell_start is None and not moving:
+                        if detector.add(timestamp, temp_measure):
+                            steady_since = dwell_start = timestamp
+                            print(f"steady at {temp_measure} after {timestamp - step_start:.0f} s")
+                    output_file.write((temperature, position, temp_measure, timestamp, int(steady_since is not None)))
+                    readings += 1
+                if dwell_start is None and time.time() > settle_deadline:
+                    # checked on every pass, even when nothing was read;
+                    # the dwell is still recorded, but as not steady
+                    dwell_start = time.time()
+                    timed_out.append((temperature, position))
+                    print(f"WARNING: not steady after {dwell_start - step_start:.0f} s ({readings} readings), "
+                          f"recording {dwell:g} s as not steady and moving on")
+            print(f"{readings} readings at position {position}")
+        output_file.close()
+        if timed_out:
+            print(f"{len(timed_out)} steps timed out before settling: "
+                  + ", ".join(f"{temperature} at {position}" for temperature, position in timed_out))
+        print(f"sweep done in {time.time() - sweep_start:.0f} s, {output_file.rows_written} readings -> {outputCSV}")
 
 
 def main():
     arguments = parseArgs(sys.argv[1:])
-    mag_monitor = ArduinoTempMonitor(arguments.port)
-    mag_monitor.writeOutputToCSV(
-        arguments.outputfile)
+    mag_monitor = ArduinoTempMonitor(arguments.port, arguments.baudrate)
+    if arguments.schedule is None:
+        mag_monitor.writeOutputToCSV(
+            arguments.outputfile)
+        return
+    phagebox = None
+    if arguments.phagebox:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+        from src.phagebox_gui.arduino_controller import ArduinoController
+        phagebox = ArduinoController(arguments.phagebox)
+    try:
+        mag_monitor.runSchedule(arguments.outputfile, read_schedule(arguments.schedule),
+                                SteadyStateDetector(arguments.window, arguments.tolerance),
+                                arguments.move_time, arguments.max_settle, phagebox)
+    finally:
+        if phagebox is not None:
+            phagebox.stop_now()
 
 
 if __name__ == "__main__":
@@ -14,7 +14,8 @@ from struct import *
 
 if __name__ == "__main__":
     port_in = str(sys.argv[1])
-    ser = serial.Serial(port_in, 9600)
+    baud_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 9600
+    ser = serial.Serial(port_in, baud_rate)
     while (True):
         # message = bytearray([1, 2])
         message = b'101010'
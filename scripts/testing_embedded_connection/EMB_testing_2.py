@@ -146,7 +146,7 @@ print ()
 # NOTE the user must ensure that the serial port and baudrate are correct
 # serPort = "/dev/ttyS80"
 serPort = str(sys.argv[1])
-baudRate = 9600
+baudRate = int(sys.argv[2]) if len(sys.argv) > 2 else 9600
 ser = serial.Serial(serPort, baudRate)
 print ("Serial port " + serPort + " opened  Baudrate " + str(baudRate))
 
@@ -32,6 +32,13 @@ void init_phagebox()
 void start_phagebox()
 {
     getDataFromPC(temp_modules);
+    check_baudrate();
+
+    // stamp this round of readings
+    if (front_temp_module.current_state != STOPPED || back_temp_module.current_state != STOPPED)
+    {
+        send_timestamp();
+    }
 
     // if PCR is on, evaluate
     for (int i = 0; i < TEMPMODULE_COUNT; i++)
@@ -43,21 +50,13 @@ void start_phagebox()
             float desired_temp = curr_temp_module->get_desiredTemp();
             if (i == 0)
             {
-                Serial.print("T_FRONT,"); // expected by GUI
-                Serial.print(curr_temp);
-                Serial.print("\n");
-                Serial.print("T_FRONT_SET,"); // expected by GUI
-                Serial.print(desired_temp);
-                Serial.print("\n");
+                send_telemetry(TAG_FRONT, "T_FRONT", curr_temp); // expected by GUI
+                send_telemetry(TAG_FRONT_SET, "T_FRONT_SET", desired_temp);
             }
             else if (i == 1)
             {
-                Serial.print("T_BACK,"); // expected by GUI
-                Serial.print(curr_temp);
-                Serial.print("\n");
-                Serial.print("T_BACK_SET,"); // expected by GUI
-                Serial.print(desired_temp);
-                Serial.print("\n");
+                send_telemetry(TAG_BACK, "T_BACK", curr_temp); // expected by GUI
+                send_telemetry(TAG_BACK_SET, "T_BACK_SET", desired_temp);
             }
             // bang bang controller
             if (curr_temp <= desired_temp)
@@ -11,6 +11,7 @@
 #include "timer.h"
 #include "GPIO_Control.h"
 #include "serial_parser.h"
+#include "telemetry_frame.h"
 #include "TemperatureModule.h"
 
 // Check Arduino
@@ -13,6 +13,41 @@ byte bytesRecvd = 0;
 boolean readInProgress = false;
 boolean newDataFromPC = false;
 
+/*
+ * Descripton:
+ *     Baud rate bookkeeping for "<R,N>". After a switch
+ *     the host has BAUD_CONFIRM_MS to send a command at
+ *     the new rate, otherwise the old rate is restored.
+ */
+long serial_baudrate = DEFAULT_BAUDRATE;
+long previous_baudrate = DEFAULT_BAUDRATE;
+boolean baudrate_unconfirmed = false;
+unsigned long baudrate_switch_time = 0;
+
+// Defined in header
+void change_baudrate(long baudrate)
+{
+  Serial.flush(); // let the echo leave at the old rate
+  Serial.end();
+  Serial.begin(baudrate);
+  previous_baudrate = serial_baudrate;
+  serial_baudrate = baudrate;
+  baudrate_unconfirmed = true;
+  baudrate_switch_time = millis();
+}
+
+// Defined in header
+void check_baudrate()
+{
+  if (baudrate_unconfirmed && millis() - baudrate_switch_time > BAUD_CONFIRM_MS)
+  {
+    Serial.end();
+    Serial.begin(previous_baudrate);
+    serial_baudrate = previous_baudrate;
+    baudrate_unconfirmed = false;
+  }
+}
+
 // Defined in header
 void getDataFromPC(TemperatureModule *temp_modules[])
 {
@@ -67,6 +102,9 @@ void parseData(TemperatureModule *temp_modules[])
   strtokIndx = strtok(inputBuffer, delim); // get the first part - the string
   strcpy(messageFromPC, strtokIndx);       // copy it to messageFromPC
 
+  // any command received confirms the current baud rate
+  baudrate_unconfirmed = false;
+
   if (messageFromPC[0] == 'H')
   {
 
@@ -141,6 +179,63 @@ void parseData(TemperatureModule *temp_modules[])
     if (mag_val)
       toggle_pin(RELAY_MAG);
   }
+  else if (messageFromPC[0] == 'P')
+  {
+    // parse telemetry mode
+    strtokIndx = strtok(NULL, delim);                       // parse on delimm
+    int mode = strtokIndx ? atoi(strtokIndx) : -1;          // str2int
+
+    if (mode >= TELEMETRY_TEXT && mode <= TELEMETRY_BINARY_F32)
+    {
+      // send value back for validation (as text, before switching)
+      Serial.print(startMarker);
+      Serial.print(mode);
+      Serial.print(endMarker);
+      telemetry_mode = mode;
+    }
+    else
+    {
+      Serial.print("WRONG SERIAL MSG.");
+    }
+  }
+  else if (messageFromPC[0] == 'T')
+  {
+    // parse timestamp flag
+    strtokIndx = strtok(NULL, delim);                       // parse on delimm
+    int stamps = strtokIndx ? atoi(strtokIndx) : -1;        // str2int
+
+    if (stamps == 0 || stamps == 1)
+    {
+      // send value back for validation
+      Serial.print(startMarker);
+      Serial.print(stamps);
+      Serial.print(endMarker);
+      telemetry_timestamps = stamps;
+    }
+    else
+    {
+      Serial.print("WRONG SERIAL MSG.");
+    }
+  }
+  else if (messageFromPC[0] == 'R')
+  {
+    // parse baud rate
+    strtokIndx = strtok(NULL, delim);                       // parse on delimm
+    long baudrate = strtokIndx ? atol(strtokIndx) : 0;      // str2long
+
+    if (baudrate >= MIN_BAUDRATE && baudrate <= MAX_BAUDRATE)
+    {
+      // send value back for validation (at the old rate)
+      Serial.print(startMarker);
+      Serial.print(baudrate);
+      Serial.print(endMarker);
+      change_baudrate(baudrate);
+    }
+    else
+    {
+      Serial.print("WRONG SERIAL MSG.");
+    }
+  }
   else
   {
     Serial.print("WRONG SERIAL MSG.");
@@ -10,6 +10,13 @@
 #define serial_parser_h
 #include "TemperatureModule.h"
 #include "GPIO_Control.h"
+#include "telemetry_frame.h"
+
+// Baud rates. DEFAULT_BAUDRATE must match Serial.begin() in the sketch.
+#define DEFAULT_BAUDRATE (9600)
+#define MIN_BAUDRATE (9600)
+#define MAX_BAUDRATE (1000000)
+#define BAUD_CONFIRM_MS (2000)
 
 // Check Arduino
 #if (ARDUINO >= 100)
@@ -53,4 +60,34 @@ void getDataFromPC(TemperatureModule *temp_modules[]);
  */
 void parseData(TemperatureModule *temp_modules[]);
 
+/*
+ * Function:
+ *     change_baudrate()
+ * Description:
+ *     restarts Serial at a new baud rate ("<R,N>"). The rate is
+ *     kept only if a command arrives within BAUD_CONFIRM_MS.
+ * Input:
+ *     1. baud rate
+ * Output:
+ *     void/NA
+ * Error Handling:
+ *     see check_baudrate()
+ */
+void change_baudrate(long baudrate);
+
+/*
+ * Function:
+ *     check_baudrate()
+ * Description:
+ *     restores the previous baud rate if a switch was not
+ *     confirmed in time (the host could not follow).
+ * Input:
+ *     void/NA
+ * Output:
+ *     void/NA
+ * Error Handling:
+ *     void/NA
+ */
+void check_baudrate();
+
 #endif
\ No newline at end of file
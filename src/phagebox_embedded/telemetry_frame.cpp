@@ -0,0 +1,108 @@
+#include "telemetry_frame.h"
+
+byte telemetry_mode = TELEMETRY_TEXT;
+byte telemetry_timestamps = 0;
+
+// Defined in header
+void send_telemetry(byte tag_id, const char *tag, float value)
+{
+    if (telemetry_mode == TELEMETRY_TEXT)
+    {
+        Serial.print(tag);
+        Serial.print(",");
+        Serial.print(value);
+        Serial.print("\n");
+        return;
+    }
+
+    byte frame[7];
+    byte length; // sync + tag + payload
+    frame[0] = FRAME_SYNC;
+    if (telemetry_mode == TELEMETRY_BINARY_F16)
+    {
+        uint16_t half = float_to_half(value);
+        frame[1] = tag_id | FLOAT16_FLAG;
+        frame[2] = half & 0xFF;
+        frame[3] = half >> 8;
+        length = 4;
+    }
+    else
+    {
+        frame[1] = tag_id;
+        memcpy(&frame[2], &value, 4); // AVR floats are little endian IEEE 754
+        length = 6;
+    }
+    frame[length] = crc8(&frame[1], length - 1);
+    Serial.write(frame, length + 1);
+}
+
+// Defined in header
+void send_timestamp()
+{
+    if (!telemetry_timestamps)
+    {
+        return;
+    }
+    unsigned long now = millis();
+    if (telemetry_mode == TELEMETRY_TEXT)
+    {
+        Serial.print("T_MILLIS,");
+        Serial.print(now);
+        Serial.print("\n");
+        return;
+    }
+
+    byte frame[7];
+    frame[0] = FRAME_SYNC;
+    frame[1] = TAG_MILLIS;
+    for (byte i = 0; i < 4; i++)
+    {
+        frame[2 + i] = (now >> (8 * i)) & 0xFF; // little endian
+    }
+    frame[6] = crc8(&frame[1], 5);
+    Serial.write(frame, 7);
+}
+
+// Defined in header
+byte crc8(const byte *data, byte length)
+{
+    byte crc = 0;
+    for (byte i = 0; i < length; i++)
+    {
+        crc ^= data[i];
+        for (byte bit = 0; bit < 8; bit++)
+        {
+            crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+        }
+    }
+    return crc;
+}
+
+// Defined in header
+uint16_t float_to_half(float value)
+{
+    uint32_t bits;
+    memcpy(&bits, &value, 4);
+    uint16_t sign = (bits >> 16) & 0x8000;
+    int16_t exponent = (int16_t)((bits >> 23) & 0xFF) - 127 + 15;
+    uint16_t mantissa = (bits >> 13) & 0x03FF;
+
+    if (((bits >> 23) & 0xFF) == 0xFF)
+    { // infinity or NaN
+        return sign | 0x7C00 | (mantissa ? 0x0200 : 0);
+    }
+    if (exponent >= 0x1F)
+    { // too large
+        return sign | 0x7C00;
+    }
+    if (exponent <= 0)
+    { // too small
+        return sign;
+    }
+    uint16_t half = sign | (exponent << 10) | mantissa;
+    if (bits & 0x1000)
+    { // round to nearest (a carry correctly bumps the exponent)
+        half++;
+    }
+    return half;
+}
@@ -0,0 +1,110 @@
+/*
+ * Descripton:
+ *     This module sends telemetry to the host, either as
+ *     text lines ("T_FRONT,72.00\n") or as compact binary
+ *     frames. The host picks the mode with "<P,N>":
+ *         0 - text (default after reset)
+ *         1 - binary frames, float16 payload (5 bytes)
+ *         2 - binary frames, float32 payload (7 bytes)
+ *
+ *     Frame: sync byte 0xA5, tag id (bit 7 set for float16),
+ *     little endian payload, CRC-8 (polynomial 0x07) of the
+ *     tag id and payload. All other output stays text.
+ */
+#ifndef telemetry_frame_h
+#define telemetry_frame_h
+
+// Check Arduino
+#if (ARDUINO >= 100)
+#include <Arduino.h>
+#else
+#include <WProgram.h>
+#include <pins_arduino.h>
+#endif
+
+// Telemetry modes ("<P,N>").
+#define TELEMETRY_TEXT (0)
+#define TELEMETRY_BINARY_F16 (1)
+#define TELEMETRY_BINARY_F32 (2)
+
+// Frame defines.
+#define FRAME_SYNC (0xA5)
+#define FLOAT16_FLAG (0x80)
+
+// Tag ids (shared with binary_protocol.py).
+#define TAG_METAL (1)
+#define TAG_FRONT (2)
+#define TAG_BACK (3)
+#define TAG_FRONT_SET (4)
+#define TAG_BACK_SET (5)
+#define TAG_MILLIS (6) // uint32 payload, never float16
+
+// current telemetry mode, set by "<P,N>".
+extern byte telemetry_mode;
+
+// whether readings are preceded by a millis() timestamp, set by "<T,N>".
+extern byte telemetry_timestamps;
+
+/*
+ * Function:
+ *     send_telemetry()
+ * Description:
+ *     sends one reading in the current telemetry mode.
+ * Input:
+ *     1. tag id (TAG_*)
+ *     2. text tag, e.g. "T_FRONT"
+ *     3. value
+ * Output:
+ *     void/NA
+ * Error Handling:
+ *     void/NA
+ */
+void send_telemetry(byte tag_id, const char *tag, float value);
+
+/*
+ * Function:
+ *     send_timestamp()
+ * Description:
+ *     sends millis() in the current telemetry mode ("T_MILLIS,N"
+ *     or a TAG_MILLIS frame) if timestamps are enabled. Called
+ *     before the readings it stamps.
+ * Input:
+ *     void/NA
+ * Output:
+ *     void/NA
+ * Error Handling:
+ *     void/NA
+ */
+void send_timestamp();
+
+/*
+ * Function:
+ *     crc8()
+ * Description:
+ *     CRC-8 (polynomial 0x07, initial value 0) of a buffer.
+ * Input:
+ *     1. buffer
+ *     2. number of bytes
+ * Output:
+ *     the CRC
+ * Error Handling:
+ *     void/NA
+ */
+byte crc8(const byte *data, byte length);
+
+/*
+ * Function:
+ *     float_to_half()
+ * Description:
+ *     converts a float to IEEE 754 half precision, rounding to
+ *     nearest. Values too small for a normal half become 0.
+ * Input:
+ *     1. value
+ * Output:
+ *     the half precision bits
+ * Error Handling:
+ *     out of range values become +/- infinity
+ */
+uint16_t float_to_half(float value);
+
+#endif
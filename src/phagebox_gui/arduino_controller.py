@@ -26,24 +26,70 @@ Communication Through UART
     toggle the MAGNET
 5. "<B,1,1>"
     toggle both the MAGNET and LED
+6. "<P,1>"
+    switch telemetry to binary frames (see binary_protocol.py). Sent once
+    the device is ready; firmware without frames rejects it and the
+    text protocol is kept.
+7. "<R,115200>"
+    switch the link to 115200 baud. The device echoes at the old rate
+    and switches; the host follows and confirms with a '<P,N>' at the
+    new rate. Without that confirmation the device returns to the old
+    rate after two seconds, and so does the host.
+8. "<T,1>"
+    stamp the telemetry with the device's millis() counter (T_MILLIS
+    before each batch of readings). Only sent with device_time=True.
+
+
+Reading Temperatures From Another Thread
+----------------------------------------
+    current_temperatures and set_temperatures are updated in place, one
+    value at a time, by the reader thread. Other threads (the Tk thread)
+    should read ArduinoController.snapshot instead: a TemperatureSample
+    tuple built after every parsed sample and published with a single
+    reference assignment, so a reader always gets one whole sample
+    without taking a lock. sequence tells whether it is a new one.
+    To get every sample rather than the latest, take a buffer from
+    buffer_samples() and drain it.
+
+Time Base
+---------
+    Samples are stamped on the reader thread with time.monotonic() as
+    the chunk holding them is read, not when a consumer looks at them.
+    With device_time=True the device also sends its millis() counter
+    and the samples are stamped with the time they were measured
+    instead (see time_base.DeviceClock). TemperatureSample.time is the
+    same instant on the wall clock (a fixed offset from monotonic, so
+    it never jumps with NTP).
 
 
 Useful Methods/Classes
 ----------------------
     1. ArduinoController - acts as a controller for Arduino. This acts as an API for the embedded software.
+    2. TemperatureSample - one consistent, timestamped set of readings.
 """
 # standard library
-from time import sleep
+from collections import deque, namedtuple
 from serial import Serial
-import numpy, sys
 import time
 import threading
-import tkinter as tk
 # non-standard library
 # in-house packages
+from src.phagebox_gui.binary_protocol import (BINARY_F16_PROTOCOL, PROTOCOL_NAMES, TEXT_PROTOCOL,
+                                               BinaryTelemetryParser)
+from src.phagebox_gui.command_pipeline import CommandPipeline
+from src.phagebox_gui.commands import BACKLIGHT_TOGGLE, MAGNET_TOGGLE, expected_ack, pcr_commands, pcr_program
+from src.phagebox_gui.time_base import DeviceClock
 
 
 
+# sequence counts the samples parsed (0 before the first one); monotonic
+# is the time.monotonic() the sample was taken at (see Time Base) and
+# time the same on the wall clock; device_ms is the device's millis()
+# stamp (None without device_time).
+TemperatureSample = namedtuple("TemperatureSample",
+                               ["sequence", "time", "monotonic", "device_ms",
+                                "metal", "front", "back", "front_set", "back_set"])
+
 
 class ArduinoController:
     """
@@ -51,23 +97,77 @@ class ArduinoController:
         This class contains methods for controlling the arduino.
     """
 
-    def __init__(self, port_in):
+    # longest time (seconds) the reader blocks on the port before
+    # re-checking the stop event. Bounds the stop()/stop_now() delay.
+    READ_TIMEOUT = 0.1
+
+    # longest time (seconds) to wait for the board to come out of reset.
+    CONNECT_TIMEOUT = 2.0
+
+    # printed by init_phagebox() once the board is up.
+    READY_BANNER = b"<Arduino is ready>"
+
+    # longest time (seconds) to wait for the answer to '<P,N>'/'<R,N>'. The board
+    # blinks its LED for a second after the banner before it reads commands.
+    NEGOTIATE_TIMEOUT = 2.5
+
+    # baud rate of Serial.begin() in phagebox_controller.ino.
+    DEFAULT_BAUDRATE = 9600
+
+    # samples a buffer_samples() buffer holds before the oldest are dropped.
+    SAMPLE_BUFFER = 1 << 16
+
+    def __init__(self, port_in, read_timeout=READ_TIMEOUT, connect_timeout=CONNECT_TIMEOUT,
+                 ack_timeout=CommandPipeline.ACK_TIMEOUT, protocol=BINARY_F16_PROTOCOL,
+                 baudrate=DEFAULT_BAUDRATE, max_baudrate=None, device_time=False):
         """
         Description:
-            Initialization for the class for controlling the arduino
+            Initialization for the class for controlling the arduino.
+            Waits up to connect_timeout seconds for the device (see
+            wait_until_ready); pass 0 to return immediately and poll
+            is_ready() instead. Commands are sent by a CommandPipeline
+            that waits up to ack_timeout seconds for each echo.
+            protocol is the telemetry protocol asked for once the
+            device is ready (TEXT_PROTOCOL to never ask); self.protocol
+            is the one in use.
+            baudrate is the rate the device starts at. If max_baudrate
+            is higher, the link is switched to it once the device is
+            ready (see negotiate_baudrate).
+            device_time asks the device to timestamp its telemetry
+            (see Time Base).
         """
         # check for serial (template factory?)
         self._stop_event = threading.Event()
-        self.ser : Serial = Serial(port_in, 9600)
+        self._ready_event = threading.Event()
+        self.port = port_in
+        self.pcr_programs = [] # every PCR program sent, for the run metadata
+        self.ser : Serial = Serial(port_in, baudrate, timeout=read_timeout)
         self.ser.reset_input_buffer()
         self.ser.reset_output_buffer()
-        sleep(2) # wait for connection
         self.backlightOn = False
         self.magnetOn = False
-        self.t1 = threading.Thread(target=self.read_serial)
-        self.t1.start()
         self.current_temperatures = [-1, -1, -1]
         self.set_temperatures = [-1, -1]
+        self.wall_offset = time.time() - time.monotonic()
+        self.received = time.monotonic() # when the chunk being parsed was read
+        self.device_time = device_time
+        self.device_ms = None # latest T_MILLIS
+        self.clock = DeviceClock()
+        self.snapshot = TemperatureSample(0, time.time(), self.received, None,
+                                          *self.current_temperatures, *self.set_temperatures)
+        self.sample_buffer = None
+        self.run_logger = None
+        self.requested_protocol = protocol
+        self.protocol = TEXT_PROTOCOL
+        self.max_baudrate = max_baudrate
+        self.previous_baudrate = baudrate
+        self.commands = CommandPipeline(self.ser.write, ack_timeout=ack_timeout)
+        self.parser = BinaryTelemetryParser(self.current_temperatures, self.set_temperatures,
+                                            on_unknown=self.print_unknown, on_sample=self.handle_sample,
+                                            on_ack=self.commands.acknowledge, on_clock=self.handle_clock)
+        self.t1 = threading.Thread(target=self.read_serial, daemon=True)
+        self.t1.start()
+        self.wait_until_ready(connect_timeout)
         
     def __del__(self):
         """
@@ -78,68 +178,139 @@ class ArduinoController:
         self.ser.__del__()
 
     def stop_now(self):
+        self.commands.close()
         self.stop()
-        self.t1.join()
+        self.t1.join(timeout=self.ser.timeout * 10)
 
     def stop(self):
         self._stop_event.set()
 
+    def is_ready(self):
+        return self._ready_event.is_set()
+
+    def wait_until_ready(self, timeout=CONNECT_TIMEOUT):
+        """
+        Description:
+            Waits until the device sends its ready banner or its first
+            valid telemetry line (opening the port resets the board),
+            or until timeout seconds have passed. Returns is_ready().
+        """
+        return self._ready_event.wait(timeout)
+
+    def mark_ready(self):
+        """
+        Description:
+            Called (on the reader thread) when the device shows signs
+            of life. The first time, asks for the requested protocol
+            and baud rate.
+        """
+        if self._ready_event.is_set():
+            return
+        self._ready_event.set()
+        if self.requested_protocol != TEXT_PROTOCOL:
+            self.negotiate_protocol(self.requested_protocol)
+        if self.max_baudrate and self.max_baudrate > self.ser.baudrate:
+            self.negotiate_baudrate(self.max_baudrate)
+        if self.device_time:
+            self.send_serial_msg("<T,1>", timeout=self.NEGOTIATE_TIMEOUT)
+
+    def negotiate_protocol(self, protocol):
+        """
+        Description:
+            Asks the device to send telemetry in the given protocol.
+            self.protocol changes once the device acknowledges; if it
+            rejects the request (older firmware) or does not answer,
+            the current protocol stays.
+        """
+        return self.send_serial_msg(f"<P,{protocol}>", on_ack=self.protocol_changed, timeout=self.NEGOTIATE_TIMEOUT)
+
+    def protocol_changed(self, command):
+        self.protocol = command.ack
+        print(f"telemetry protocol: {PROTOCOL_NAMES.get(command.ack, command.ack)}")
+
+    def negotiate_baudrate(self, baudrate):
+        """
+        Description:
+            Asks the device to switch the link to baudrate. Older
+            firmware rejects the request and the rate stays.
+        """
+        return self.send_serial_msg(f"<R,{baudrate}>", on_ack=self.baudrate_changed, timeout=self.NEGOTIATE_TIMEOUT)
+
+    def baudrate_changed(self, command):
+        """
+        Description:
+            The device switched after echoing; follow it and confirm
+            (nothing else is written before this returns).
+        """
+        self.previous_baudrate = self.ser.baudrate
+        self.ser.baudrate = command.ack
+        self.parser.reset()
+        self.send_serial_msg(f"<P,{self.protocol}>", on_ack=self.baudrate_confirmed,
+                             timeout=self.NEGOTIATE_TIMEOUT, on_fail=self.baudrate_failed)
+
+    def baudrate_confirmed(self, command):
+        print(f"baud rate: {self.ser.baudrate}")
+
+    def baudrate_failed(self, command):
+        """
+        Description:
+            The new rate did not work; the device falls back to the
+            previous rate on its own, so the host does too.
+        """
+        print(f"no answer at {self.ser.baudrate} baud, back to {self.previous_baudrate}")
+        self.ser.baudrate = self.previous_baudrate
+        self.parser.reset()
+
     def stopped(self):
         return self._stop_event.is_set()
 
-    def send_serial_msg(self, str):
+    def send_serial_msg(self, str, coalesce_key=None, on_ack=None, timeout=None, on_fail=None):
         """
         Description:
-            Sends a string through serial.
+            Queues a string for the writer thread and returns its
+            Command without waiting (see CommandPipeline.submit).
         """
-        self.ser.write(bytes(str, 'ascii'))
+        return self.commands.submit(str, expected_ack(str), coalesce_key, on_ack, timeout, on_fail)
 
     def toggleBacklight(self):
         """
         Description:
-            turns the backlight on and off
+            turns the backlight on and off. backlightOn follows once
+            the device acknowledges the toggle.
         """
         print("light toggle is being called")
-        self.send_serial_msg("<B,0,1>")
-        if (self.backlightOn):
-            self.backlightOn = False
-        else:
-            self.backlightOn = True
+        return self.send_serial_msg(BACKLIGHT_TOGGLE, coalesce_key="backlight", on_ack=self.backlight_toggled)
 
     def toggleMagnet(self):
         """
         Description:
-            turns the magnet on and off
+            turns the magnet on and off. magnetOn follows once the
+            device acknowledges the toggle.
         """
         print("magnet toggle is being called")
-        self.send_serial_msg("<B,1,0>")
-        if (self.magnetOn):
-            self.magnetOn = False
-        else:
-            self.magnetOn = True
+        return self.send_serial_msg(MAGNET_TOGGLE, coalesce_key="magnet", on_ack=self.magnet_toggled)
+
+    def backlight_toggled(self, command):
+        self.backlightOn = not self.backlightOn
+
+    def magnet_toggled(self, command):
+        self.magnetOn = not self.magnetOn
 
     def start_pcr(self, peltier, cycles, d_temp, d_time, a_temp, a_time, e_temp, e_time):
         """
         Description:
-            This method initiates PCR for a given peliter.
+            This method initiates PCR for a given peliter. Returns the
+            queued Commands (two for peltier 3, sent one after the
+            other's acknowledgement).
         """
         print("STARTING PCR")
-        peltier = int(peltier)
-        cycles = int(cycles)
-        d_temp = round(d_temp, 1)
-        d_time = round(d_time, 1)
-        a_temp = round(a_temp, 1)
-        a_time = round(a_time, 1)
-        e_temp = round(e_temp, 1)
-        e_time = round(e_time, 1)
-        if peltier == 3:
-            print(f"<H,1,{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
-            self.send_serial_msg(f"<H,1,{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
-            print(f"<H,2,{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
-            self.send_serial_msg(f"<H,2,{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
-        else:
-            print(f"<H,2,{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
-            self.send_serial_msg(f"<H,{peltier},{cycles},{d_time},{d_temp},{a_time},{a_temp},{e_time},{e_temp}>")
+        program = pcr_program(peltier, cycles, d_temp, d_time, a_temp, a_time, e_temp, e_time)
+        self.pcr_programs.append({"time": time.time(), **program})
+        commands = []
+        for command in pcr_commands(program):
+            print(command)
+            commands.append(self.send_serial_msg(command))
+        return commands
 
     def read_serial(self):
         """
@@ -147,25 +318,71 @@ class ArduinoController:
             This method reads serial.
         Note:
             This should be ran on a seperate thread considering it is always read!
+            The read blocks on the port (up to the port timeout) instead of
+            polling in_waiting, so the thread sleeps until bytes arrive and
+            still sees stop() within one timeout.
         """
         while not self.stopped():
-            if self.ser.in_waiting:
-                serial_in_string = str(self.ser.readline()).strip("b").strip("'").strip("\\n").strip("\r")
-                pelt_identifier = serial_in_string.split(",")[0]
-                if pelt_identifier == "T_METAL":
-                    temperature = serial_in_string.split(",")[-1]
-                    self.current_temperatures[0] = float(temperature)
-                elif pelt_identifier == "T_FRONT":
-                    temperature = serial_in_string.split(",")[-1]
-                    self.current_temperatures[1] = float(temperature)
-                elif pelt_identifier == "T_BACK":
-                    temperature = serial_in_string.split(",")[-1]
-                    self.current_temperatures[2] = float(temperature)
-                elif pelt_identifier == "T_FRONT_SET":
-                    temperature = serial_in_string.split(",")[-1]
-                    self.set_temperatures[0] = float(temperature)
-                elif pelt_identifier == "T_BACK_SET":
-                    temperature = serial_in_string.split(",")[-1]
-                    self.set_temperatures[1] = float(temperature)
-                else:
-                    print(serial_in_string)
+            # block for at least one byte, then take whatever else is buffered.
+            chunk = self.ser.read(self.ser.in_waiting or 1)
+            if chunk:
+                self.received = time.monotonic()
+                self.parser.feed(chunk)
+
+    def buffer_samples(self, maxlen=SAMPLE_BUFFER):
+        """
+        Description:
+            Returns a deque that receives every TemperatureSample from
+            now on (the oldest are dropped beyond maxlen). Drain it with
+            popleft() from any thread.
+        """
+        self.sample_buffer = deque(maxlen=maxlen)
+        return self.sample_buffer
+
+    def attach_logger(self, run_logger):
+        """
+        Description:
+            Streams every parsed sample to a RunLogger (None to detach).
+        """
+        self.run_logger = run_logger
+
+    def handle_sample(self):
+        """
+        Description:
+            Called after every parsed sample. Marks the device ready,
+            publishes the new snapshot and hands it to the sample
+            buffer and the run logger.
+        """
+        if not self._ready_event.is_set():
+            self.mark_ready()
+        device_ms = self.device_ms
+        if device_ms is None:
+            taken = self.received
+        else:
+            taken = self.clock.to_host(device_ms, self.received)
+        snapshot = TemperatureSample(self.snapshot.sequence + 1, taken + self.wall_offset, taken, device_ms,
+                                     *self.current_temperatures, *self.set_temperatures)
+        self.snapshot = snapshot # one reference assignment: readers see the old or the new sample
+        if self.sample_buffer is not None:
+            self.sample_buffer.append(snapshot)
+        if self.run_logger is not None:
+            self.run_logger.log((snapshot.time, *snapshot[4:]))
+
+    def handle_clock(self, milliseconds):
+        """
+        Description:
+            Called for every device timestamp; it stamps the samples
+            that follow it.
+        """
+        self.device_ms = milliseconds
+
+    def print_unknown(self, line):
+        """
+        Description:
+            Prints lines from the device that are not telemetry.
+        """
+        if line.startswith(self.READY_BANNER):
+            self.mark_ready()
+        line = line.decode("ascii", errors="replace").strip()
+        if line:
+            print(line)
@@ -0,0 +1,223 @@
+"""
+Description:
+------------
+    This module encodes and decodes the binary telemetry frames of the
+    PhageBox (see telemetry_frame.cpp). A frame carries one sample in
+    5 or 7 bytes instead of a text line such as 'T_FRONT_SET,72.00\\n'
+    (18 bytes), which matters at 9600 baud.
+
+    The host asks for frames at connect time with '<P,1>' (float16) or
+    '<P,2>' (float32), and '<P,0>' returns to text. Firmware that knows
+    the command echoes '<N>' and switches. Older firmware answers
+    'WRONG SERIAL MSG.', and the host keeps using the text protocol.
+
+    Everything else the device prints (acknowledgements, state change
+    messages) stays text in every mode. The sync byte is not ASCII, so
+    BinaryTelemetryParser splits frames out of the stream and hands
+    the text in between to a TelemetryParser. It parses either
+    protocol, so the host never has to switch parsers. The bytes of a
+    frame that fails its CRC are skipped up to the next sync byte, line
+    or '<', so they are not mistaken for text.
+
+Frame Layout
+------------
+1. sync byte 0xA5
+2. tag id (TAG_IDS), with FLOAT16_FLAG set for a float16 payload
+3. payload: float16 (2 bytes) or float32 (4 bytes), little endian
+4. CRC-8 (polynomial 0x07, initial value 0) of the tag id and payload
+
+    The device timestamp (T_MILLIS, tag id CLOCK_TAG_ID) is sent as a
+    frame with an unsigned 32-bit payload instead of a float.
+
+Useful Methods/Classes
+----------------------
+    1. crc8 - CRC-8 of a byte string.
+    2. encode_frame - one sample as a frame.
+    3. encode_clock_frame - a device timestamp as a frame.
+    4. BinaryTelemetryParser - incremental parser for frames mixed with text.
+"""
+# standard library
+import math
+import struct
+# non-standard library
+# in-house packages
+from src.phagebox_gui.telemetry_parser import TelemetryParser
+
+
+
+# '<P,N>' telemetry protocols
+TEXT_PROTOCOL = 0
+BINARY_F16_PROTOCOL = 1
+BINARY_F32_PROTOCOL = 2
+PROTOCOL_NAMES = {TEXT_PROTOCOL: "text", BINARY_F16_PROTOCOL: "binary (float16)",
+                  BINARY_F32_PROTOCOL: "binary (float32)"}
+
+FRAME_SYNC = 0xA5
+FLOAT16_FLAG = 0x80
+
+# tag id -> text tag (ids are shared with telemetry_frame.h)
+TAG_IDS = {
+    1: b"T_METAL",
+    2: b"T_FRONT",
+    3: b"T_BACK",
+    4: b"T_FRONT_SET",
+    5: b"T_BACK_SET",
+}
+TAG_NUMBERS = {tag: tag_id for tag_id, tag in TAG_IDS.items()}
+
+# tag id of the device timestamp frame (T_MILLIS, uint32 milliseconds)
+CLOCK_TAG_ID = 6
+CLOCK_PAYLOAD = struct.Struct("<I")
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """
+    Description:
+        CRC-8 (polynomial 0x07, initial value 0, no reflection).
+    """
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(tag, value, half=True):
+    """
+    Description:
+        Returns the frame for a sample. tag is a text tag (b"T_FRONT");
+        half selects a float16 payload instead of float32 (values
+        beyond float16 range become +/- infinity, as in the firmware).
+    """
+    tag_id = TAG_NUMBERS[tag]
+    if half:
+        if abs(value) > 65504.0:
+            value = math.copysign(math.inf, value)
+        body = struct.pack("<Be", tag_id | FLOAT16_FLAG, value)
+    else:
+        body = struct.pack("<Bf", tag_id, value)
+    return bytes((FRAME_SYNC,)) + body + bytes((crc8(body),))
+
+
+def encode_clock_frame(milliseconds):
+    """
+    Description:
+        Returns the frame for a device timestamp (millis() wraps at 2**32).
+    """
+    body = bytes((CLOCK_TAG_ID,)) + CLOCK_PAYLOAD.pack(milliseconds & 0xFFFFFFFF)
+    return bytes((FRAME_SYNC,)) + body + bytes((crc8(body),))
+
+
+class BinaryTelemetryParser:
+    """
+    Description:
+        Incremental parser for a stream of binary frames and text.
+        Same interface as TelemetryParser, which it uses for the text.
+    """
+
+    def __init__(self, current_temperatures, set_temperatures, on_unknown=None, on_sample=None, on_ack=None,
+                 on_clock=None):
+        self.text = TelemetryParser(current_temperatures, set_temperatures, on_unknown=on_unknown,
+                                    on_sample=on_sample, on_ack=on_ack, on_clock=on_clock)
+        # frame tag byte -> (target list, index, payload struct)
+        self.dispatch = {}
+        for tag_id, tag in TAG_IDS.items():
+            target, index = self.text.dispatch[tag]
+            self.dispatch[tag_id] = (target, index, struct.Struct("<f"))
+            self.dispatch[tag_id | FLOAT16_FLAG] = (target, index, struct.Struct("<e"))
+        self.on_sample = on_sample
+        self.on_clock = on_clock
+        self.pending = b""
+        # statistics
+        self.frames = 0
+        self.frame_errors = 0
+
+    def reset(self):
+        """
+        Description:
+            Drops any partially received frame or line.
+        """
+        self.pending = b""
+        self.text.reset()
+
+    def feed(self, data):
+        """
+        Description:
+            Parses every complete frame and text line in data and
+            returns the number of samples parsed.
+        """
+        data = self.pending + bytes(data) if self.pending else bytes(data)
+        self.pending = b""
+        sync = bytes((FRAME_SYNC,))
+        dispatch = self.dispatch
+        on_sample = self.on_sample
+        parsed = 0
+        position = 0
+        while True:
+            start = data.find(sync, position)
+            if start < 0:
+                if position < len(data):
+                    parsed += self.text.feed(data[position:])
+                return parsed
+            if start > position:
+                parsed += self.text.feed(data[position:start])
+            if start + 1 >= len(data):
+                self.pending = data[start:]
+                return parsed
+            target = dispatch.get(data[start + 1])
+            if target is None and data[start + 1] == CLOCK_TAG_ID:
+                end = start + 3 + CLOCK_PAYLOAD.size
+                if end > len(data):
+                    self.pending = data[start:]
+                    return parsed
+                if crc8(data[start + 1:end - 1]) != data[end - 1]:
+                    position = self.resync(data, start + 1)
+                    continue
+                self.frames += 1
+                if self.on_clock is not None:
+                    self.on_clock(CLOCK_PAYLOAD.unpack_from(data, start + 2)[0])
+                position = end
+                continue
+            if target is None: # not a frame after all (a corrupted sync or tag)
+                position = self.resync(data, start + 1)
+                continue
+            end = start + 3 + target[2].size
+            if end > len(data):
+                self.pending = data[start:]
+                return parsed
+            if crc8(data[start + 1:end - 1]) != data[end - 1]:
+                position = self.resync(data, start + 1)
+                continue
+            target[0][target[1]] = target[2].unpack_from(data, start + 2)[0]
+            self.frames += 1
+            parsed += 1
+            if on_sample is not None:
+                on_sample()
+            position = end
+
+    def resync(self, data, position):
+        """
+        Description:
+            Counts a broken frame and returns where parsing continues:
+            the next sync byte, '<' or the start of the next line.
+        """
+        self.frame_errors += 1
+        self.text.reset()
+        candidates = [data.find(bytes((FRAME_SYNC,)), position), data.find(b"<", position)]
+        newline = data.find(b"\n", position)
+        if newline >= 0:
+            candidates.append(newline + 1)
+        candidates = [candidate for candidate in candidates if candidate >= 0]
+        return min(candidates) if candidates else len(data)
@@ -0,0 +1,326 @@
+"""
+Description:
+------------
+    This module converts raw peltier sensor readings to predicted chip
+    temperatures (and back, for set points) with a calibration model per
+    sensor. Models work on whole NumPy arrays, so a batch of samples or
+    an entire recorded run is calibrated in one call per channel.
+
+    Raw readings are what the device sends and what the run log stores;
+    calibrated values are always derived from them. A run can therefore
+    be re-calibrated at any time (see recalibrate_log) without being
+    recorded again.
+
+Models
+------
+1. LinearModel - chip = slope * raw + intercept (the --slope/--intercept
+   calibration of the GUI).
+2. PolynomialModel - chip = polynomial(raw), coefficients highest
+   power first, as np.polyfit returns them.
+3. PiecewiseModel - linear interpolation between (raw, chip) points,
+   extended along the first/last segment outside them.
+
+Calibration File
+----------------
+    JSON with one model per sensor (metal, front, back) and a default
+    for sensors without their own:
+
+    {"default": {"model": "linear", "slope": 1.2, "intercept": -2},
+     "front": {"model": "polynomial", "coefficients": [0.001, 1.1, -1.5]},
+     "back": {"model": "piecewise", "raw": [20, 60, 95], "chip": [22, 70, 109]}}
+
+    The set point channels (front_set, back_set) use the model of their
+    sensor.
+
+Useful Methods/Classes
+----------------------
+    1. LinearModel, PolynomialModel, PiecewiseModel - calibration models.
+    2. Calibration - per-sensor models, applied to arrays or runs.
+    3. calibrate_columns - calibrated and raw columns of a run.
+    4. recalibrate_log, recalibrate_run - a recorded run log or saved
+       .pbrun calibrated with a new calibration.
+"""
+# standard library
+import json
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.run_format import load_run
+from src.phagebox_gui.run_logger import read_log
+
+
+
+SENSORS = ("metal", "front", "back")
+
+# telemetry channel -> sensor whose model calibrates it
+CHANNEL_SENSORS = {"metal": "metal", "front": "front", "back": "back",
+                   "front_set": "front", "back_set": "back"}
+
+# peltier number of start_pcr -> sensor of its heater
+PELTIER_SENSORS = {1: "front", 2: "back"}
+
+
+class LinearModel:
+    """
+    Description:
+        chip = slope * raw + intercept.
+    """
+
+    name = "linear"
+
+    def __init__(self, slope=1.0, intercept=0.0):
+        self.slope = float(slope)
+        self.intercept = float(intercept)
+
+    def apply(self, raw):
+        return np.asarray(raw, dtype=np.float64) * self.slope + self.intercept
+
+    def invert(self, chip):
+        return (np.asarray(chip, dtype=np.float64) - self.intercept) / self.slope
+
+    def to_dict(self):
+        return {"model": self.name, "slope": self.slope, "intercept": self.intercept}
+
+    def __eq__(self, other):
+        return isinstance(other, LinearModel) and (self.slope, self.intercept) == (other.slope, other.intercept)
+
+
+class PolynomialModel:
+    """
+    Description:
+        chip = polynomial(raw). Inverted numerically, which needs the
+        polynomial to be monotonic over invert_range.
+    """
+
+    name = "polynomial"
+
+    # raw range (Celsius) the inverse is tabulated over
+    INVERT_RANGE = (-40.0, 160.0)
+
+    def __init__(self, coefficients, invert_range=INVERT_RANGE):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.invert_range = tuple(invert_range)
+        raw = np.linspace(*self.invert_range, 2001)
+        chip = np.polyval(self.coefficients, raw)
+        steps = np.diff(chip)
+        if np.all(steps < 0):
+            raw, chip = raw[::-1], chip[::-1]
+        elif not np.all(steps > 0):
+            raise ValueError("polynomial calibration is not monotonic over its range")
+        self._inverse = (chip, raw)
+
+    def apply(self, raw):
+        return np.polyval(self.coefficients, np.asarray(raw, dtype=np.float64))
+
+    def invert(self, chip):
+        chip_table, raw_table = self._inverse
+        return np.interp(np.asarray(chip, dtype=np.float64), chip_table, raw_table)
+
+    def to_dict(self):
+        return {"model": self.name, "coefficients": self.coefficients.tolist(),
+                "invert_range": list(self.invert_range)}
+
+    def __eq__(self, other):
+        return isinstance(other, PolynomialModel) and np.array_equal(self.coefficients, other.coefficients)
+
+
+class PiecewiseModel:
+    """
+    Description:
+        Linear interpolation between calibration points (raw sorted
+        ascending, chip increasing with raw).
+    """
+
+    name = "piecewise"
+
+    def __init__(self, raw, chip):
+        raw = np.asarray(raw, dtype=np.float64)
+        chip = np.asarray(chip, dtype=np.float64)
+        if len(raw) < 2 or raw.shape != chip.shape:
+            raise ValueError("piecewise calibration needs matching raw and chip points (at least two)")
+        order = np.argsort(raw)
+        self.raw, self.chip = raw[order], chip[order]
+        if np.any(np.diff(self.raw) <= 0) or np.any(np.diff(self.chip) <= 0):
+            raise ValueError("piecewise calibration points must be strictly increasing")
+
+    @staticmethod
+    def _interp(values, xs, ys):
+        values = np.asarray(values, dtype=np.float64)
+        result = np.interp(values, xs, ys)
+        # extend the end segments instead of clamping
+        low, high = values < xs[0], values > xs[-1]
+        result = np.where(low, ys[0] + (values - xs[0]) * (ys[1] - ys[0]) / (xs[1] - xs[0]), result)
+        return np.where(high, ys[-1] + (values - xs[-1]) * (ys[-1] - ys[-2]) / (xs[-1] - xs[-2]), result)
+
+    def apply(self, raw):
+        return self._interp(raw, self.raw, self.chip)
+
+    def invert(self, chip):
+        return self._interp(chip, self.chip, self.raw)
+
+    def to_dict(self):
+        return {"model": self.name, "raw": self.raw.tolist(), "chip": self.chip.tolist()}
+
+    def __eq__(self, other):
+        return (isinstance(other, PiecewiseModel) and np.array_equal(self.raw, other.raw)
+                and np.array_equal(self.chip, other.chip))
+
+
+MODELS = {model.name: model for model in (LinearModel, PolynomialModel, PiecewiseModel)}
+
+
+def model_from_dict(spec):
+    """
+    Description:
+        Builds a model from its to_dict() form.
+    """
+    spec = dict(spec)
+    model = MODELS.get(spec.pop("model", "linear"))
+    if model is None:
+        raise ValueError(f"unknown calibration model in {spec}")
+    return model(**spec)
+
+
+class Calibration:
+    """
+    Description:
+        One calibration model per sensor (metal, front, back).
+    """
+
+    def __init__(self, models=None, default=None):
+        """
+        Description:
+            models - {sensor: model}; sensors without one use default
+                     (identity if None).
+        """
+        self.default = default if default is not None else LinearModel()
+        self.models = dict(models or {})
+
+    @classmethod
+    def linear(cls, slope, intercept):
+        """
+        Description:
+            The same line for every sensor (the --slope/--intercept
+            calibration).
+        """
+        return cls(default=LinearModel(slope, intercept))
+
+    def model(self, channel):
+        """
+        Description:
+            Model of a telemetry channel or sensor.
+        """
+        return self.models.get(CHANNEL_SENSORS.get(channel, channel), self.default)
+
+    def to_chip(self, channel, raw):
+        """
+        Description:
+            Calibrated values of a channel (array or scalar).
+        """
+        chip = self.model(channel).apply(raw)
+        return float(chip) if np.ndim(chip) == 0 else chip
+
+    def to_raw(self, channel, chip):
+        """
+        Description:
+            Raw (peltier) values that read as the given chip values,
+            e.g. the set point to send for a chip temperature.
+        """
+        raw = self.model(channel).invert(chip)
+        return float(raw) if np.ndim(raw) == 0 else raw
+
+    def apply(self, rows, channels=None):
+        """
+        Description:
+            Calibrates a structured array (e.g. TELEMETRY_DTYPE rows)
+            and returns a new one; fields that are not channels (time)
+            are copied unchanged.
+        """
+        calibrated = np.array(rows, copy=True)
+        for field in channels or calibrated.dtype.names:
+            if field in CHANNEL_SENSORS:
+                calibrated[field] = self.to_chip(field, rows[field])
+        return calibrated
+
+    def shared(self, *channels):
+        """
+        Description:
+            True if the channels use the same model.
+        """
+        models = [self.model(channel) for channel in channels]
+        return all(model == models[0] for model in models[1:])
+
+    def heaters(self, peltier):
+        """
+        Description:
+            [(peltier, sensor)] to send a program for start_pcr's
+            peltier argument: peltier 3 (both) is split into 1 and 2
+            unless both heaters share a model.
+        """
+        if peltier == 3 and not self.shared("front", "back"):
+            return [(1, "front"), (2, "back")]
+        return [(peltier, PELTIER_SENSORS.get(peltier, "front"))]
+
+    def to_dict(self):
+        spec = {"default": self.default.to_dict()}
+        spec.update((sensor, model.to_dict()) for sensor, model in self.models.items())
+        return spec
+
+    @classmethod
+    def from_dict(cls, spec):
+        spec = dict(spec)
+        default = model_from_dict(spec.pop("default")) if "default" in spec else None
+        unknown = set(spec) - set(SENSORS)
+        if unknown:
+            raise ValueError(f"unknown sensors in calibration: {sorted(unknown)}")
+        return cls({sensor: model_from_dict(model) for sensor, model in spec.items()}, default)
+
+    def save(self, path):
+        with open(path, "w") as calibration_file:
+            json.dump(self.to_dict(), calibration_file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as calibration_file:
+            return cls.from_dict(json.load(calibration_file))
+
+
+def calibrate_columns(time, raw_columns, calibration):
+    """
+    Description:
+        {time, <channel>, raw_<channel>} columns from the raw channel
+        columns of a run: calibrated channels as float32, raw kept.
+    """
+    columns = {"time": time}
+    columns.update((channel, calibration.to_chip(channel, raw).astype(np.float32))
+                   for channel, raw in raw_columns.items())
+    columns.update((f"raw_{channel}", raw) for channel, raw in raw_columns.items())
+    return columns
+
+
+def recalibrate_log(path, calibration, start_time=None):
+    """
+    Description:
+        Columns of a recorded run log (see run_logger.py) calibrated
+        with the given calibration (see calibrate_columns). time is in
+        seconds since start_time (default the first sample).
+    """
+    rows = read_log(path)
+    start = start_time if start_time is not None else (float(rows["time"][0]) if len(rows) else 0.0)
+    channels = [field for field in rows.dtype.names if field in CHANNEL_SENSORS]
+    return calibrate_columns(rows["time"] - start, {channel: rows[channel] for channel in channels}, calibration)
+
+
+def recalibrate_run(path, calibration):
+    """
+    Description:
+        (columns, metadata) of a saved .pbrun with its raw_<channel>
+        columns calibrated again; metadata records the new calibration.
+    """
+    columns, metadata = load_run(path, mmap=False) # not mapped, so the file can be overwritten
+    raw_columns = {name[len("raw_"):]: column for name, column in columns.items()
+                   if name.startswith("raw_") and name[len("raw_"):] in CHANNEL_SENSORS}
+    if not raw_columns:
+        raise ValueError(f"{path} has no raw channels to recalibrate")
+    metadata = dict(metadata, calibration=calibration.to_dict())
+    return calibrate_columns(columns["time"], raw_columns, calibration), metadata
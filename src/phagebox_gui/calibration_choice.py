@@ -0,0 +1,68 @@
+"""
+Description:
+------------
+    This module holds the calibration options shared by phagebox_gui.py
+    and phagebox_headless.py (-m/--slope, -b/--intercept and
+    -c/--calibration) and the rule choosing between them:
+
+    1. -c given - that calibration file.
+    2. -m and/or -b given - the linear calibration (defaults for the
+       one not given), even when CALIBRATION_FILE exists.
+    3. neither - CALIBRATION_FILE if it exists, else the defaults.
+
+    -c together with -m/-b is an error. The module has no numpy
+    dependency, so the entry points can parse their arguments before
+    calibration.py (and numpy) is imported.
+
+Useful Methods/Classes
+----------------------
+    1. add_calibration_arguments - adds -m/-b/-c to a parser.
+    2. check_calibration_arguments - rejects -c together with -m/-b.
+    3. choose_calibration - (calibration file or None, slope, intercept).
+"""
+# standard library
+import os
+# non-standard library
+# in-house packages
+
+
+
+# calibration loaded when neither -c nor -m/-b is given (written by scripts/calibration/fit_calibration.py)
+CALIBRATION_FILE = "phagebox_calibration.json"
+
+# linear calibration without a calibration file
+DEFAULT_SLOPE = 1.2
+DEFAULT_INTERCEPT = -2.0
+
+
+def add_calibration_arguments(parser):
+    """
+    This method adds -m/--slope, -b/--intercept and -c/--calibration
+    to an argparse parser.
+    """
+    parser.add_argument("-m", "--slope", type=float, help=f"Slope of (Chip Temp vs Peltier Temp) [Default {DEFAULT_SLOPE} @RT]", required=False)
+    parser.add_argument("-b", "--intercept", type=float, help=f"y-intercept (Chip Temp vs Peltier Temp) [Default {DEFAULT_INTERCEPT:g} @RT]", required=False)
+    parser.add_argument("-c", "--calibration", help=f"Per-sensor calibration file (JSON), instead of --slope/--intercept [Default {CALIBRATION_FILE}, if present and -m/-b are not given]", required=False)
+
+
+def check_calibration_arguments(parser, args):
+    """
+    This method exits through parser.error() if -c is given together
+    with -m or -b.
+    """
+    if args.calibration and (args.slope is not None or args.intercept is not None):
+        parser.error("-c/--calibration replaces -m/--slope and -b/--intercept; give one or the other")
+
+
+def choose_calibration(args):
+    """
+    This method returns (calibration file or None, slope, intercept):
+    -c if given, else CALIBRATION_FILE if it exists and no -m/-b was
+    given, so an old file never overrides an explicit slope/intercept.
+    """
+    calibration_file = args.calibration
+    if calibration_file is None and args.slope is None and args.intercept is None and os.path.exists(CALIBRATION_FILE):
+        calibration_file = CALIBRATION_FILE
+    slope = DEFAULT_SLOPE if args.slope is None else args.slope
+    intercept = DEFAULT_INTERCEPT if args.intercept is None else args.intercept
+    return calibration_file, slope, intercept
@@ -0,0 +1,297 @@
+"""
+Description:
+------------
+    This module fits calibrations (see calibration.py) from temperature
+    sweeps: chip temperatures measured at several peltier set points,
+    once the peltier has reached its set point (so the raw peltier
+    reading is the set point).
+
+    Sweeps are read as streams of chunks and reduced on the fly to
+    per-group sums (a group is one set point at one position), so a
+    sweep of any length is fitted in one pass with constant memory.
+    The fits are weighted least squares on those sums, solved for all
+    positions (or set points) at once with one batched solve.
+
+Sweep Sources
+-------------
+    1. read_plotter_csv - output of temperature_plotter.py:
+       'set temp,marker position,measured temperature[,time,steady]';
+       positions are the marker positions ('0' ... '7'). Readings with
+       a steady column of 0 are skipped.
+    2. read_sketch_log - a capture of the temperature_calibration sketch
+       ('<front>,<back>' chip temperatures) taken at one set point;
+       positions are 'front' and 'back'.
+
+Steady State
+------------
+    The first settle samples of every group are dropped (the chip is
+    still settling after the set point or the marker moved), as are
+    DS18B20 error readings (-127: no sensor, 85: power-on value).
+
+Useful Methods/Classes
+----------------------
+    1. SweepAccumulator - per (set point, position) sums of a sweep.
+    2. batched_polyfit - weighted polynomial least squares of many
+       groups in one solve.
+    3. fit_positions, fit_setpoints - per-position (chip vs set point)
+       and per-set point (chip vs position) fits.
+    4. fit_model, fit_calibration - calibration models / a Calibration
+       from the positions each sensor stands for.
+"""
+# standard library
+from itertools import islice
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.calibration import (Calibration, LinearModel, PiecewiseModel, PolynomialModel,
+                                          SENSORS)
+
+
+
+# DS18B20 readings that are not temperatures.
+SENSOR_ERRORS = (-127.0, 85.0)
+
+# samples dropped at the start of each (set point, position) group.
+SETTLE = 10
+
+# lines parsed at a time when streaming a sweep file.
+CHUNK_ROWS = 1 << 16
+
+# Celsius a fitted polynomial is inverted beyond the swept set points,
+# in addition to the width of the sweep.
+INVERT_MARGIN = 10.0
+
+# position labels of the temperature_calibration sketch columns.
+SKETCH_POSITIONS = ("front", "back")
+
+
+def _numeric_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Description:
+        2-D float arrays of the numeric comma separated lines of a file,
+        chunk_rows lines at a time; header and banner lines are skipped.
+    """
+    with open(path) as sweep_file:
+        while True:
+            lines = list(islice(sweep_file, chunk_rows))
+            if not lines:
+                return
+            rows = [line for line in lines if line[:1].isdigit() or line[:1] in "-."]
+            if rows:
+                yield np.loadtxt(rows, delimiter=",", ndmin=2)
+
+
+def read_plotter_csv(path, chunk_rows=CHUNK_ROWS):
+    """
+    Description:
+        (set points, position label, chip temperatures) chunks of a
+        temperature_plotter.py sweep.
+    """
+    for chunk in _numeric_chunks(path, chunk_rows):
+        if chunk.shape[1] > 4:
+            # scripted sweeps flag the readings taken before steady state
+            chunk = chunk[chunk[:, 4] > 0]
+        positions = chunk[:, 1].astype(np.int64)
+        for position in np.unique(positions):
+            rows = chunk[positions == position]
+            yield rows[:, 0], str(position), rows[:, 2]
+
+
+def read_sketch_log(path, setpoint, chunk_rows=CHUNK_ROWS):
+    """
+    Description:
+        (set points, position label, chip temperatures) chunks of a
+        temperature_calibration sketch capture taken at setpoint.
+    """
+    for chunk in _numeric_chunks(path, chunk_rows):
+        setpoints = np.full(len(chunk), float(setpoint))
+        for column, position in enumerate(SKETCH_POSITIONS[:chunk.shape[1]]):
+            yield setpoints, position, chunk[:, column]
+
+
+class SweepAccumulator:
+    """
+    Description:
+        Count, sum and sum of squares of the steady-state chip
+        temperatures of every (set point, position) group of a sweep.
+        Samples of a group are expected in the order they were taken
+        (across chunks and files).
+    """
+
+    def __init__(self, settle=SETTLE):
+        self.settle = settle
+        self.keys = []     # (set point, position label) of each group
+        self._index = {}   # key -> group number
+        self.seen = []     # samples taken per group, including dropped ones
+        self.count = np.zeros(0)
+        self.total = np.zeros(0)
+        self.total_sq = np.zeros(0)
+
+    def _group(self, key):
+        group = self._index.get(key)
+        if group is None:
+            group = self._index[key] = len(self.keys)
+            self.keys.append(key)
+            self.seen.append(0)
+        return group
+
+    def add(self, setpoints, position, chip):
+        """
+        Description:
+            Adds the samples of one position (setpoints and chip are
+            arrays of the same length).
+        """
+        setpoints = np.asarray(setpoints, dtype=np.float64)
+        chip = np.asarray(chip, dtype=np.float64)
+        values, local = np.unique(setpoints, return_inverse=True)
+        groups = np.array([self._group((float(value), position)) for value in values], dtype=np.int64)
+        # number of each sample within its group, counting earlier chunks
+        sizes = np.bincount(local, minlength=len(values))
+        order = np.argsort(local, kind="stable")
+        rank = np.empty(len(chip), dtype=np.int64)
+        rank[order] = np.arange(len(chip)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        rank += np.array(self.seen, dtype=np.int64)[groups][local]
+        for group, size in zip(groups, sizes):
+            self.seen[group] += int(size)
+
+        keep = (rank >= self.settle) & np.isfinite(chip) & ~np.isin(chip, SENSOR_ERRORS)
+        ids = groups[local[keep]]
+        size = len(self.keys)
+        self.count = np.pad(self.count, (0, size - len(self.count))) + np.bincount(ids, minlength=size)
+        self.total = np.pad(self.total, (0, size - len(self.total))) + np.bincount(ids, chip[keep], minlength=size)
+        self.total_sq = (np.pad(self.total_sq, (0, size - len(self.total_sq)))
+                         + np.bincount(ids, chip[keep] ** 2, minlength=size))
+
+    def add_stream(self, chunks):
+        """
+        Description:
+            Adds every (set points, position, chip) chunk of a reader.
+        """
+        for setpoints, position, chip in chunks:
+            self.add(setpoints, position, chip)
+        return self
+
+    def groups(self, positions=None):
+        """
+        Description:
+            {setpoint, position, count, mean, std} arrays of the groups
+            with steady-state samples, optionally only those at the
+            given positions.
+        """
+        setpoint = np.array([key[0] for key in self.keys])
+        position = np.array([key[1] for key in self.keys], dtype=object)
+        keep = self.count > 0
+        if positions is not None:
+            keep &= np.isin(position, list(positions))
+        count = self.count[keep]
+        mean = self.total[keep] / count
+        variance = np.maximum(self.total_sq[keep] / count - mean ** 2, 0.0)
+        return {"setpoint": setpoint[keep], "position": position[keep], "count": count,
+                "mean": mean, "std": np.sqrt(variance), "total_sq": self.total_sq[keep]}
+
+
+def batched_polyfit(group, x, y, weight, degree, n_groups):
+    """
+    Description:
+        Weighted least squares polynomial of y vs x for every group at
+        once: the normal equations of all groups are summed with one
+        np.add.at and solved with one batched solve. Coefficients are
+        highest power first (as np.polyfit), shape (n_groups, degree + 1).
+        Groups with fewer than degree + 1 distinct x are NaN.
+    """
+    powers = np.vander(np.asarray(x, dtype=np.float64), degree + 1)
+    normal = np.zeros((n_groups, degree + 1, degree + 1))
+    target = np.zeros((n_groups, degree + 1))
+    np.add.at(normal, group, weight[:, None, None] * powers[:, :, None] * powers[:, None, :])
+    np.add.at(target, group, (weight * y)[:, None] * powers)
+    distinct = np.bincount(np.unique(np.stack([group, x]), axis=1)[0].astype(np.int64), minlength=n_groups)
+    solvable = distinct > degree
+    coefficients = np.full((n_groups, degree + 1), np.nan)
+    if np.any(solvable):
+        coefficients[solvable] = np.linalg.solve(normal[solvable], target[solvable][..., None])[..., 0]
+    return coefficients
+
+
+def _fit(groups, key, x_field, degree):
+    """
+    Description:
+        Per-key polynomial fits of mean chip temperature vs x_field,
+        weighted by sample counts; the rms residual is over every
+        steady-state sample (from the group sums).
+    """
+    labels, group = np.unique(groups[key], return_inverse=True)
+    x = groups[x_field].astype(np.float64)
+    coefficients = batched_polyfit(group, x, groups["mean"], groups["count"], degree, len(labels))
+    predicted = np.einsum("ij,ij->i", np.vander(x, degree + 1), coefficients[group])
+    # sum over samples of (chip - predicted)^2, from count/sum/sum of squares
+    squared = groups["total_sq"] - 2 * predicted * groups["mean"] * groups["count"] + groups["count"] * predicted ** 2
+    samples = np.bincount(group, groups["count"], minlength=len(labels))
+    rms = np.sqrt(np.maximum(np.bincount(group, squared, minlength=len(labels)), 0.0) / samples)
+    return [{key: label, "coefficients": row.tolist(), "rms": float(error), "samples": int(count)}
+            for label, row, error, count in zip(labels, coefficients, rms, samples)]
+
+
+def fit_positions(accumulator, degree=1):
+    """
+    Description:
+        Chip temperature vs set point at every position:
+        [{position, coefficients, rms, samples}].
+    """
+    return _fit(accumulator.groups(), "position", "setpoint", degree)
+
+
+def fit_setpoints(accumulator, degree=1):
+    """
+    Description:
+        Chip temperature profile along the chip at every set point
+        (numeric positions only): [{setpoint, coefficients, rms, samples}].
+    """
+    groups = accumulator.groups()
+    numeric = np.array([str(position).lstrip("-").isdigit() for position in groups["position"]], dtype=bool)
+    groups = {field: values[numeric] for field, values in groups.items()}
+    groups["position"] = groups["position"].astype(np.float64)
+    return _fit(groups, "setpoint", "position", degree)
+
+
+def fit_model(accumulator, positions=None, model="linear", degree=2):
+    """
+    Description:
+        Calibration model (raw peltier -> chip) of the mean chip
+        temperature over positions (default all): a least squares line
+        or polynomial, or piecewise-linear through the mean at each set
+        point. A polynomial is inverted over the swept set points plus
+        INVERT_MARGIN and the sweep width on each side.
+    """
+    groups = accumulator.groups(positions)
+    if not len(groups["count"]):
+        raise ValueError(f"no steady-state samples at positions {positions}")
+    pooled = np.zeros(len(groups["count"]), dtype=np.int64)
+    if model == "piecewise":
+        setpoints, group = np.unique(groups["setpoint"], return_inverse=True)
+        counts = np.bincount(group, groups["count"])
+        means = np.bincount(group, groups["mean"] * groups["count"]) / counts
+        return PiecewiseModel(setpoints, means)
+    degree = 1 if model == "linear" else degree
+    coefficients = batched_polyfit(pooled, groups["setpoint"], groups["mean"], groups["count"], degree, 1)[0]
+    if np.any(np.isnan(coefficients)):
+        raise ValueError(f"a degree {degree} fit needs at least {degree + 1} set points")
+    if model == "linear":
+        return LinearModel(*coefficients)
+    # a polynomial is only trusted (and inverted) near the swept range
+    margin = INVERT_MARGIN + np.ptp(groups["setpoint"])
+    return PolynomialModel(coefficients, (float(groups["setpoint"].min() - margin), float(groups["setpoint"].max() + margin)))
+
+
+def fit_calibration(accumulator, sensor_positions=None, model="linear", degree=2):
+    """
+    Description:
+        Calibration with a default model fitted over every position and
+        one model per sensor in sensor_positions ({sensor: positions}).
+    """
+    sensor_positions = dict(sensor_positions or {})
+    unknown = set(sensor_positions) - set(SENSORS)
+    if unknown:
+        raise ValueError(f"unknown sensors: {sorted(unknown)}")
+    models = {sensor: fit_model(accumulator, positions, model, degree)
+              for sensor, positions in sensor_positions.items()}
+    return Calibration(models, fit_model(accumulator, None, model, degree))
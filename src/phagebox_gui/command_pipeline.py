@@ -0,0 +1,345 @@
+"""
+Description:
+------------
+    This module sends commands to the PhageBox from a dedicated writer
+    thread, one at a time, waiting for the firmware's acknowledgement
+    before the next one goes out.
+
+    Callers (e.g. the Tk thread) only put a Command on a bounded queue
+    and get it back immediately, so a slow 9600 baud port never blocks
+    them. When the queue is full the command is dropped instead.
+
+    Toggles with the same coalesce key cancel out while both are still
+    queued (two magnet toggles are a no-op), so repeated clicks do not
+    pile up behind a slow port.
+
+Acknowledgements
+----------------
+    The firmware echoes every command it accepts as '<N>' (the cycle
+    count of a '<H,...>' command, the LED value of a '<B,...>' command)
+    and answers anything else with 'WRONG SERIAL MSG.'. The parser
+    reports both through CommandPipeline.acknowledge(). A command that
+    gets no answer within ack_timeout is marked timed out; it is not
+    resent, since resending a toggle could apply it twice. An
+    acknowledgement whose value is not the one the command in flight
+    expects (e.g. the late echo of a timed out command) is dropped as
+    stale; that command then waits on for its own, or times out.
+
+Useful Methods/Classes
+----------------------
+    1. Command - one queued command and its outcome.
+    2. LatencyHistogram - log-bucketed latency histogram.
+    3. CommandPipeline - bounded queue + writer thread + ack tracking.
+"""
+# standard library
+from bisect import bisect_right
+import collections
+import math
+import threading
+import time
+# non-standard library
+# in-house packages
+
+
+
+# Command.status values
+QUEUED = "queued"
+SENT = "sent"           # written, waiting for the acknowledgement
+ACKED = "acked"
+REJECTED = "rejected"   # the firmware answered 'WRONG SERIAL MSG.'
+TIMED_OUT = "timed out"
+COALESCED = "coalesced" # cancelled out by a later toggle before being sent
+DROPPED = "dropped"     # the queue was full
+FAILED = "failed"       # the write raised
+CANCELLED = "cancelled" # the pipeline was closed first
+
+
+class Command:
+    """
+    Description:
+        A command submitted to a CommandPipeline. wait() blocks until
+        it is finished; status tells how it ended.
+    """
+
+    def __init__(self, text, expected_ack=None, coalesce_key=None, on_ack=None, timeout=None, on_fail=None):
+        self.text = text
+        self.data = bytes(text, "ascii")
+        self.expected_ack = expected_ack
+        self.coalesce_key = coalesce_key
+        self.on_ack = on_ack
+        self.timeout = timeout # acknowledgement timeout, None for the pipeline's
+        self.on_fail = on_fail
+        self.status = QUEUED
+        self.ack = None
+        self.queued_time = time.monotonic()
+        self.sent_time = None
+        self.ack_time = None
+        self._finished = threading.Event()
+
+    def __repr__(self):
+        return f"Command({self.text!r}, status={self.status!r})"
+
+    @property
+    def kind(self):
+        """
+        Description:
+            Command letter, e.g. 'H' for '<H,...>'.
+        """
+        return self.text.lstrip("<")[:1]
+
+    @property
+    def latency(self):
+        """
+        Description:
+            Seconds from the write to the acknowledgement (None if not acked).
+        """
+        if self.sent_time is None or self.ack_time is None:
+            return None
+        return self.ack_time - self.sent_time
+
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Description:
+            Waits until the command is finished. Returns done().
+        """
+        return self._finished.wait(timeout)
+
+    def finish(self, status):
+        self.status = status
+        self._finished.set()
+
+
+class LatencyHistogram:
+    """
+    Description:
+        Counts latencies in logarithmic buckets (buckets_per_decade
+        per factor of ten, from low to high seconds).
+    """
+
+    def __init__(self, low=1e-4, high=100.0, buckets_per_decade=10):
+        steps = int(round(math.log10(high / low) * buckets_per_decade))
+        self.bounds = [low * 10 ** (step / buckets_per_decade) for step in range(steps + 1)]
+        self.counts = [0] * (len(self.bounds) + 1) # below low, ..., above high
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect_right(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, q):
+        """
+        Description:
+            Upper bound of the bucket holding the q-th percentile
+            (clipped to the largest latency seen).
+        """
+        if self.count == 0:
+            return math.nan
+        rank = max(math.ceil(q / 100 * self.count), 1)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        if bucket == len(self.bounds):
+            return self.max
+        return min(self.bounds[bucket], self.max)
+
+    def format(self, unit=1e-3, unit_name="ms", width=40):
+        """
+        Description:
+            Text histogram of the non-empty buckets.
+        """
+        if self.count == 0:
+            return "(no samples)"
+        edges = [0.0] + self.bounds + [math.inf]
+        peak = max(self.counts)
+        rows = []
+        for bucket, count in enumerate(self.counts):
+            if count:
+                low, high = edges[bucket] / unit, edges[bucket + 1] / unit
+                bar = "#" * max(round(width * count / peak), 1)
+                rows.append(f"{low:>9.2f} - {high:<9.2f}{unit_name} |{bar} {count}")
+        rows.append(f"n={self.count}  mean={self.mean / unit:.2f}{unit_name}  "
+                    f"p50={self.percentile(50) / unit:.2f}{unit_name}  p99={self.percentile(99) / unit:.2f}{unit_name}  "
+                    f"max={self.max / unit:.2f}{unit_name}")
+        return "\n".join(rows)
+
+
+class CommandPipeline:
+    """
+    Description:
+        Bounded command queue drained by a writer thread that sends one
+        command at a time and waits for its acknowledgement.
+    """
+
+    # longest time (seconds) to wait for a command's acknowledgement.
+    ACK_TIMEOUT = 1.0
+
+    # most commands waiting to be sent.
+    MAX_PENDING = 32
+
+    def __init__(self, write, ack_timeout=ACK_TIMEOUT, max_pending=MAX_PENDING):
+        """
+        Description:
+            write - callable taking bytes, e.g. Serial.write. Only
+                    called from the writer thread.
+        """
+        self.write = write
+        self.ack_timeout = ack_timeout
+        self.max_pending = max_pending
+        self._pending = collections.deque()
+        self._in_flight = None
+        self._condition = threading.Condition()
+        self._closed = False
+        # statistics
+        self.counts = collections.Counter() # status -> commands
+        self.unexpected_acks = 0  # acknowledgements with no command waiting
+        self.mismatched_acks = 0  # acknowledgements with an unexpected value
+        self.latency = collections.defaultdict(LatencyHistogram) # kind -> write-to-ack latency
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, text, expected_ack=None, coalesce_key=None, on_ack=None, timeout=None, on_fail=None):
+        """
+        Description:
+            Queues a command and returns its Command right away.
+            expected_ack - value the acknowledgement should carry.
+            coalesce_key - a queued command with the same key cancels
+                           out with this one (both end COALESCED).
+            on_ack - callable(command) run on the reader thread once
+                     the command is acknowledged, before the next
+                     command is sent.
+            timeout - acknowledgement timeout instead of ack_timeout.
+            on_fail - callable(command) run if the command is sent but
+                      rejected, not acknowledged or the write fails.
+        """
+        command = Command(text, expected_ack, coalesce_key, on_ack, timeout, on_fail)
+        with self._condition:
+            if self._closed:
+                return self._finish(command, CANCELLED)
+            if coalesce_key is not None:
+                for queued in reversed(self._pending):
+                    if queued.coalesce_key == coalesce_key:
+                        self._pending.remove(queued)
+                        self._finish(queued, COALESCED)
+                        return self._finish(command, COALESCED)
+            if len(self._pending) >= self.max_pending:
+                return self._finish(command, DROPPED)
+            self._pending.append(command)
+            self._condition.notify_all()
+        return command
+
+    def acknowledge(self, value):
+        """
+        Description:
+            Called by the parser for every '<N>' echo (value N) and
+            'WRONG SERIAL MSG.' (value None) from the device. An echo
+            that does not carry the expected_ack of the command in
+            flight is counted in mismatched_acks and otherwise ignored.
+        """
+        with self._condition:
+            command = self._in_flight
+            if command is None or command.done():
+                self.unexpected_acks += 1
+                return
+            if value is not None and command.expected_ack is not None and value != command.expected_ack:
+                # stale: not this command's acknowledgement
+                self.mismatched_acks += 1
+                return
+            command.ack = value
+            command.ack_time = time.monotonic()
+            if value is None:
+                self._finish(command, REJECTED)
+                self._condition.notify_all()
+            else:
+                self.latency[command.kind].add(command.latency)
+        if value is None:
+            if command.on_fail is not None:
+                command.on_fail(command)
+            return
+        # on_ack runs before the command is finished, so nothing else is
+        # written until it returns (e.g. until the port runs at a new baud rate).
+        if command.on_ack is not None:
+            command.on_ack(command)
+        with self._condition:
+            if not command.done():
+                self._finish(command, ACKED)
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Description:
+            Waits until every queued command is finished. Returns True
+            if the queue emptied in time.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._in_flight is None, timeout)
+
+    def close(self, timeout=None):
+        """
+        Description:
+            Cancels the queued commands and stops the writer thread.
+            timeout defaults to ack_timeout (a write may be in progress).
+        """
+        with self._condition:
+            self._closed = True
+            while self._pending:
+                self._finish(self._pending.popleft(), CANCELLED)
+            self._condition.notify_all()
+        self.thread.join(timeout=self.ack_timeout if timeout is None else timeout)
+
+    def write_loop(self):
+        """
+        Description:
+            Body of the writer thread.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                command = self._pending.popleft()
+                command.status = SENT
+                self._in_flight = command
+            try:
+                command.sent_time = time.monotonic()
+                self.write(command.data)
+            except Exception as error: # e.g. SerialException when the box is unplugged
+                print(f"failed to send {command.text}: {error}")
+                with self._condition:
+                    self._finish(command, FAILED)
+                    self._in_flight = None
+                    self._condition.notify_all()
+                if command.on_fail is not None:
+                    command.on_fail(command)
+                continue
+            with self._condition:
+                timeout = self.ack_timeout if command.timeout is None else command.timeout
+                self._condition.wait_for(lambda: command.done() or self._closed, timeout)
+                if not command.done():
+                    self._finish(command, CANCELLED if self._closed else TIMED_OUT)
+                self._in_flight = None
+                self._condition.notify_all()
+            if command.status == TIMED_OUT and command.on_fail is not None:
+                command.on_fail(command)
+
+    def _finish(self, command, status):
+        command.finish(status)
+        self.counts[status] += 1
+        return command
@@ -0,0 +1,90 @@
+"""
+Description:
+------------
+    This module formats the UART commands understood by the PhageBox
+    firmware (see serial_parser.cpp), so every controller sends the
+    same bytes for the same request.
+
+Commands
+--------
+1. "<H,1,32,15,90,20,50,60,72>" - PCR program for heater 1 (or 2).
+2. "<B,0,1>" - toggle the LED (backlight).
+3. "<B,1,0>" - toggle the magnet.
+4. "<P,1>" - telemetry protocol (0 text, 1/2 binary frames).
+5. "<R,115200>" - switch the link to another baud rate.
+6. "<T,1>" - stamp telemetry with the device's millis() (0 to stop).
+
+Useful Methods/Classes
+----------------------
+    1. pcr_program - rounds a PCR program to what the firmware accepts.
+    2. pcr_commands - the '<H,...>' commands that start a program.
+    3. expected_ack - the '<N>' echo the firmware answers a command with.
+"""
+# standard library
+# non-standard library
+# in-house packages
+
+
+
+BACKLIGHT_TOGGLE = "<B,0,1>"
+MAGNET_TOGGLE = "<B,1,0>"
+
+
+def pcr_program(peltier, cycles, d_temp, d_time, a_temp, a_time, e_temp, e_time):
+    """
+    Description:
+        Returns the program as a dict with the peltier and cycle count
+        as integers and times/temperatures rounded to 0.1.
+    """
+    return {"peltier": int(peltier), "cycles": int(cycles),
+            "d_temp": round(d_temp, 1), "d_time": round(d_time, 1),
+            "a_temp": round(a_temp, 1), "a_time": round(a_time, 1),
+            "e_temp": round(e_temp, 1), "e_time": round(e_time, 1)}
+
+
+def pcr_commands(program):
+    """
+    Description:
+        The commands that start a pcr_program() dict. Peltier 3 means
+        both peltiers, which takes one command per heater.
+    """
+    heaters = (1, 2) if program["peltier"] == 3 else (program["peltier"],)
+    return [f"<H,{heater},{program['cycles']},{program['d_time']},{program['d_temp']},"
+            f"{program['a_time']},{program['a_temp']},{program['e_time']},{program['e_temp']}>"
+            for heater in heaters]
+
+
+def atoi(text):
+    """
+    Description:
+        C atoi(): leading integer part, 0 if there is none.
+    """
+    digits = ""
+    for char in text.strip():
+        if char.isdigit() or (not digits and char in "+-"):
+            digits += char
+        else:
+            break
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+def expected_ack(command):
+    """
+    Description:
+        The value of the '<N>' echo for a command, as parseData() in
+        serial_parser.cpp computes it: the cycle count for '<H,...>',
+        the LED value for '<B,...>', the protocol for '<P,...>', the
+        baud rate for '<R,...>' and the flag of '<T,...>'. None for
+        anything else.
+    """
+    fields = command.strip("<>").split(",")
+    if fields[0].startswith("H") and len(fields) >= 9:
+        return atoi(fields[2])
+    if fields[0].startswith("B") and len(fields) >= 3:
+        return atoi(fields[2])
+    if fields[0][:1] in ("P", "R", "T") and len(fields) >= 2:
+        return atoi(fields[1])
+    return None
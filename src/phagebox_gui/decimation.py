@@ -0,0 +1,145 @@
+"""
+Description:
+------------
+    This module downsamples the telemetry history for plotting. The
+    time axis is cut into buckets about one pixel column wide and only
+    the minimum and maximum of each bucket are drawn, so short thermal
+    overshoots stay visible however long the run is.
+
+    The live view is kept up to date incrementally: only samples that
+    arrived since the last update are folded into the buckets. Zoomed
+    or panned views are decimated on demand from the full-resolution
+    history.
+
+Useful Methods/Classes
+----------------------
+    1. minmax_buckets - vectorised min/max per bucket.
+    2. interleave - turns buckets into a plottable (x, y) pair.
+    3. decimate_window - one-shot decimation of a time window.
+    4. MinMaxDecimator - incremental decimation of a TelemetryStore.
+"""
+# standard library
+# non-standard library
+import numpy as np
+# in-house packages
+
+
+
+def minmax_buckets(times, columns, x0, width):
+    """
+    Description:
+        Groups samples into buckets of the given width starting at x0.
+        times must be sorted. Returns (bucket ids, first time, last
+        time, [min per column], [max per column]).
+    """
+    ids = ((times - x0) // width).astype(np.int64)
+    starts = np.flatnonzero(np.diff(ids, prepend=ids[0] - 1))
+    ends = np.append(starts[1:], len(times)) - 1
+    mins = [np.minimum.reduceat(column, starts) for column in columns]
+    maxs = [np.maximum.reduceat(column, starts) for column in columns]
+    return ids[starts], times[starts], times[ends], mins, maxs
+
+
+def interleave(first, last, low, high):
+    """
+    Description:
+        Two points per bucket: (first time, min) and (last time, max).
+    """
+    x = np.empty(2 * len(first), dtype=np.float64)
+    y = np.empty(2 * len(first), dtype=np.float64)
+    x[0::2], x[1::2] = first, last
+    y[0::2], y[1::2] = low, high
+    return x, y
+
+
+def decimate_window(telemetry, fields, x_low, x_high, buckets):
+    """
+    Description:
+        Min/max decimation of the samples between x_low and x_high
+        (plus one sample either side so lines reach the edges),
+        including samples the store has spilled to disk. Windows with few samples are returned at full resolution.
+        Returns {field: (x, y)}.
+    """
+    rows = telemetry.window(x_low, x_high)
+    times = rows["time"]
+    columns = [rows[field] for field in fields]
+    if len(times) <= 2 * buckets:
+        return {field: (times, column) for field, column in zip(fields, columns)}
+    _, first, last, mins, maxs = minmax_buckets(times, columns, x_low, max(x_high - x_low, 1e-9) / buckets)
+    return {field: interleave(first, last, low, high) for field, low, high in zip(fields, mins, maxs)}
+
+
+class MinMaxDecimator:
+    """
+    Description:
+        Keeps per-bucket min/max of a TelemetryStore up to date as
+        samples are appended.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.x0 = 0.0
+        self.width = None # seconds per bucket; None until set_resolution()
+        self.processed = 0 # rows (including spilled ones) already bucketed
+        self._clear()
+
+    def _clear(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.first = np.zeros(0)
+        self.last = np.zeros(0)
+        self.mins = [np.zeros(0) for _ in self.fields]
+        self.maxs = [np.zeros(0) for _ in self.fields]
+
+    def set_resolution(self, telemetry, x0, width):
+        """
+        Description:
+            Changes the bucket grid and rebuilds the buckets from the
+            whole history, spilled rows included.
+        """
+        self.x0, self.width = x0, width
+        self._clear()
+        for rows in telemetry.chunks():
+            self._fold(rows)
+        self.processed = telemetry.spilled + len(telemetry)
+
+    def update(self, telemetry):
+        """
+        Description:
+            Folds the rows appended since the last call into the buckets
+            (reading back any that were spilled in the meantime).
+        """
+        if self.width is None:
+            return
+        if self.processed < telemetry.spilled:
+            self._fold(telemetry.spilled_rows()[self.processed:])
+        rows = telemetry.view()[max(self.processed - telemetry.spilled, 0):]
+        self.processed = telemetry.spilled + len(telemetry)
+        self._fold(rows)
+
+    def _fold(self, rows):
+        if len(rows) == 0:
+            return
+        ids, first, last, mins, maxs = minmax_buckets(rows["time"], [rows[field] for field in self.fields],
+                                                      self.x0, self.width)
+        if len(self.ids) and self.ids[-1] == ids[0]:
+            # the first new bucket continues the last stored one
+            self.last[-1] = last[0]
+            for index in range(len(self.fields)):
+                self.mins[index][-1] = min(self.mins[index][-1], mins[index][0])
+                self.maxs[index][-1] = max(self.maxs[index][-1], maxs[index][0])
+            ids, first, last = ids[1:], first[1:], last[1:]
+            mins = [low[1:] for low in mins]
+            maxs = [high[1:] for high in maxs]
+        self.ids = np.concatenate((self.ids, ids))
+        self.first = np.concatenate((self.first, first))
+        self.last = np.concatenate((self.last, last))
+        self.mins = [np.concatenate(pair) for pair in zip(self.mins, mins)]
+        self.maxs = [np.concatenate(pair) for pair in zip(self.maxs, maxs)]
+
+    def points(self):
+        """
+        Description:
+            Plottable data for every field: {field: (x, y)}.
+        """
+        return {field: interleave(self.first, self.last, low, high)
+                for field, low, high in zip(self.fields, self.mins, self.maxs)}
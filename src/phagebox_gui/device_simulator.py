@@ -0,0 +1,461 @@
+"""
+Description:
+------------
+    This module simulates a PhageBox behind a pseudo-terminal, so the
+    host software can be run and benchmarked without a physical box.
+    ArduinoController(simulator.port) works against it unchanged.
+
+    The simulator speaks the UART protocol of src/phagebox_embedded:
+    it answers '<H,...>' and '<B,...>' commands like serial_parser.cpp
+    (including the '<N>' echo) and emits T_METAL/T_FRONT/T_BACK and
+    T_FRONT_SET/T_BACK_SET lines, or binary frames once the host asks
+    for them with '<P,N>' (see binary_protocol.py), switches baud
+    rate on '<R,N>' and stamps each tick with its simulated millis()
+    after '<T,1>' (binary_frames=False rejects all three like older
+    firmware). Each peltier runs the PCR state
+    machine of TemperatureModule with the firmware's bang-bang
+    controller, driving a small thermal model of the block and sensor.
+
+    Simulated time advances by a fixed step per tick and all randomness
+    comes from a seeded generator, so for a given seed and command
+    sequence the emitted telemetry is the same on every run. Ticks are
+    paced against the wall clock to reach the requested line rate
+    (up to thousands of lines/sec), or run flat out with realtime=False.
+
+    A pty has no baud rate, so by default lines arrive as fast as they
+    are written. With baudrate set, the simulator holds every write
+    and every received command for as long as the UART would need
+    to transfer it (10 bits per byte), which caps the output like a
+    real board at that baud rate.
+
+Fault Injection
+---------------
+1. noise       - gaussian noise (Celsius) added to every reading.
+2. drop_rate   - probability that a line loses one of its bytes.
+3. burst_every / burst_length - every burst_every simulated seconds,
+   output is held back for burst_length seconds and then sent at once.
+
+Latency Probe
+-------------
+    With probe=True the T_METAL line carries time.monotonic() at the
+    moment the line was generated instead of a temperature, so a reader
+    in another thread or process can measure per-line latency. Probe
+    output is not reproducible between runs, and the probe is always
+    sent as text (a timestamp does not fit a float16/float32 frame).
+
+Useful Methods/Classes
+----------------------
+    1. SimulatedPeltier - PCR state machine + thermal model of one peltier.
+    2. PhageBoxSimulator - pty-backed device speaking the UART protocol.
+"""
+# standard library
+import argparse
+import errno
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+# non-standard library
+# in-house packages
+from src.phagebox_gui.binary_protocol import (BINARY_F16_PROTOCOL, PROTOCOL_NAMES, TEXT_PROTOCOL, encode_clock_frame,
+                                               encode_frame)
+from src.phagebox_gui.commands import atoi
+
+
+
+# pcr_state in TemperatureModule.h
+STOPPED, DENATURE, ANNEAL, ELONGATE = range(4)
+NEXT_STATE = {STOPPED: STOPPED, DENATURE: ANNEAL, ANNEAL: ELONGATE, ELONGATE: DENATURE}
+
+
+class SimulatedPeltier:
+    """
+    Description:
+        One temperature module: the firmware's PCR state table and
+        bang-bang control, heating a block whose temperature a sensor
+        follows with a lag.
+    """
+
+    AMBIENT = 25.0
+    HEATING_RATE = 4.0 # Celsius/s added by the peltier when on
+    LOSS_RATE = 0.03   # 1/s, Newton cooling towards ambient
+    SENSOR_LAG = 1.5   # s, time constant of the sensor following the block
+
+    def __init__(self):
+        self.block_temp = self.AMBIENT
+        self.sensor_temp = self.AMBIENT
+        self.heater_on = False
+        self.state = STOPPED
+        self.state_table = {DENATURE: (0, 0), ANNEAL: (0, 0), ELONGATE: (0, 0)} # state -> (time, temp)
+        self.cycle_count = 0
+        self.cycles_used = 0
+        self.timer = 0.0
+
+    def start_pcr(self, cycle_count, den_time, den_temp, anneal_time, anneal_temp, ext_time, ext_temp):
+        self.state_table = {DENATURE: (den_time, den_temp), ANNEAL: (anneal_time, anneal_temp),
+                            ELONGATE: (ext_time, ext_temp)}
+        self.cycle_count = cycle_count
+        self.cycles_used = 0
+        self.timer = 0.0
+        self.state = DENATURE
+
+    @property
+    def desired_temp(self):
+        return float(self.state_table[self.state][1]) if self.state != STOPPED else 0.0
+
+    def step(self, dt):
+        """
+        Description:
+            Advances the model by dt seconds. Returns the messages the
+            firmware would print for state changes.
+        """
+        messages = []
+        if self.state != STOPPED:
+            self.heater_on = self.sensor_temp <= self.desired_temp
+        heating = self.HEATING_RATE if self.heater_on else 0.0
+        self.block_temp += (heating - self.LOSS_RATE * (self.block_temp - self.AMBIENT)) * dt
+        self.sensor_temp += (self.block_temp - self.sensor_temp) * min(dt / self.SENSOR_LAG, 1.0)
+        if self.state == STOPPED:
+            return messages
+        self.timer += dt
+        if self.timer >= self.state_table[self.state][0]:
+            messages.append(f"TIME PASSED = {int(self.timer)} seconds \n")
+            self.state = NEXT_STATE[self.state]
+            if self.state == ELONGATE:
+                self.cycles_used += 1
+            messages.append(f"Switching to {('', 'DENATURE', 'ANNEAL', 'ELONGATE')[self.state]} \n")
+            self.timer = 0.0
+        if self.cycles_used >= self.cycle_count:
+            messages.append("stop called")
+            self.heater_on = False
+            self.state = STOPPED
+        return messages
+
+
+class PhageBoxSimulator:
+    """
+    Description:
+        A PhageBox on a pseudo-terminal. Use as a context manager or
+        call start()/stop(); connect to simulator.port.
+    """
+
+    READY_BANNER = "<Arduino is ready>\r\n"
+
+    def __init__(self, rate=10.0, seed=0, noise=0.0, drop_rate=0.0, burst_every=0.0, burst_length=0.0,
+                 report_idle=True, chatter=True, realtime=True, probe=False, baudrate=None, binary_frames=True):
+        """
+        Description:
+            rate - telemetry lines per second.
+            seed - seed of the noise/fault generator.
+            report_idle - also report stopped peltiers (the firmware
+                          only reports running ones) and T_METAL.
+            chatter - print the firmware's state change messages.
+            realtime - pace output against the wall clock.
+            probe - T_METAL reports time.monotonic() (see Latency Probe).
+            baudrate - simulated UART speed (None for no limit).
+            binary_frames - accept '<P,N>' (binary frames) and '<R,N>'.
+        """
+        self.rate = rate
+        self.noise = noise
+        self.drop_rate = drop_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.report_idle = report_idle
+        self.chatter = chatter
+        self.realtime = realtime
+        self.probe = probe
+        self.baudrate = baudrate
+        self.binary_frames = binary_frames
+        self.protocol = TEXT_PROTOCOL
+        self.timestamps = False # '<T,1>'
+        self._line_lock = threading.Lock()
+        self._line_free = 0.0 # monotonic time the simulated UART is done sending
+        self.random = random.Random(seed)
+        self.peltiers = [SimulatedPeltier(), SimulatedPeltier()] # front, back
+        self.led_on = False
+        self.magnet_on = False
+        self.sim_time = 0.0
+        self.lines_sent = 0
+        self.commands = [] # every command received, for inspection
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._threads = [threading.Thread(target=self.emit_loop, daemon=True),
+                         threading.Thread(target=self.command_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    # ----------------------------------------------------------------- output
+
+    def lines_per_tick(self):
+        """
+        Description:
+            Telemetry lines the next tick will emit.
+        """
+        if self.report_idle:
+            return 5
+        if self.probe:
+            return 1 + 2 * sum(peltier.state != STOPPED for peltier in self.peltiers)
+        return 2 * sum(peltier.state != STOPPED for peltier in self.peltiers)
+
+    def reading(self, value):
+        if self.noise:
+            value += self.random.gauss(0.0, self.noise)
+        return value
+
+    def tick(self, dt):
+        """
+        Description:
+            Advances the simulation by dt and returns the bytes the
+            device would send for it.
+        """
+        out = []
+        with self._lock:
+            for peltier in self.peltiers:
+                messages = peltier.step(dt)
+                if self.chatter:
+                    out.extend(message.encode("ascii") for message in messages)
+            if self.timestamps and (self.report_idle or self.probe or
+                                    any(peltier.state != STOPPED for peltier in self.peltiers)):
+                out.append(self.clock_sample(int(self.sim_time * 1000)))
+            if self.probe:
+                out.append(f"T_METAL,{time.monotonic():.6f}\n".encode("ascii"))
+            elif self.report_idle:
+                out.append(self.sample(b"T_METAL", self.reading(SimulatedPeltier.AMBIENT)))
+            for tag, peltier in zip((b"T_FRONT", b"T_BACK"), self.peltiers):
+                if peltier.state != STOPPED or self.report_idle:
+                    out.append(self.sample(tag, self.reading(peltier.sensor_temp)))
+                    out.append(self.sample(tag + b"_SET", peltier.desired_temp))
+        self.sim_time += dt
+        if self.drop_rate:
+            out = [self.drop_byte(line) if self.random.random() < self.drop_rate else line for line in out]
+        return b"".join(out)
+
+    def sample(self, tag, value):
+        """
+        Description:
+            One reading in the current protocol: a text line like
+            Serial.print(float) writes it, or a binary frame.
+        """
+        if self.protocol == TEXT_PROTOCOL:
+            return b"%s,%.2f\n" % (tag, value)
+        return encode_frame(tag, value, half=self.protocol == BINARY_F16_PROTOCOL)
+
+    def clock_sample(self, milliseconds):
+        """
+        Description:
+            The device timestamp in the current protocol.
+        """
+        if self.protocol == TEXT_PROTOCOL:
+            return b"T_MILLIS,%d\n" % milliseconds
+        return encode_clock_frame(milliseconds)
+
+    def drop_byte(self, line):
+        position = self.random.randrange(len(line))
+        return line[:position] + line[position + 1:]
+
+    def holding(self):
+        """
+        Description:
+            True while a burst is being held back.
+        """
+        return bool(self.burst_every) and (self.sim_time % self.burst_every) < self.burst_length
+
+    def write(self, data, baudrate=None):
+        """
+        Description:
+            Writes everything, waiting while the pty buffer is full.
+            baudrate overrides the simulated UART speed for this write.
+        """
+        baudrate = baudrate or self.baudrate
+        if baudrate:
+            self.transfer_delay(len(data), baudrate)
+        view = memoryview(data)
+        while view and not self._stop_event.is_set():
+            try:
+                view = view[os.write(self.master_fd, view):]
+            except BlockingIOError:
+                select.select([], [self.master_fd], [], 0.05)
+            except OSError as error:
+                if error.errno == errno.EIO: # nobody has the port open
+                    select.select([], [], [], 0.05)
+                else:
+                    raise
+
+    def transfer_delay(self, size, baudrate):
+        """
+        Description:
+            Sleeps until size more bytes would have left a UART running
+            at baudrate, queued behind what is already being sent.
+        """
+        with self._line_lock:
+            start = max(time.monotonic(), self._line_free)
+            self._line_free = start + size * 10 / baudrate
+            done = self._line_free
+        delay = done - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def emit_loop(self):
+        """
+        Description:
+            Body of the output thread.
+        """
+        self.write(self.READY_BANNER.encode("ascii"))
+        pending = bytearray()
+        start = time.monotonic()
+        lines_due = 0.0
+        while not self._stop_event.is_set():
+            if self.realtime:
+                lines_due = (time.monotonic() - start) * self.rate - self.lines_sent
+                if self.baudrate:
+                    # the UART can't catch up; write about 20 ms of UART time at once
+                    lines_due = min(lines_due, max(self.baudrate / 10 * 0.02 / 5, 1))
+                if lines_due < 1:
+                    time.sleep(min(max((1 - lines_due) / self.rate, 0.0005), 0.05))
+                    continue
+            else:
+                lines_due = 256
+            # emit whole ticks until the line budget is used up
+            while lines_due >= 1:
+                lines = max(self.lines_per_tick(), 1)
+                pending += self.tick(lines / self.rate)
+                self.lines_sent += lines
+                lines_due -= lines
+            if not self.holding():
+                self.write(bytes(pending))
+                pending.clear()
+
+    # ----------------------------------------------------------------- input
+
+    def command_loop(self):
+        """
+        Description:
+            Body of the input thread: collects '<...>' commands like
+            getDataFromPC() in serial_parser.cpp.
+        """
+        buffer = bytearray()
+        in_progress = False
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([self.master_fd], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.master_fd, 4096)
+            except (BlockingIOError, OSError):
+                continue
+            for byte in data:
+                if byte == ord(">") and in_progress:
+                    in_progress = False
+                    if self.baudrate:
+                        time.sleep((len(buffer) + 2) * 10 / self.baudrate) # the host's bytes take time too
+                    self.handle_command(buffer.decode("ascii", errors="replace"))
+                elif in_progress:
+                    if len(buffer) < 39: # buffSize - 1 in the firmware
+                        buffer.append(byte)
+                elif byte == ord("<"):
+                    buffer.clear()
+                    in_progress = True
+
+    def handle_command(self, message):
+        """
+        Description:
+            Applies a command like parseData() in serial_parser.cpp.
+        """
+        fields = message.split(",")
+        self.commands.append(message)
+        values = [atoi(field) for field in fields[1:]]
+        # state changes before the echo, so a host that saw the ack sees the new state
+        if fields[0].startswith("H") and len(values) >= 8:
+            heater, cycles, den_time, den_temp, anneal_time, anneal_temp, ext_time, ext_temp = values[:8]
+            if heater in (1, 2):
+                with self._lock:
+                    self.peltiers[heater - 1].start_pcr(cycles, den_time, den_temp, anneal_time,
+                                                        anneal_temp, ext_time, ext_temp)
+            self.write(f"\nUpdating PCR..\n<{cycles}>".encode("ascii"))
+            if heater in (1, 2) and self.chatter:
+                self.write(f"cycle_count is set \n\r\n{cycles}\r\n".encode("ascii"))
+        elif fields[0].startswith("B") and len(values) >= 2:
+            mag_val, led_val = values[:2]
+            with self._lock:
+                if led_val:
+                    self.led_on = not self.led_on
+                if mag_val:
+                    self.magnet_on = not self.magnet_on
+            self.write(f"<{led_val}>".encode("ascii"))
+        elif fields[0].startswith("P") and self.binary_frames and values and values[0] in PROTOCOL_NAMES:
+            with self._lock:
+                self.protocol = values[0]
+            self.write(f"<{values[0]}>".encode("ascii"))
+        elif fields[0].startswith("T") and self.binary_frames and values and values[0] in (0, 1):
+            with self._lock:
+                self.timestamps = bool(values[0])
+            self.write(f"<{values[0]}>".encode("ascii"))
+        elif fields[0].startswith("R") and self.binary_frames and values and 9600 <= values[0] <= 1000000:
+            with self._lock:
+                old_baudrate = self.baudrate
+                if self.baudrate:
+                    self.baudrate = values[0]
+            self.write(f"<{values[0]}>".encode("ascii"), baudrate=old_baudrate) # the echo is paced at the old rate
+        else:
+            self.write(b"WRONG SERIAL MSG.")
+
+
+def parseArgs(argv=None) -> argparse.Namespace:
+    """
+    This method takes in the arguments from the command and performs
+    parsing.
+    INPUT:
+        Array of input arguments
+    OUTPUT:
+        returns a argparse.Namespace object
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-r", "--rate", type=float, default=10, help="telemetry lines per second [Default 10]")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the noise/fault generator [Default 0]")
+    parser.add_argument("--noise", type=float, default=0.0, help="std. dev. of reading noise in Celsius [Default 0]")
+    parser.add_argument("--drop_rate", type=float, default=0.0, help="probability a line loses a byte [Default 0]")
+    parser.add_argument("--burst_every", type=float, default=0.0, help="seconds between output bursts [Default off]")
+    parser.add_argument("--burst_length", type=float, default=0.0, help="seconds of output held per burst [Default 0]")
+    parser.add_argument("--baudrate", type=int, default=None, help="simulated UART speed [Default unlimited]")
+    parser.add_argument("--text_only", action="store_true", help="reject '<P,N>' like firmware without binary frames")
+    parser.add_argument("--firmware_exact", action="store_true", help="only report running peltiers, like the firmware")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parseArgs(sys.argv[1:])
+    simulator = PhageBoxSimulator(rate=args.rate, seed=args.seed, noise=args.noise, drop_rate=args.drop_rate,
+                                  burst_every=args.burst_every, burst_length=args.burst_length,
+                                  report_idle=not args.firmware_exact, baudrate=args.baudrate,
+                                  binary_frames=not args.text_only)
+    with simulator:
+        print(f"simulated PhageBox on {simulator.port} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
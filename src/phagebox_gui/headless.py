@@ -0,0 +1,183 @@
+"""
+Description:
+------------
+    This module runs a PhageBox without the GUI, e.g. on a headless
+    Raspberry Pi or as a service. It drives the ArduinoController
+    directly and only imports the serial stack, so it starts fast and
+    needs neither Tk nor matplotlib.
+
+PCR Programs
+------------
+    A program is "PELTIER,CYCLES,D_TIME,D_TEMP,A_TIME,A_TEMP,E_TIME,E_TEMP"
+    (the order of the '<H,...>' command), with chip temperatures in
+    Celsius, e.g. "1,32,15,90,20,50,60,72". A program file holds one
+    program per line ('#' starts a comment).
+
+    Chip temperatures are converted with slope/intercept, or with a
+    per-sensor Calibration (calibration.py) if one is given; numpy is
+    only imported in that case.
+
+Useful Methods/Classes
+----------------------
+    1. parse_program - turns a program string into start_pcr() arguments.
+    2. read_program_file - reads the programs of a program file.
+    3. CSVSink - run logger stand-in that prints samples as CSV.
+    4. HeadlessRunner - connects, starts the programs and streams telemetry.
+"""
+# standard library
+import sys
+import time
+# non-standard library
+# in-house packages
+from src.phagebox_gui.arduino_controller import ArduinoController
+
+
+
+PROGRAM_FIELDS = ("peltier", "cycles", "d_time", "d_temp", "a_time", "a_temp", "e_time", "e_temp")
+
+
+def parse_program(program):
+    """
+    Description:
+        Converts "1,32,15,90,20,50,60,72" into a dict of start_pcr()
+        keyword arguments (temperatures still chip temperatures).
+    """
+    values = [value.strip() for value in program.split(",")]
+    if len(values) != len(PROGRAM_FIELDS):
+        raise ValueError(f"expected {len(PROGRAM_FIELDS)} values ({','.join(PROGRAM_FIELDS)}), got '{program}'")
+    program = {field: float(value) for field, value in zip(PROGRAM_FIELDS, values)}
+    program["peltier"] = int(program["peltier"])
+    program["cycles"] = int(program["cycles"])
+    if program["peltier"] not in (1, 2, 3):
+        raise ValueError(f"peltier must be 1 (front), 2 (back) or 3 (both), got {program['peltier']}")
+    return program
+
+
+def read_program_file(path):
+    """
+    Description:
+        Reads one program per line, skipping blank lines and comments.
+    """
+    programs = []
+    with open(path) as program_file:
+        for line in program_file:
+            line = line.split("#")[0].strip()
+            if line:
+                programs.append(parse_program(line))
+    return programs
+
+
+class CSVSink:
+    """
+    Description:
+        Takes rows like a RunLogger and writes them to a stream as CSV
+        with calibrated (chip) temperatures, in the column order of the
+        GUI's CSV export.
+    """
+
+    def __init__(self, stream, start_time, slope, y_int, calibration=None):
+        self.stream = stream
+        self.start_time = start_time
+        self.slope = slope
+        self.y_int = y_int
+        self.calibration = calibration
+        self.stream.write("Time,Front-temp,Front-temp Setting,Back-temp,Back-temp Setting,Metal Temp\n")
+
+    def log(self, row):
+        receive_time, metal, front, back, front_set, back_set = row
+        if self.calibration is None:
+            chip = [value * self.slope + self.y_int for value in (front, front_set, back, back_set, metal)]
+        else:
+            chip = [self.calibration.to_chip(channel, value) for channel, value in
+                    (("front", front), ("front_set", front_set), ("back", back), ("back_set", back_set), ("metal", metal))]
+        self.stream.write(f"{receive_time - self.start_time:.3f},{chip[0]:.2f},{chip[1]:.2f},"
+                          f"{chip[2]:.2f},{chip[3]:.2f},{chip[4]:.2f}\n")
+        self.stream.flush()
+        return True
+
+    def close(self):
+        self.stream.flush()
+
+
+class HeadlessRunner:
+    """
+    Description:
+        Runs PCR programs on a PhageBox and streams its telemetry to
+        a run log or to stdout, without any GUI.
+    """
+
+    def __init__(self, serial_port, y_int, slope, log_file=None, output=sys.stdout,
+                 baudrate=ArduinoController.DEFAULT_BAUDRATE, max_baudrate=None, device_time=False, calibration=None):
+        """
+        Description:
+            Telemetry goes to log_file (a run log) if given, otherwise
+            to output as CSV. baudrate, max_baudrate and device_time
+            are passed to the ArduinoController. calibration (a
+            Calibration) replaces slope/y_int.
+        """
+        self.y_int = y_int
+        self.slope = slope
+        self.calibration = calibration
+        self.model = ArduinoController(serial_port, baudrate=baudrate, max_baudrate=max_baudrate,
+                                       device_time=device_time)
+        self.start_time = time.time()
+        if log_file:
+            from src.phagebox_gui.run_logger import RunLogger # pulls in numpy
+            self.sink = RunLogger(log_file)
+        else:
+            self.sink = CSVSink(output, self.start_time, slope, y_int, calibration)
+        self.model.attach_logger(self.sink)
+
+    def chip2pelt_temp(self, chip_temp, channel="front"):
+        """
+        Description:
+            Converts a chip temperature to the predicted peltier
+            temperature (as the GUI does before sending a program).
+        """
+        if self.calibration is not None:
+            return self.calibration.to_raw(channel, chip_temp)
+        return (chip_temp - self.y_int) / self.slope
+
+    def start(self, program):
+        """
+        Description:
+            Sends a program and returns how long it will take (seconds).
+            With a per-sensor calibration, both peltiers (3) may take
+            one program each.
+        """
+        if self.calibration is not None:
+            heaters = self.calibration.heaters(program["peltier"])
+        else:
+            heaters = [(program["peltier"], "front")]
+        for peltier, sensor in heaters:
+            self.model.start_pcr(peltier=peltier,
+                                 cycles=program["cycles"],
+                                 d_temp=self.chip2pelt_temp(program["d_temp"], sensor),
+                                 d_time=program["d_time"],
+                                 a_temp=self.chip2pelt_temp(program["a_temp"], sensor),
+                                 a_time=program["a_time"],
+                                 e_temp=self.chip2pelt_temp(program["e_temp"], sensor),
+                                 e_time=program["e_time"])
+        return program["cycles"] * (program["d_time"] + program["a_time"] + program["e_time"])
+
+    def run(self, programs, duration=None):
+        """
+        Description:
+            Starts every program and streams telemetry until duration
+            seconds have passed (default: until the longest program
+            is done, or forever without programs) or Ctrl-C.
+        """
+        run_times = [self.start(program) for program in programs]
+        if duration is None and run_times:
+            duration = max(run_times)
+        try:
+            while duration is None or time.time() - self.start_time < duration:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.model.stop_now()
+        self.sink.close()
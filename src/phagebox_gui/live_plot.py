@@ -0,0 +1,203 @@
+"""
+Description:
+------------
+    This module draws the live PCR temperature plot incrementally.
+    The five lines and the legend are created once; every tick only
+    moves the line data and blits the axes over a cached background.
+    The expensive full redraw happens only when the data leaves the
+    current axis limits (or matplotlib redraws for its own reasons,
+    e.g. a resize).
+
+    Long histories are min/max decimated to about one point pair per
+    pixel column. Zooming or panning with the toolbar re-queries the
+    visible window from the full-resolution history, and the toolbar's
+    home button returns to the live view.
+
+Useful Methods/Classes
+----------------------
+    1. LIVE_LINES - field, colour and legend label of each plotted line.
+    2. LiveTemperaturePlot - blitted renderer for a TelemetryStore.
+"""
+# standard library
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.decimation import MinMaxDecimator, decimate_window
+
+
+
+LIVE_LINES = (
+    ("metal", "blue", "Metal Temps"),
+    ("front", "green", "Front Temperature (est.)"),
+    ("back", "red", "Back Temperature (est.)"),
+    ("front_set", "black", "Front Temp Set"),
+    ("back_set", "grey", "Back Temp Set"),
+)
+
+
+class LiveTemperaturePlot:
+    """
+    Description:
+        Keeps the temperature lines of an axes in sync with a
+        TelemetryStore using blitting and min/max decimation.
+    """
+
+    def __init__(self, ax, toolbar=None, headroom=0.25):
+        """
+        Description:
+            ax - axes to draw into.
+            toolbar - NavigationToolbar2 of the canvas, if any. Its
+                      home view is kept at the live (auto-scaled) view.
+            headroom - fraction of the data span added when the limits
+                       have to grow, so rescales stay rare.
+        """
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.toolbar = toolbar
+        self.headroom = headroom
+        self.fields = [field for field, _, _ in LIVE_LINES]
+        self.lines = {}
+        for field, color, label in LIVE_LINES:
+            self.lines[field], = ax.plot([], [], color=color, label=label, animated=True)
+        self.legend = ax.legend(loc="upper left")
+        self.background = None
+        self.telemetry = None
+        self.decimator = MinMaxDecimator(self.fields)
+        self.auto_limits = None # limits last set by the autoscaling
+        self.autoscaling = False
+        self.processed = 0 # rows (including spilled ones) already in the bounds
+        self.bounds = [np.inf, -np.inf, np.inf, -np.inf] # x min/max, y min/max
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        ax.callbacks.connect("xlim_changed", self.on_limits_changed)
+        ax.callbacks.connect("ylim_changed", self.on_limits_changed)
+
+    def reset(self):
+        """
+        Description:
+            Forgets the data seen so far, for when the history was
+            rebuilt (e.g. re-calibrated). The next update starts over.
+        """
+        self.processed = 0
+        self.bounds = [np.inf, -np.inf, np.inf, -np.inf]
+        self.decimator = MinMaxDecimator(self.fields)
+        self.auto_limits = None
+        self.background = None
+
+    @property
+    def buckets(self):
+        """
+        Description:
+            Number of pixel columns spanned by the axes.
+        """
+        return max(int(self.ax.bbox.width), 1)
+
+    def zoomed(self):
+        """
+        Description:
+            True when the user zoomed or panned away from the live view.
+        """
+        return self.auto_limits is not None and (self.ax.get_xlim(), self.ax.get_ylim()) != self.auto_limits
+
+    def on_draw(self, event):
+        """
+        Description:
+            Called after every full redraw. Caches the background
+            (axes, ticks, legend) and puts the lines back on top.
+        """
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_lines()
+
+    def on_limits_changed(self, ax):
+        """
+        Description:
+            Re-queries the visible window at full resolution when the
+            toolbar zooms or pans (or returns home).
+        """
+        if self.autoscaling or self.telemetry is None:
+            return
+        self.set_lines(self.visible_data(self.telemetry))
+
+    def draw_lines(self):
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
+
+    def set_lines(self, data):
+        for field, (x, y) in data.items():
+            self.lines[field].set_data(x, y)
+
+    def visible_data(self, telemetry):
+        """
+        Description:
+            {field: (x, y)} to draw for the current view: incremental
+            buckets for the live view, a fresh query when zoomed.
+        """
+        if self.zoomed():
+            x_low, x_high = self.ax.get_xlim()
+            return decimate_window(telemetry, self.fields, x_low, x_high, self.buckets)
+        if len(telemetry) <= 2 * self.buckets:
+            times = telemetry.column("time")
+            return {field: (times, telemetry.column(field)) for field in self.fields}
+        if self.decimator.width is None:
+            self.rebuild_buckets(telemetry)
+        return self.decimator.points()
+
+    def rebuild_buckets(self, telemetry):
+        x_low, x_high = self.ax.get_xlim()
+        self.decimator.set_resolution(telemetry, x_low, (x_high - x_low) / self.buckets)
+
+    def update(self, telemetry):
+        """
+        Description:
+            Folds new telemetry into the lines and redraws them.
+            Returns True if a full redraw was needed.
+        """
+        self.telemetry = telemetry
+        rescaled = self.update_limits(telemetry)
+        if rescaled:
+            self.rebuild_buckets(telemetry)
+        else:
+            self.decimator.update(telemetry)
+        self.set_lines(self.visible_data(telemetry))
+        if rescaled or self.background is None:
+            self.canvas.draw()
+            return True
+        self.canvas.restore_region(self.background)
+        self.draw_lines()
+        self.canvas.blit(self.ax.bbox)
+        return False
+
+    def update_limits(self, telemetry):
+        """
+        Description:
+            Folds the rows added since the last call into the data
+            bounds and, unless the user is zoomed in, grows the axis
+            limits if the data left them. Returns True if the limits
+            changed.
+        """
+        total = telemetry.spilled + len(telemetry)
+        new_rows = telemetry.view()[max(self.processed - telemetry.spilled, 0):]
+        self.processed = total
+        if len(new_rows) == 0:
+            return False
+        temperatures = [new_rows[field] for field in self.fields]
+        bounds = self.bounds
+        bounds[0] = min(bounds[0], float(new_rows["time"][0]))
+        bounds[1] = max(bounds[1], float(new_rows["time"][-1]))
+        bounds[2] = min(bounds[2], min(float(column.min()) for column in temperatures))
+        bounds[3] = max(bounds[3], max(float(column.max()) for column in temperatures))
+        if self.zoomed():
+            return False
+        x_low, x_high = self.ax.get_xlim()
+        y_low, y_high = self.ax.get_ylim()
+        if x_low <= bounds[0] and bounds[1] <= x_high and y_low <= bounds[2] and bounds[3] <= y_high:
+            return False
+        x_pad = max(bounds[1] - bounds[0], 1.0) * self.headroom
+        y_pad = max(bounds[3] - bounds[2], 1.0) * self.headroom
+        self.autoscaling = True
+        self.ax.set_xlim(bounds[0], bounds[1] + x_pad)
+        self.ax.set_ylim(bounds[2] - y_pad, bounds[3] + y_pad)
+        self.autoscaling = False
+        self.auto_limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        if self.toolbar is not None:
+            self.toolbar.update() # home now returns to this view
+        return True
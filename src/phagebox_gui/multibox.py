@@ -0,0 +1,405 @@
+"""
+Description:
+------------
+    This module drives many PhageBoxes from one process and one thread.
+    Every serial port is opened non-blocking and registered with a
+    single asyncio event loop (loop.add_reader/add_writer), so there is
+    no reader thread per box. The loop wakes up only when a port has
+    bytes to read or queued bytes to write.
+
+    Telemetry from all boxes goes into one shared, bounded
+    TelemetryStore whose rows carry the index of the box they came from
+    (MULTIBOX_DTYPE) and the time.monotonic() seconds since open().
+
+    Commands go out one at a time per box, each waiting for the
+    firmware's '<N>' echo like ArduinoController's CommandPipeline:
+    the magnet and backlight state only change once the toggle is
+    acknowledged, and an echo that does not match the command in flight
+    is dropped as stale.
+
+    Needs an event loop with add_reader support on serial devices, i.e.
+    Linux or macOS (not the Windows proactor loop).
+
+Example
+-------
+    async def main():
+        async with MultiBoxController(["/dev/ttyUSB0", "/dev/ttyUSB1"]) as boxes:
+            await boxes[0].start_pcr(1, 32, 90, 15, 50, 20, 72, 60)
+            await boxes[1].toggleMagnet()
+            await asyncio.sleep(60)
+        print(boxes.box_rows(1))
+
+    asyncio.run(main())
+
+Useful Methods/Classes
+----------------------
+    1. MULTIBOX_DTYPE - TELEMETRY_DTYPE with the index of the box.
+    2. BoxConnection - one box: non-blocking port, parser and commands.
+    3. MultiBoxController - owns the boxes and the shared store.
+"""
+# standard library
+import asyncio
+import os
+import time
+# non-standard library
+import numpy as np
+from serial import Serial
+# in-house packages
+from src.phagebox_gui.command_pipeline import CommandPipeline
+from src.phagebox_gui.commands import BACKLIGHT_TOGGLE, MAGNET_TOGGLE, expected_ack, pcr_commands, pcr_program
+from src.phagebox_gui.telemetry_parser import TelemetryParser
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE, TelemetryStore
+
+
+
+MULTIBOX_DTYPE = np.dtype([TELEMETRY_DTYPE.descr[0], ("box", "<u2"), *TELEMETRY_DTYPE.descr[1:]])
+
+# most bytes taken from a port per wake-up.
+READ_SIZE = 65536
+
+
+class BoxConnection:
+    """
+    Description:
+        One PhageBox of a MultiBoxController. Reads and writes only
+        from the event loop's callbacks, never blocking it.
+    """
+
+    # printed by init_phagebox() once the board is up.
+    READY_BANNER = b"<Arduino is ready>"
+
+    def __init__(self, controller, index, port, baudrate=9600, ack_timeout=CommandPipeline.ACK_TIMEOUT):
+        self.controller = controller
+        self.index = index
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self.fd = None
+        self.loop = None
+        self.backlightOn = False
+        self.magnetOn = False
+        self.current_temperatures = [-1, -1, -1]
+        self.set_temperatures = [-1, -1]
+        self.pcr_programs = [] # every PCR program sent, for the run metadata
+        self.receive_time = 0.0 # time.monotonic() of the last read
+        self.samples = 0
+        self.ack_timeout = ack_timeout
+        self.timed_out = 0        # commands without an acknowledgement
+        self.rejected = 0         # commands answered with 'WRONG SERIAL MSG.'
+        self.unexpected_acks = 0  # acknowledgements with no command waiting
+        self.mismatched_acks = 0  # acknowledgements with an unexpected value
+        self.parser = TelemetryParser(self.current_temperatures, self.set_temperatures,
+                                      on_unknown=self.handle_unknown, on_sample=self.handle_sample,
+                                      on_ack=self.handle_ack)
+        self._ready = asyncio.Event()
+        self._command_lock = asyncio.Lock() # one command in flight
+        self._in_flight = None # (expected ack, future) of the command in flight
+        self._output = bytearray()
+        self._writing = False
+        self._drain_waiters = []
+
+    def open(self, loop):
+        """
+        Description:
+            Opens the port non-blocking and registers it with the loop.
+        """
+        self.loop = loop
+        self.ser = Serial(self.port, self.baudrate, timeout=0)
+        self.ser.reset_input_buffer()
+        self.ser.reset_output_buffer()
+        self.fd = self.ser.fileno()
+        os.set_blocking(self.fd, False)
+        loop.add_reader(self.fd, self.on_readable)
+
+    def close(self):
+        if self.fd is None:
+            return
+        self.loop.remove_reader(self.fd)
+        if self._writing:
+            self.loop.remove_writer(self.fd)
+            self._writing = False
+        self.ser.close()
+        self.fd = None
+        self._wake_drain_waiters()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    async def wait_until_ready(self, timeout):
+        """
+        Description:
+            Waits until the device sends its ready banner or its first
+            valid telemetry line, or until timeout seconds have passed.
+            Returns is_ready().
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_ready()
+
+    # ----------------------------------------------------------------- input
+
+    def on_readable(self):
+        """
+        Description:
+            Reader callback: parses whatever the port has buffered.
+        """
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as error:
+            print(f"box {self.index} ({self.port}): {error}")
+            self.close()
+            return
+        if not data:
+            print(f"box {self.index} ({self.port}): disconnected")
+            self.close()
+            return
+        self.receive_time = time.monotonic()
+        self.parser.feed(data)
+
+    def handle_sample(self):
+        """
+        Description:
+            Called after every parsed sample; appends the box's current
+            temperatures to the shared store.
+        """
+        if not self._ready.is_set():
+            self._ready.set()
+        self.samples += 1
+        self.controller.add_sample(self)
+
+    def handle_ack(self, value):
+        """
+        Description:
+            Called by the parser for every '<N>' echo (value N) and
+            'WRONG SERIAL MSG.' (value None); resolves the command in
+            flight with True (acknowledged) or False (rejected).
+        """
+        if self._in_flight is None or self._in_flight[1].done():
+            self.unexpected_acks += 1
+            return
+        expected, future = self._in_flight
+        if value is not None and expected is not None and value != expected:
+            # stale: not this command's acknowledgement
+            self.mismatched_acks += 1
+            return
+        future.set_result(value is not None)
+
+    def handle_unknown(self, line):
+        """
+        Description:
+            Prints lines from the device that are not telemetry.
+        """
+        if line.startswith(self.READY_BANNER):
+            self._ready.set()
+        line = line.decode("ascii", errors="replace").strip()
+        if line:
+            print(f"box {self.index}: {line}")
+
+    # ---------------------------------------------------------------- output
+
+    def send_serial_msg(self, str):
+        """
+        Description:
+            Queues a string for the port. Written from the loop as the
+            port accepts it; await drain() to wait until it is sent.
+        """
+        self._output += bytes(str, "ascii")
+        self.on_writable()
+
+    def on_writable(self):
+        """
+        Description:
+            Writer callback: writes as much of the queued output as the
+            port takes, and watches the port until the rest is written.
+        """
+        if self.fd is None:
+            return
+        try:
+            written = os.write(self.fd, self._output) if self._output else 0
+        except BlockingIOError:
+            written = 0
+        del self._output[:written]
+        if self._output and not self._writing:
+            self.loop.add_writer(self.fd, self.on_writable)
+            self._writing = True
+        elif not self._output:
+            if self._writing:
+                self.loop.remove_writer(self.fd)
+                self._writing = False
+            self._wake_drain_waiters()
+
+    async def drain(self):
+        """
+        Description:
+            Waits until every queued byte has been handed to the port.
+        """
+        if self._output and self.fd is not None:
+            waiter = self.loop.create_future()
+            self._drain_waiters.append(waiter)
+            await waiter
+
+    def _wake_drain_waiters(self):
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._drain_waiters.clear()
+
+    async def send_command(self, str):
+        """
+        Description:
+            Sends a command once the previous one is finished and waits
+            up to ack_timeout seconds for its acknowledgement. Returns
+            True if the device acknowledged it. Not resent on timeout,
+            since resending a toggle could apply it twice.
+        """
+        async with self._command_lock:
+            if self.fd is None:
+                return False
+            future = self.loop.create_future()
+            self._in_flight = (expected_ack(str), future)
+            try:
+                self.send_serial_msg(str)
+                await self.drain()
+                acked = await asyncio.wait_for(future, self.ack_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                print(f"box {self.index}: no acknowledgement for {str}")
+                return False
+            finally:
+                self._in_flight = None
+            if not acked:
+                self.rejected += 1
+                print(f"box {self.index}: {str} rejected")
+            return acked
+
+    async def toggleBacklight(self):
+        """
+        Description:
+            turns the backlight on and off. backlightOn follows once
+            the device acknowledges the toggle; returns whether it did.
+        """
+        acked = await self.send_command(BACKLIGHT_TOGGLE)
+        if acked:
+            self.backlightOn = not self.backlightOn
+        return acked
+
+    async def toggleMagnet(self):
+        """
+        Description:
+            turns the magnet on and off. magnetOn follows once the
+            device acknowledges the toggle; returns whether it did.
+        """
+        acked = await self.send_command(MAGNET_TOGGLE)
+        if acked:
+            self.magnetOn = not self.magnetOn
+        return acked
+
+    async def start_pcr(self, peltier, cycles, d_temp, d_time, a_temp, a_time, e_temp, e_time):
+        """
+        Description:
+            This method initiates PCR for a given peltier, sending
+            each command once the previous one is acknowledged.
+            Returns True if all of them were.
+        """
+        program = pcr_program(peltier, cycles, d_temp, d_time, a_temp, a_time, e_temp, e_time)
+        self.pcr_programs.append({"time": time.time(), **program})
+        acked = True
+        for command in pcr_commands(program):
+            acked = await self.send_command(command) and acked
+        return acked
+
+
+class MultiBoxController:
+    """
+    Description:
+        Owns a BoxConnection per serial port, all served by the running
+        asyncio loop, and the TelemetryStore they share.
+    """
+
+    # longest time (seconds) to wait for the boards to come out of reset.
+    CONNECT_TIMEOUT = 2.0
+
+    # most rows of the shared store kept in memory (about 30 MB).
+    MAX_HISTORY = 1 << 20
+
+    def __init__(self, ports, baudrate=9600, store=None, on_sample=None, spill_path=None,
+                 ack_timeout=CommandPipeline.ACK_TIMEOUT):
+        """
+        Description:
+            ports - serial port of every box; box i is ports[i].
+            store - shared TelemetryStore with MULTIBOX_DTYPE rows
+                    (by default a new one holding MAX_HISTORY rows,
+                    spilling the older ones to spill_path if given).
+            on_sample - optional callable(box) run after every sample.
+            ack_timeout - seconds to wait for each command's echo.
+        """
+        self.boxes = [BoxConnection(self, index, port, baudrate, ack_timeout) for index, port in enumerate(ports)]
+        if store is None:
+            store = TelemetryStore(max_samples=self.MAX_HISTORY, spill_path=spill_path, dtype=MULTIBOX_DTYPE)
+        self.store = store
+        self.on_sample = on_sample
+        self.start_time = time.monotonic()
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        return self.boxes[index]
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def open(self, connect_timeout=CONNECT_TIMEOUT):
+        """
+        Description:
+            Opens every port and waits (concurrently) up to
+            connect_timeout seconds for the boxes to be ready.
+            Returns the indices of the boxes that are not ready.
+        """
+        loop = asyncio.get_running_loop()
+        self.start_time = time.monotonic()
+        for box in self.boxes:
+            box.open(loop)
+        ready = await asyncio.gather(*(box.wait_until_ready(connect_timeout) for box in self.boxes))
+        return [box.index for box, is_ready in zip(self.boxes, ready) if not is_ready]
+
+    def close(self):
+        for box in self.boxes:
+            box.close()
+
+    def add_sample(self, box):
+        """
+        Description:
+            Appends the current temperatures of a box to the store,
+            stamped with the (monotonic) time they were received.
+        """
+        self.store.append((box.receive_time - self.start_time, box.index,
+                           *box.current_temperatures, *box.set_temperatures))
+        if self.on_sample is not None:
+            self.on_sample(box)
+
+    def box_rows(self, index):
+        """
+        Description:
+            The in-memory rows of one box (a copy).
+        """
+        rows = self.store.view()
+        return rows[rows["box"] == index]
+
+    # like BoxConnection's, these return whether the box acknowledged
+    async def start_pcr(self, box, *args, **kwargs):
+        return await self.boxes[box].start_pcr(*args, **kwargs)
+
+    async def toggleMagnet(self, box):
+        return await self.boxes[box].toggleMagnet()
+
+    async def toggleBacklight(self, box):
+        return await self.boxes[box].toggleBacklight()
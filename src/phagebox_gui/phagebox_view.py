@@ -24,30 +24,25 @@ Useful Methods/Classes
                 7. PCRStateFrame - frame for PCR states (layer 3)
 """
 # standard library
-from sys import float_repr_style
 from tkinter import NONE, ttk
 import tkinter as tk
-from tkinter.filedialog import asksaveasfile
+from tkinter.filedialog import asksaveasfilename
 from abc import abstractmethod
-from turtle import color
 import numpy as np
+import os
+import tempfile
 import time
-import webbrowser
-# matplotlib imports
-import matplotlib
-matplotlib.use("TkAgg")
-from functools import partial
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
-from matplotlib.figure import Figure
-import matplotlib.animation as animation
-from matplotlib import style
-import matplotlib.pyplot as plt
+# matplotlib, PIL and webbrowser are imported where they are used, so the
+# window can come up before they are loaded.
 # non-standard library
-from PIL import ImageTk, Image
 import customtkinter
 # in-house packages
 from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.calibration import Calibration, calibrate_columns
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE, TelemetryStore
+from src.phagebox_gui.run_logger import read_log
+from src.phagebox_gui.run_format import save_run, save_csv
+from src.phagebox_gui.scheduler import Scheduler
 
 
 
@@ -90,23 +85,37 @@ class BaseFrame_original(tk.Frame):
     def phagebox_adapter(self, phagebox_adapter):
         self._phagebox_adapter = phagebox_adapter
         
-    def pelt2chip_temp(self, pelt_temp):
+    def pelt2chip_temp(self, pelt_temp, channel="front"):
         """
         Description:
-            Converts a peliter temperature to the predicted
-            chip temperature
+            Converts a peliter temperature (scalar or array) of a
+            channel to the predicted chip temperature
         """
-        chip_temp = pelt_temp * self.slope + self.y_int
-        return chip_temp
+        return self.calibration.to_chip(channel, pelt_temp)
 
-    def chip2pelt_temp(self, chip_temp):
+    def chip2pelt_temp(self, chip_temp, channel="front"):
         """
         Description:
-            Converts a chip temperature to the predicted
-            peltier temperature
+            Converts a chip temperature (scalar or array) to the
+            predicted peltier temperature of a channel
         """
-        pelt_temp = (chip_temp - self.y_int) / self.slope
-        return pelt_temp
+        return self.calibration.to_raw(channel, chip_temp)
+
+    @property
+    def calibration(self):
+        """
+        Description:
+            If a calibration exists, use. If not, use parents.
+        """
+        calibration = getattr(self, "_calibration", None)
+        if calibration is not None:
+            return calibration
+        else:
+            return self.parent.calibration
+
+    @calibration.setter
+    def calibration(self, calibration):
+        self._calibration = calibration
 
     @property
     def y_int(self):
@@ -160,23 +169,37 @@ class BaseFrame(customtkinter.CTkFrame):
     def create_view():
         raise NotImplementedError
 
-    def pelt2chip_temp(self, pelt_temp):
+    def pelt2chip_temp(self, pelt_temp, channel="front"):
         """
         Description:
-            Converts a peliter temperature to the predicted
-            chip temperature
+            Converts a peliter temperature (scalar or array) of a
+            channel to the predicted chip temperature
         """
-        chip_temp = pelt_temp * self.slope + self.y_int
-        return chip_temp
+        return self.calibration.to_chip(channel, pelt_temp)
 
-    def chip2pelt_temp(self, chip_temp):
+    def chip2pelt_temp(self, chip_temp, channel="front"):
         """
         Description:
-            Converts a chip temperature to the predicted
-            peltier temperature
+            Converts a chip temperature (scalar or array) to the
+            predicted peltier temperature of a channel
         """
-        pelt_temp = (chip_temp - self.y_int) / self.slope
-        return pelt_temp
+        return self.calibration.to_raw(channel, chip_temp)
+
+    @property
+    def calibration(self):
+        """
+        Description:
+            If a calibration exists, use. If not, use parents.
+        """
+        calibration = getattr(self, "_calibration", None)
+        if calibration is not None:
+            return calibration
+        else:
+            return self.parent.calibration
+
+    @calibration.setter
+    def calibration(self, calibration):
+        self._calibration = calibration
 
     @property
     def y_int(self):
@@ -226,6 +249,7 @@ class BaseFrame(customtkinter.CTkFrame):
         self._phagebox_adapter = phagebox_adapter
 
     def callback(self, url):
+        import webbrowser
         #webbrowser.get('chrome').open("https://github.com/Dreycey/PhageBox", new=0, autoraise=True)
         print("called")
         webbrowser.open(url)
@@ -241,16 +265,37 @@ class PhageBoxGUI(BaseFrame):
         design of gui and works to organize the overall layout.
     """
 
-    def __init__(self, parent, phagebox_adapter, y_int, slope):
+    # most samples of history kept in memory (28 bytes each)
+    MAX_HISTORY = 1 << 20
+
+    # default rates (per second) of the scheduled tasks
+    CAPTURE_RATE = 10.0 # samples moved from the reader into the history
+    PLOT_RATE = 1.0     # plot redraws
+    LABEL_RATE = 2.0    # time remaining label
+
+    def __init__(self, parent, phagebox_adapter, y_int, slope, capture_rate=CAPTURE_RATE, plot_rate=PLOT_RATE,
+                 label_rate=LABEL_RATE, calibration=None):
         self.parent : BaseFrame = parent
         self.y_int = y_int
         self.slope = slope
+        # per-sensor calibration; --slope/--intercept for every sensor by default
+        self.calibration = calibration if calibration is not None else Calibration.linear(slope, y_int)
         self.phagebox_adapter : ArduinoController = phagebox_adapter
         super().__init__(parent, background="blue")
         self.start_time = time.time()
-        self.temperature_history = [[], [], []]
-        self.set_temperature_history = [[], []] #front, back
-        self.time_history = []
+        self.start_monotonic = time.monotonic()
+        # time, metal, front, back, front set, back set, as received (raw)
+        # and calibrated. Every sample goes in; past MAX_HISTORY the oldest
+        # ones are spilled next to the run log, so zooming still reaches
+        # the start of the run.
+        spill_prefix = self.spill_prefix()
+        self.raw_telemetry = TelemetryStore(max_samples=self.MAX_HISTORY, spill_path=spill_prefix + ".raw.spill")
+        self.telemetry = TelemetryStore(max_samples=self.MAX_HISTORY, spill_path=spill_prefix + ".spill")
+        self.samples = self.phagebox_adapter.buffer_samples() # every sample, stamped by the reader thread
+        # periodic work runs at independent rates (see scheduler.py)
+        self.plot_rate = plot_rate
+        self.scheduler = Scheduler(self.after)
+        self.scheduler.add("capture", 1 / capture_rate, self.update_temperatures)
         # super().grid(row=0, column=0, sticky=tk.N + tk.S + tk.E + tk.W)
         self.pose_predict_state = False
         for row in range(3):
@@ -261,23 +306,65 @@ class PhageBoxGUI(BaseFrame):
                 self.columnconfigure(col, weight=1)
         self.grid(row=0, column=0, sticky=tk.N + tk.S + tk.E + tk.W)
         self.create_view()
+        self.scheduler.add("labels", 1 / label_rate, self.pcr_frame.update_time_remaining)
+        self.scheduler.start()
+
+    def spill_prefix(self):
+        """
+        Description:
+            Path the history spill files start with: the run log's, or
+            a temporary file's when there is no run log.
+        """
+        run_logger = self.phagebox_adapter.run_logger
+        if run_logger is not None:
+            return run_logger.path
+        return os.path.join(tempfile.gettempdir(), f"phagebox_{os.getpid()}")
+
+    def close_history(self):
+        """
+        Description:
+            Removes the spill files of the history (the run log keeps
+            every sample).
+        """
+        self.raw_telemetry.clear()
+        self.telemetry.clear()
 
     def update_temperatures(self):
         """
         Description:
-            Updates the temperatures and time information
+            Moves every sample received since the last update into the
+            history, at the time each was taken (not when this runs).
+        """
+        samples = self.samples
+        rows = []
+        while samples:
+            sample = samples.popleft()
+            rows.append((sample.monotonic - self.start_monotonic, *sample[4:]))
+        if rows:
+            rows = np.array(rows, dtype=TELEMETRY_DTYPE)
+            self.raw_telemetry.extend(rows)
+            self.telemetry.extend(self.calibration.apply(rows))
+
+    def recalibrate(self, calibration):
+        """
+        Description:
+            Switches to a new calibration and recalculates the whole
+            history, spilled samples included, from the raw samples
+            (exports recalculate from the run log).
+        """
+        self.calibration = calibration
+        self.telemetry.clear()
+        for rows in self.raw_telemetry.chunks():
+            self.telemetry.extend(calibration.apply(rows))
+        self.display_frame.redraw()
+
+    def elapsed(self):
+        """
+        Description:
+            Seconds since the start of the run, on the same clock as
+            the telemetry history.
         """
-        # save time
-        self.time_history.append(float(time.time() - self.start_time))
-        # save temps
-        self.temperature_history[0].append(self.pelt2chip_temp(self.phagebox_adapter.current_temperatures[0]))
-        self.temperature_history[1].append(self.pelt2chip_temp(self.phagebox_adapter.current_temperatures[1]))
-        self.temperature_history[2].append(self.pelt2chip_temp(self.phagebox_adapter.current_temperatures[2]))
-        # save set temps
-        self.set_temperature_history[0].append(self.pelt2chip_temp(self.phagebox_adapter.set_temperatures[0]))
-        self.set_temperature_history[1].append(self.pelt2chip_temp(self.phagebox_adapter.set_temperatures[1]))
-        # update time left
-        self.pcr_frame.update_time_remaining()
+        return time.monotonic() - self.start_monotonic
 
     def create_view(self):
         """
@@ -298,6 +385,7 @@ class PhageBoxGUI(BaseFrame):
 
         # Display Frame (layer 1)
         displayFrame = DisplayFrame(self, None)
+        self.display_frame = displayFrame
         displayFrame.grid(row=1, column=1, pady=4, padx=4, rowspan=1, columnspan=1, sticky=tk.N + tk.S + tk.E + tk.W)
 
         # PCR frame (layer 1)
@@ -345,6 +433,7 @@ class LogoFrame(BaseFrame):
             1. Displays the logo (layer 2)
         """
         # =======> GUI widget: logo <=======
+        from PIL import ImageTk, Image
         image = Image.open("./figures/logo.png").resize((198,72))
         self.bg_image = ImageTk.PhotoImage(image)
         self.image_label = customtkinter.CTkLabel(master=self, image=self.bg_image)
@@ -386,35 +475,42 @@ class MiscFrame(BaseFrame):
                                  border_width=super().border_width)
         self.create_view()
 
+    # milliseconds between checks whether a toggle is finished
+    TOGGLE_POLL = 50
+
     def toggle_magnet(self):
         """
         Description:
             Used to toggle on/off the magnet using the adapter module
-            to the PhageBox.
+            to the PhageBox. The button text follows magnetOn once the
+            toggle is finished (acked, or not applied after all).
         """
         print("toggle mag")
-        self.phagebox_adapter.toggleMagnet()
-        if self.button.text == "Turn OFF":
-            # self.button.hover_color = "light green"
-            self.button.set_text("Turn ON")
-        else:
-            # self.button2.hover_color = "red"
-            self.button.set_text("Turn OFF")
+        command = self.phagebox_adapter.toggleMagnet()
+        self.show_toggle_state(command, self.button, lambda: self.phagebox_adapter.magnetOn)
 
     def toggle_light(self):
         """
         Description:
-            Used to toggle on/off the magnet using the adapter module
-            to the PhageBox.
+            Used to toggle on/off the backlight using the adapter module
+            to the PhageBox. The button text follows backlightOn once
+            the toggle is finished (acked, or not applied after all).
         """
         print("toggle light")
-        self.phagebox_adapter.toggleBacklight()
-        if self.button2.text == "Turn OFF":
-            # self.button2.hover_color = "light green"
-            self.button2.set_text("Turn ON")
-        else:
-            # self.button2.hover_color = "red"
-            self.button2.set_text("Turn OFF")
+        command = self.phagebox_adapter.toggleBacklight()
+        self.show_toggle_state(command, self.button2, lambda: self.phagebox_adapter.backlightOn)
+
+    def show_toggle_state(self, command, button, is_on):
+        """
+        Description:
+            Sets the text of button from is_on() once command is
+            finished. The controller changes its state from the writer
+            thread, so the command is polled here on the Tk thread.
+        """
+        if not command.done():
+            self.after(self.TOGGLE_POLL, self.show_toggle_state, command, button, is_on)
+            return
+        button.set_text("Turn OFF" if is_on() else "Turn ON")
 
     def change_mode(self):
         """
@@ -505,45 +601,48 @@ class DisplayFrame(BaseFrame_original):
         self.create_view()
 
 
-    def init_window(self):
+    def animate(self):
+        """
+        Description:
+            Redraws only the temperature lines from the history. Run
+            by the parent's scheduler; the samples are captured by a
+            task of their own.
+        """
+        self.live_plot.update(self.parent.telemetry)
+
+    def redraw(self):
+        """
+        Description:
+            Redraws the plot from scratch (after the history changed).
+        """
+        self.live_plot.reset()
+        self.live_plot.update(self.parent.telemetry)
 
-        def animate(i):
-            """ this sub function updates the GUI. axis is cm^3 """
-            while (len(self.ax.lines) >= 1): 
-                self.ax.lines.pop(0)
-            # update values
-            self.parent.update_temperatures()
-            # get temperatures
-            metal_temps = self.parent.temperature_history[0]
-            front_temps = self.parent.temperature_history[1]
-            back_temps = self.parent.temperature_history[2]
-            set_front_temps = self.parent.set_temperature_history[0]
-            set_back_temps = self.parent.set_temperature_history[1]
-            # plot temperatures
-            self.ax.plot(self.parent.time_history, metal_temps, color='blue')
-            self.ax.plot(self.parent.time_history, front_temps, color='green')
-            self.ax.plot(self.parent.time_history, back_temps, color='red')
-            self.ax.plot(self.parent.time_history, set_front_temps, color='black')
-            self.ax.plot(self.parent.time_history, set_back_temps, color='grey')
-            # plot temperatures
-            self.ax.legend(['Metal Temps', 'Front Temperature (est.)', 'Back Temperature (est.)', 'Front Temp Set', 'Back Temp Set'])
-            return self.ax,
+    def init_window(self):
+        # matplotlib is only loaded once the plot is built
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+        from src.phagebox_gui.live_plot import LiveTemperaturePlot
 
         # init figure
-        self.fig = plt.Figure()
+        self.fig = Figure()
         self.ax = self.fig.add_subplot(111)
         self.ax.set_title("PCR temperature")
         self.ax.set_ylabel("Temperature (Celsius)")
         self.ax.set_xlabel("Time (Seconds)")
 
         # continue
-        self.x = np.arange(0, 2*np.pi, 0.01)
-        self.line, = self.ax.plot(self.x, np.sin(self.x))         
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         toolbar = NavigationToolbar2Tk(self.canvas, self)                                    
         toolbar.update()
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.ani = animation.FuncAnimation(self.fig, animate, interval=1000, blit=False)
+        # lines/legend are created once and blitted on every update
+        self.live_plot = LiveTemperaturePlot(self.ax, toolbar)
+        # adaptive: when drawing is slow, frames are skipped rather than starving the UI
+        self.parent.scheduler.add("plot", 1 / self.parent.plot_rate, self.animate, adaptive=True)
 
     def create_view(self):
         """
@@ -591,7 +690,7 @@ class PCRFrame(BaseFrame):
         time_remaining_arr_m = [0,0]
         for pelt_index in [0,1]: # front and back pelt
             if (self.pcr_start_time[pelt_index] != 0):
-                time_lapsed =  float(self.parent.time_history[-1]) - float(self.pcr_start_time[pelt_index])
+                time_lapsed =  self.parent.elapsed() - float(self.pcr_start_time[pelt_index])
                 time_remaining = self.time_for_pcr[pelt_index] - time_lapsed
                 time_remaining_arr[pelt_index] = int(time_remaining) # round
                 time_remaining_arr_m[pelt_index] = int(time_remaining/60) # round
@@ -602,28 +701,60 @@ class PCRFrame(BaseFrame):
 
         self.label_time_remaining.set_text(f"Time Remaining - Front: {time_remaining_arr[0]} s ({time_remaining_arr_m[0]} m), Back: {time_remaining_arr[1]} s ({time_remaining_arr_m[1]} m)")
 
+    # CSV column -> telemetry field, in the order of the exported CSV
+    CSV_COLUMNS = (("Front-temp", "front"), ("Front-temp Setting", "front_set"),
+                   ("Back-temp", "back"), ("Back-temp Setting", "back_set"),
+                   ("Metal Temp", "metal"))
+
+    def run_columns(self):
+        """
+        Description:
+            Returns the run as typed columns: time (float64), the chip
+            temperatures (float32) and the raw peltier temperatures
+            they were calibrated from. The data comes from the run
+            log, which already holds every sample received; without a
+            run log the history (spilled samples included) is used.
+        """
+        run_logger = self.phagebox_adapter.run_logger
+        if run_logger is None:
+            rows = np.concatenate(list(self.parent.raw_telemetry.chunks()) or [self.parent.raw_telemetry.view()])
+            time_column = rows["time"]
+        else:
+            run_logger.flush()
+            rows = read_log(run_logger.path)
+            time_column = rows["time"] - self.parent.start_time
+        return calibrate_columns(time_column, {field: rows[field] for _, field in self.CSV_COLUMNS},
+                                 self.calibration)
+
+    def run_metadata(self):
+        """
+        Description:
+            Metadata stored alongside the run.
+        """
+        return {"port": self.phagebox_adapter.port,
+                "start_time": self.parent.start_time,
+                "calibration": self.calibration.to_dict(),
+                "pcr_programs": self.phagebox_adapter.pcr_programs}
+
     def save_data(self):
         """
         Description:
-            This method saves the data to a specified file.
+            This method saves the data to a specified file, either as
+            a PhageBox run (.pbrun, columnar with metadata) or as CSV.
         """
         # open file
-        Files = [('Text Document', '*.csv')]
-        file = asksaveasfile(filetypes = Files, defaultextension = Files)
+        Files = [('PhageBox Run', '*.pbrun'), ('Text Document', '*.csv')]
+        file_name = asksaveasfilename(filetypes = Files, defaultextension = Files)
+        if not file_name:
+            return
         # get data to save (time, temperatures, set temperatures)
-        times = self.parent.time_history
-        metal_temps = self.parent.temperature_history[0]
-        front_temps = self.parent.temperature_history[1]
-        back_temps = self.parent.temperature_history[2]
-        set_front_temps = self.parent.set_temperature_history[0]
-        set_back_temps = self.parent.set_temperature_history[1]
+        columns = self.run_columns()
         # save to file
-        file.write(f"Time,Front-temp,Front-temp Setting,Back-temp,Back-temp Setting,Metal Temp\n")
-        for ind in range(len(times)):
-            file.write(f"{times[ind]},")
-            file.write(f"{front_temps[ind]},{set_front_temps[ind]},") # front temps
-            file.write(f"{back_temps[ind]},{set_back_temps[ind]},") # back temps
-            file.write(f"{metal_temps[ind]}\n") # metal temps
+        if file_name.endswith(".pbrun"):
+            save_run(file_name, columns, self.run_metadata())
+        else:
+            save_csv(file_name, {name: columns[name] for name in ["time"] + [field for _, field in self.CSV_COLUMNS]},
+                     names=["Time"] + [name for name, _ in self.CSV_COLUMNS])
 
     def stop_pcr(self):
         """
@@ -658,31 +789,29 @@ class PCRFrame(BaseFrame):
         # start the pcr.
         peltier = self.radio_var.get()
         num_cyles=float(self.cycle_count.get())
-        d_temp=self.chip2pelt_temp(float(self.denaturation_state.temp_set.get()))
         d_time=float(self.denaturation_state.time_set.get())
-        a_temp=self.chip2pelt_temp(float(self.annealing_state.temp_set.get()))
         a_time=float(self.annealing_state.time_set.get())
-        e_temp=self.chip2pelt_temp(float(self.extension_state.temp_set.get()))
         e_time=float(self.extension_state.time_set.get())
-        # start the PCR
-        self.phagebox_adapter.start_pcr(peltier=peltier, 
-                                        cycles=num_cyles, 
-                                        d_temp=d_temp, 
-                                        d_time=d_time, 
-                                        a_temp=a_temp, 
-                                        a_time=a_time, 
-                                        e_temp=e_temp, 
-                                        e_time=e_time
-                                        )
+        # start the PCR (one program per heater if their calibrations differ)
+        for heater, sensor in self.calibration.heaters(peltier):
+            self.phagebox_adapter.start_pcr(peltier=heater, 
+                                            cycles=num_cyles, 
+                                            d_temp=self.chip2pelt_temp(float(self.denaturation_state.temp_set.get()), sensor), 
+                                            d_time=d_time, 
+                                            a_temp=self.chip2pelt_temp(float(self.annealing_state.temp_set.get()), sensor), 
+                                            a_time=a_time, 
+                                            e_temp=self.chip2pelt_temp(float(self.extension_state.temp_set.get()), sensor), 
+                                            e_time=e_time
+                                            )
         # add start time and time it will take.
         total_time_for_pcr =  num_cyles * (d_time + a_time + e_time)
         if peltier == 3: # if both.
-            self.pcr_start_time[0] = self.parent.time_history[-1]
-            self.pcr_start_time[1] = self.parent.time_history[-1]
+            self.pcr_start_time[0] = self.parent.elapsed()
+            self.pcr_start_time[1] = self.parent.elapsed()
             self.time_for_pcr[0] = total_time_for_pcr
             self.time_for_pcr[1] = total_time_for_pcr
         else:
-            self.pcr_start_time[peltier-1] = self.parent.time_history[-1]
+            self.pcr_start_time[peltier-1] = self.parent.elapsed()
             self.time_for_pcr[peltier-1] = total_time_for_pcr
             
     def create_view(self):
@@ -0,0 +1,139 @@
+"""
+Description:
+------------
+    This module finds PhageBoxes among the serial ports of the host, so
+    the GUI and the scripts can be started without naming a port.
+
+    Every candidate port is opened and listened to: a PhageBox prints
+    its ready banner after the reset that opening the port causes, and
+    then streams telemetry. Only the banner, a complete telemetry line
+    ('T_FRONT,72.00') or a binary frame with a valid CRC count as a
+    PhageBox; a bare echo such as '<0>' or a stray sync byte is
+    something any serial device may send. A box that is already past
+    the banner and idle (the firmware only reports running peltiers)
+    is pinged with a command the firmware does not know, which changes
+    nothing and is answered with the firmware's 'WRONG SERIAL MSG.'.
+    Ports are probed in parallel, since each probe mostly waits for the
+    board to come out of reset.
+
+Useful Methods/Classes
+----------------------
+    1. candidate_ports - serial ports that may be a PhageBox.
+    2. probe_port - whether a PhageBox answers on a port.
+    3. discover_phageboxes - the ports with a PhageBox, probed in parallel.
+    4. find_phagebox - the port to use when none is given.
+"""
+# standard library
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+# non-standard library
+from serial import Serial, SerialException
+from serial.tools import list_ports
+# in-house packages
+from src.phagebox_gui.binary_protocol import BinaryTelemetryParser
+from src.phagebox_gui.telemetry_parser import WRONG_MESSAGE
+
+
+
+# printed by init_phagebox() once the board is up.
+READY_BANNER = b"<Arduino is ready>"
+
+# a command the firmware rejects (with WRONG_MESSAGE) without doing anything.
+PING = b"<?>"
+
+# longest time (seconds) to listen on a port; the board needs about
+# two seconds to come out of reset and print its banner.
+PROBE_TIMEOUT = 3.0
+
+# USB vendor ids of Arduino boards and the usual USB-serial bridges.
+ARDUINO_VIDS = {0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4}
+
+
+def candidate_ports(include_all=False):
+    """
+    Description:
+        Device names of the serial ports that may be a PhageBox: the
+        USB ports of Arduinos and USB-serial bridges first, then the
+        other USB ports. include_all also returns ports without USB
+        information (e.g. built-in UARTs).
+    """
+    likely, other = [], []
+    for port in sorted(list_ports.comports(), key=lambda port: port.device):
+        if port.vid in ARDUINO_VIDS or "arduino" in (port.description or "").lower():
+            likely.append(port.device)
+        elif port.vid is not None or include_all:
+            other.append(port.device)
+    return likely + other
+
+
+def is_phagebox_output(data):
+    """
+    Description:
+        True if data holds the ready banner, the firmware's answer to
+        the ping, a complete telemetry line or a binary frame with a
+        valid CRC.
+    """
+    if READY_BANNER in data or WRONG_MESSAGE in data:
+        return True
+    parser = BinaryTelemetryParser([0.0] * 3, [0.0] * 2)
+    return parser.feed(data) > 0
+
+
+def probe_port(port, baudrate=9600, timeout=PROBE_TIMEOUT):
+    """
+    Description:
+        Listens on port for up to timeout seconds and returns True if a
+        PhageBox answers. Half way through, a box that has said nothing
+        is pinged. Ports that cannot be opened are not PhageBoxes.
+    """
+    try:
+        ser = Serial(port, baudrate, timeout=0.1)
+    except (SerialException, OSError, ValueError):
+        return False
+    try:
+        received = b""
+        pinged = False
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            received += ser.read(ser.in_waiting or 1)
+            if is_phagebox_output(received):
+                return True
+            if not pinged and time.monotonic() - start > timeout / 2:
+                ser.write(PING)
+                pinged = True
+        return False
+    except (SerialException, OSError):
+        return False
+    finally:
+        ser.close()
+
+
+def discover_phageboxes(ports=None, baudrate=9600, timeout=PROBE_TIMEOUT):
+    """
+    Description:
+        Probes ports (default candidate_ports()) in parallel and
+        returns the ones with a PhageBox, in the order given.
+    """
+    ports = candidate_ports() if ports is None else list(ports)
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+        found = list(pool.map(lambda port: probe_port(port, baudrate, timeout), ports))
+    return [port for port, is_box in zip(ports, found) if is_box]
+
+
+def find_phagebox(baudrate=9600):
+    """
+    Description:
+        Port of the first PhageBox found, for entry points started
+        without a port. Exits with a message if there is none.
+    """
+    print("looking for a PhageBox...")
+    ports = discover_phageboxes(baudrate=baudrate)
+    if not ports:
+        sys.exit("no PhageBox found; pass its port with -s")
+    if len(ports) > 1:
+        print(f"found PhageBoxes on {', '.join(ports)}")
+    print(f"using {ports[0]}")
+    return ports[0]
@@ -0,0 +1,137 @@
+"""
+Description:
+------------
+    This module saves and loads runs in a compact columnar format
+    (.pbrun). Every column is stored as one contiguous typed block,
+    so saving is one bulk write per column and loading memory-maps
+    the blocks without parsing anything.
+
+    Metadata (calibration, PCR programs sent, serial port, ...) is
+    kept as JSON in the header.
+
+Run File Layout
+---------------
+1. b"PBRUN1\\n" followed by the header length (uint64, little endian).
+2. JSON header: {"metadata": {...}, "length": n,
+                 "columns": [{"name", "dtype", "offset"}, ...]}
+3. Column blocks, each starting on a 64 byte boundary.
+
+Useful Methods/Classes
+----------------------
+    1. save_run - writes columns and metadata to a .pbrun file.
+    2. load_run - memory-maps the columns of a .pbrun file.
+    3. save_csv - vectorised CSV fallback.
+"""
+# standard library
+import json
+import struct
+# non-standard library
+import numpy as np
+# in-house packages
+
+
+
+RUN_MAGIC = b"PBRUN1\n"
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_run(path, columns, metadata=None):
+    """
+    Description:
+        Writes a run. columns maps a name to a 1-D array; every
+        column keeps its own dtype and all must have the same length.
+    """
+    arrays = {name: np.ascontiguousarray(column) for name, column in columns.items()}
+    lengths = {len(array) for array in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+    length = lengths.pop() if lengths else 0
+
+    # the header size depends on the offsets, so lay the blocks out after a
+    # generous header estimate and grow it until the header fits.
+    header_room = 1024
+    while True:
+        offset = _aligned(len(RUN_MAGIC) + 8 + header_room)
+        column_table = []
+        for name, array in arrays.items():
+            column_table.append({"name": name, "dtype": array.dtype.str, "offset": offset})
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({"metadata": metadata or {}, "length": length, "columns": column_table}).encode("utf-8")
+        if len(header) <= header_room:
+            break
+        header_room = 2 * len(header)
+
+    with open(path, "wb") as run_file:
+        run_file.write(RUN_MAGIC + struct.pack("<Q", len(header)) + header)
+        for entry, array in zip(column_table, arrays.values()):
+            run_file.seek(entry["offset"])
+            array.tofile(run_file)
+        run_file.truncate(offset)
+
+
+def read_header(path):
+    """
+    Description:
+        Returns the JSON header of a .pbrun file.
+    """
+    with open(path, "rb") as run_file:
+        magic = run_file.read(len(RUN_MAGIC))
+        if magic != RUN_MAGIC:
+            raise ValueError(f"{path} is not a PhageBox run file")
+        header_length, = struct.unpack("<Q", run_file.read(8))
+        return json.loads(run_file.read(header_length).decode("utf-8"))
+
+
+def load_run(path, mmap=True):
+    """
+    Description:
+        Returns (columns, metadata). With mmap the columns are read-only
+        memory maps of the file, otherwise they are read into memory.
+    """
+    header = read_header(path)
+    length = header["length"]
+    columns = {}
+    for entry in header["columns"]:
+        dtype = np.dtype(entry["dtype"])
+        if length == 0:
+            columns[entry["name"]] = np.zeros(0, dtype=dtype)
+        elif mmap:
+            columns[entry["name"]] = np.memmap(path, dtype=dtype, mode="r", offset=entry["offset"], shape=(length,))
+        else:
+            columns[entry["name"]] = np.fromfile(path, dtype=dtype, count=length, offset=entry["offset"])
+    return columns, header["metadata"]
+
+
+# CSV formats: time keeps millisecond resolution however long the run,
+# temperatures (and other floats) 4 decimals, integers as they are.
+TIME_FORMAT = "%.3f"
+FLOAT_FORMAT = "%.4f"
+INTEGER_FORMAT = "%d"
+
+
+def csv_format(name, column):
+    """
+    Description:
+        np.savetxt format of a column, from its name and dtype.
+    """
+    if np.issubdtype(np.asarray(column).dtype, np.integer):
+        return INTEGER_FORMAT
+    return TIME_FORMAT if name.lower().endswith("time") else FLOAT_FORMAT
+
+
+def save_csv(path, columns, names=None, formats=None):
+    """
+    Description:
+        Writes the columns as CSV with np.savetxt. names optionally
+        renames the columns in the CSV header; formats optionally maps
+        a column to its format (default csv_format()).
+    """
+    names = names or list(columns)
+    formats = formats or {}
+    fmt = [formats.get(name, csv_format(name, column)) for name, column in columns.items()]
+    np.savetxt(path, np.column_stack(list(columns.values())), delimiter=",", fmt=fmt, comments="",
+               header=",".join(names))
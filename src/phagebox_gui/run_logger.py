@@ -0,0 +1,182 @@
+"""
+Description:
+------------
+    This module streams telemetry to disk while a run is in progress,
+    so a crash loses at most the last few moments instead of the whole
+    run.
+
+    The serial reader hands rows to RunLogger.log(), which only puts
+    them on a bounded queue. A background thread writes them in
+    batches as fixed-size binary records (TELEMETRY_DTYPE), flushes
+    each batch to the OS and fsyncs periodically. A record torn by a
+    crash is ignored when the log is read back.
+
+Log File Layout
+---------------
+1. 256 byte header: b"PBLOG1\\n" followed by the record dtype as JSON.
+2. Records of the dtype, back to back.
+
+Useful Methods/Classes
+----------------------
+    1. RunLogger - background batch writer.
+    2. read_log - memory-maps the records of a log file.
+"""
+# standard library
+import json
+import os
+import queue
+import threading
+import time
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE
+
+
+
+LOG_MAGIC = b"PBLOG1\n"
+HEADER_SIZE = 256
+
+
+def make_header(dtype):
+    descr = json.dumps(np.lib.format.dtype_to_descr(np.dtype(dtype))).encode("ascii")
+    header = LOG_MAGIC + descr
+    if len(header) >= HEADER_SIZE:
+        raise ValueError("record dtype too large for the log header")
+    return header + b"\n" + b" " * (HEADER_SIZE - len(header) - 1)
+
+
+def read_log(path):
+    """
+    Description:
+        Returns the records of a run log as a read-only memory map.
+        A partially written trailing record is ignored.
+    """
+    with open(path, "rb") as log_file:
+        header = log_file.read(HEADER_SIZE)
+    if not header.startswith(LOG_MAGIC):
+        raise ValueError(f"{path} is not a PhageBox run log")
+    descr = json.loads(header[len(LOG_MAGIC):].decode("ascii").strip())
+    dtype = np.lib.format.descr_to_dtype([tuple(field) for field in descr])
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+class RunLogger:
+    """
+    Description:
+        Appends telemetry rows to a run log from a background thread.
+    """
+
+    def __init__(self, path, dtype=TELEMETRY_DTYPE, batch_size=256, flush_interval=0.25,
+                 fsync_interval=2.0, max_queue=65536):
+        """
+        Description:
+            path - log file, created (or truncated) here.
+            batch_size - most rows written per write call.
+            flush_interval - longest time a row waits in the queue.
+            fsync_interval - longest time written rows wait for fsync.
+            max_queue - rows buffered before log() starts dropping.
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._sync_requested = threading.Event()
+        self._synced = threading.Condition()
+        # statistics
+        self.rows_logged = 0
+        self.rows_written = 0
+        self.rows_synced = 0
+        self.rows_dropped = 0
+        self.max_unsynced_age = 0.0 # longest a written row waited for fsync (s)
+        self.file = open(path, "wb")
+        self.file.write(make_header(self.dtype))
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def log(self, row):
+        """
+        Description:
+            Queues a row (tuple in dtype order). Never blocks; returns
+            False and counts the row as dropped if the queue is full.
+        """
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.rows_dropped += 1
+            return False
+        self.rows_logged += 1
+        return True
+
+    def flush(self, timeout=5.0):
+        """
+        Description:
+            Waits until every row logged so far is written and synced.
+        """
+        target = self.rows_logged
+        self._sync_requested.set()
+        with self._synced:
+            return self._synced.wait_for(lambda: self.rows_synced >= target or not self.thread.is_alive(),
+                                         timeout=timeout)
+
+    def close(self):
+        """
+        Description:
+            Writes out the queued rows, syncs and closes the log.
+        """
+        self._stop_event.set()
+        self.thread.join()
+        self.file.close()
+
+    def write_loop(self):
+        """
+        Description:
+            Body of the writer thread.
+        """
+        last_sync = time.monotonic()
+        oldest_unsynced = None # when the first row since the last fsync was written
+        while True:
+            batch = self.next_batch()
+            if batch:
+                np.array(batch, dtype=self.dtype).tofile(self.file)
+                self.file.flush() # visible to other processes, survives an app crash
+                self.rows_written += len(batch)
+                if oldest_unsynced is None:
+                    oldest_unsynced = time.monotonic()
+            stopping = self._stop_event.is_set() and self._queue.empty()
+            sync_due = stopping or self._sync_requested.is_set() or time.monotonic() - last_sync >= self.fsync_interval
+            if sync_due and oldest_unsynced is not None:
+                os.fsync(self.file.fileno()) # survives a power loss
+                last_sync = time.monotonic()
+                self.max_unsynced_age = max(self.max_unsynced_age, last_sync - oldest_unsynced)
+                oldest_unsynced = None
+            if oldest_unsynced is None:
+                if self._queue.empty():
+                    self._sync_requested.clear()
+                with self._synced:
+                    self.rows_synced = self.rows_written
+                    self._synced.notify_all()
+            if stopping:
+                return
+
+    def next_batch(self):
+        """
+        Description:
+            Up to batch_size rows, waiting at most flush_interval for the first.
+        """
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
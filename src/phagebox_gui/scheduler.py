@@ -0,0 +1,210 @@
+"""
+Description:
+------------
+    This module runs the periodic work of the GUI (capturing samples,
+    redrawing the plot, refreshing labels) at independent rates on the
+    UI thread, so a slow plot no longer holds up data capture and
+    capture is not limited to the plot's refresh rate.
+
+    The Scheduler is driven by a single timer (Tk's after(), or any
+    callable with the same signature) that is re-armed for the next due
+    task after every tick. Every arm has a generation number and only
+    the timer of the latest one ticks, so a timer that fires early (Tk
+    timers follow the wall clock) still re-arms instead of being taken
+    for a stale one.
+
+Falling Behind
+--------------
+    1. A task that comes due more than one period late does not run
+       once per period it missed; the missed ticks are dropped and
+       counted, and the task stays on its original phase.
+    2. A task added with adaptive=True may use at most budget of the
+       UI thread: if a run took longer than budget * interval, its
+       next run is pushed back to keep to that share (counted as
+       skipped). The plot is adaptive; capture is not.
+    3. A task whose callback raises is counted (TaskStats.errors) and
+       keeps its schedule; the other tasks and the timer carry on.
+
+Useful Methods/Classes
+----------------------
+    1. TaskStats - run/missed/skipped counts and timings of one task.
+    2. Scheduler - runs periodic tasks from one re-armed timer.
+"""
+# standard library
+import time
+import traceback
+# non-standard library
+# in-house packages
+
+
+
+class TaskStats:
+    """
+    Description:
+        Metrics of one periodic task.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.missed = 0        # ticks dropped because the task came due too late
+        self.skipped = 0       # ticks given up to keep an adaptive task within budget
+        self.errors = 0        # runs whose callback raised
+        self.total_time = 0.0  # seconds spent running the task
+        self.max_time = 0.0
+        self.max_lateness = 0.0 # seconds between due time and run time
+
+    def add_run(self, duration, lateness):
+        self.runs += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.max_lateness = max(self.max_lateness, lateness)
+
+    def as_dict(self):
+        return {"runs": self.runs, "missed": self.missed, "skipped": self.skipped, "errors": self.errors,
+                "mean_time": self.total_time / self.runs if self.runs else 0.0,
+                "max_time": self.max_time, "max_lateness": self.max_lateness}
+
+
+class _Task:
+    def __init__(self, name, interval, callback, adaptive, due):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.adaptive = adaptive
+        self.due = due
+        self.stats = TaskStats()
+
+
+class Scheduler:
+    """
+    Description:
+        Runs named periodic tasks from one timer. Tasks due in the same
+        tick run in the order they were added.
+    """
+
+    # share of the UI thread an adaptive task may take.
+    BUDGET = 0.5
+
+    def __init__(self, after, budget=BUDGET, clock=time.monotonic):
+        """
+        Description:
+            after - callable(milliseconds, function) that calls
+                    function once later on the UI thread (e.g. a Tk
+                    widget's after method).
+        """
+        self.after = after
+        self.budget = budget
+        self.clock = clock
+        self.tasks = {}
+        self.ticks = 0
+        self._running = False
+        self._timer_due = None # when the armed timer fires (None if not armed)
+        self._generation = 0   # of the armed timer; older timers are stale
+
+    def add(self, name, interval, callback, adaptive=False):
+        """
+        Description:
+            Runs callback() every interval seconds, starting one
+            interval from now. adaptive - see Falling Behind.
+        """
+        self.tasks[name] = _Task(name, interval, callback, adaptive, self.clock() + interval)
+        if self._running:
+            self._arm()
+
+    def remove(self, name):
+        self.tasks.pop(name, None)
+
+    def set_interval(self, name, interval):
+        """
+        Description:
+            Changes the period of a task from its next run on.
+        """
+        task = self.tasks[name]
+        task.due += interval - task.interval
+        task.interval = interval
+        if self._running:
+            self._arm()
+
+    def start(self):
+        self._running = True
+        self._arm()
+
+    def stop(self):
+        self._running = False
+
+    def tick(self):
+        """
+        Description:
+            Runs every task that is due and re-arms the timer. Called by
+            the timer; can also be called directly (e.g. in a loop
+            without Tk).
+        """
+        self._timer_due = None
+        if not self._running:
+            return
+        self.ticks += 1
+        for task in list(self.tasks.values()):
+            now = self.clock()
+            if now < task.due:
+                continue
+            lateness = now - task.due
+            missed = int(lateness // task.interval)
+            task.stats.missed += missed
+            task.due += (missed + 1) * task.interval
+            try:
+                task.callback()
+            except Exception:
+                task.stats.errors += 1
+                print(f"scheduled task {task.name!r} failed:")
+                traceback.print_exc()
+            duration = self.clock() - now
+            task.stats.add_run(duration, lateness)
+            if task.adaptive and duration > self.budget * task.interval:
+                # give the UI thread back: wait until this run is within budget
+                skip = int(duration / (self.budget * task.interval))
+                task.stats.skipped += skip
+                task.due += skip * task.interval
+        self._arm()
+
+    def _arm(self):
+        """
+        Description:
+            Makes sure the timer fires when the next task is due.
+        """
+        if not self.tasks:
+            return
+        due = min(task.due for task in self.tasks.values())
+        if self._timer_due is not None and self._timer_due <= due:
+            return
+        self._timer_due = due
+        self._generation += 1
+        delay = max(int((due - self.clock()) * 1000), 1)
+        self.after(delay, lambda generation=self._generation: self._fire(generation))
+
+    def _fire(self, generation):
+        # a timer replaced by an earlier one is stale; the latest always
+        # ticks, even early (tick() then only re-arms)
+        if generation != self._generation:
+            return
+        self.tick()
+
+    def metrics(self):
+        """
+        Description:
+            {task name: TaskStats.as_dict()}.
+        """
+        return {name: task.stats.as_dict() for name, task in self.tasks.items()}
+
+    def format(self):
+        """
+        Description:
+            Text table of the task metrics.
+        """
+        rows = [f"{'task':<10}{'rate/s':>8}{'runs':>8}{'missed':>8}{'skipped':>9}{'errors':>8}"
+                f"{'mean ms':>9}{'max ms':>9}{'max late ms':>13}"]
+        for name, task in self.tasks.items():
+            stats = task.stats.as_dict()
+            rows.append(f"{name:<10}{1 / task.interval:>8.1f}{stats['runs']:>8}{stats['missed']:>8}"
+                        f"{stats['skipped']:>9}{stats['errors']:>8}{1000 * stats['mean_time']:>9.2f}{1000 * stats['max_time']:>9.2f}"
+                        f"{1000 * stats['max_lateness']:>13.2f}")
+        return "\n".join(rows)
@@ -0,0 +1,163 @@
+"""
+Description:
+------------
+    This module parses the telemetry the PhageBox sends over UART.
+    Lines look like 'T_FRONT,72.00' and are parsed straight from the
+    raw bytes returned by Serial.read, without decoding them to str.
+    Splitting happens in bytes.split/partition and the tag is looked up
+    in a table, so there is no per-line Python string handling.
+
+Telemetry Tags
+--------------
+1. "T_METAL"      - metal block temperature
+2. "T_FRONT"      - front peltier temperature
+3. "T_BACK"       - back peltier temperature
+4. "T_FRONT_SET"  - front peltier set temperature
+5. "T_BACK_SET"   - back peltier set temperature
+6. "T_MILLIS"     - device millis() when the readings after it were
+                    taken (only after '<T,1>'); reported to on_clock,
+                    not stored as a sample.
+
+Acknowledgements
+----------------
+    The firmware echoes an accepted command as '<N>' and answers a bad
+    one with 'WRONG SERIAL MSG.', without a newline, so the echo ends
+    up in front of the next line (e.g. '<3>T_FRONT,72.00'). The parser
+    strips these, reports them to on_ack and parses the rest of the line.
+
+Useful Methods/Classes
+----------------------
+    1. TelemetryParser - incremental parser fed with chunks read from serial.
+"""
+# standard library
+# non-standard library
+# in-house packages
+
+
+
+# which list a tag writes into: current temperatures or set temperatures.
+CURRENT = 0
+SETPOINT = 1
+
+# tag -> (target list, index in that list)
+TAG_TABLE = {
+    b"T_METAL": (CURRENT, 0),
+    b"T_FRONT": (CURRENT, 1),
+    b"T_BACK": (CURRENT, 2),
+    b"T_FRONT_SET": (SETPOINT, 0),
+    b"T_BACK_SET": (SETPOINT, 1),
+}
+
+# device timestamp in milliseconds (sent before the readings it stamps).
+CLOCK_TAG = b"T_MILLIS"
+
+# a partial line longer than this is noise (no newline in sight) and is dropped.
+MAX_PENDING = 256
+
+# answer of the firmware to a command it could not parse.
+WRONG_MESSAGE = b"WRONG SERIAL MSG."
+
+# first bytes of a line that may start with acknowledgements.
+ACK_STARTS = (b"<", WRONG_MESSAGE[:1])
+
+
+class TelemetryParser:
+    """
+    Description:
+        Incremental parser for the PhageBox telemetry lines. Chunks
+        can split lines anywhere; the unfinished tail is kept until
+        the next chunk completes it.
+    """
+
+    def __init__(self, current_temperatures, set_temperatures, on_unknown=None, on_sample=None, on_ack=None,
+                 on_clock=None):
+        """
+        Description:
+            Binds the tag table to the lists that receive the values.
+            on_unknown is called with the raw bytes of every line that
+            is not telemetry (e.g. '<Arduino is ready>').
+            on_sample is called (without arguments) after every value
+            is stored.
+            on_ack is called with N for every '<N>' echo and with None
+            for every 'WRONG SERIAL MSG.'.
+            on_clock is called with the milliseconds of every T_MILLIS
+            line.
+        """
+        targets = (current_temperatures, set_temperatures)
+        self.dispatch = {tag: (targets[kind], index) for tag, (kind, index) in TAG_TABLE.items()}
+        self.on_unknown = on_unknown
+        self.on_sample = on_sample
+        self.on_ack = on_ack
+        self.on_clock = on_clock
+        self.pending = b""
+
+    def reset(self):
+        """
+        Description:
+            Drops any partially received line.
+        """
+        self.pending = b""
+
+    def feed(self, data):
+        """
+        Description:
+            Parses every complete line in data (bytes, bytearray or
+            memoryview) and returns the number of samples parsed.
+        """
+        if self.pending:
+            data = self.pending + data
+        elif not isinstance(data, bytes):
+            data = bytes(data)
+        lines = data.split(b"\n")
+        pending = lines.pop()
+        if pending[:1] in ACK_STARTS:
+            pending = self.take_acks(pending) # the echo has no newline; don't wait for one
+        self.pending = pending if len(pending) <= MAX_PENDING else b""
+        get = self.dispatch.get
+        on_sample = self.on_sample
+        parsed = 0
+        for line in lines:
+            tag, _, value = line.partition(b",")
+            target = get(tag)
+            if target is None and line[:1] in ACK_STARTS:
+                line = self.take_acks(line)
+                tag, _, value = line.partition(b",")
+                target = get(tag)
+            if target is None and tag == CLOCK_TAG and value.strip().isdigit():
+                if self.on_clock is not None:
+                    self.on_clock(int(value))
+                continue
+            if target is not None:
+                try:
+                    target[0][target[1]] = float(value)
+                    parsed += 1
+                    if on_sample is not None:
+                        on_sample()
+                    continue
+                except ValueError:
+                    pass
+            if line and self.on_unknown is not None:
+                self.on_unknown(line)
+        return parsed
+
+    def take_acks(self, line):
+        """
+        Description:
+            Reports the acknowledgements at the start of line and
+            returns the rest of it.
+        """
+        while True:
+            if line.startswith(b"<"):
+                end = line.find(b">")
+                value = line[1:end]
+                if end < 0 or not value.lstrip(b"-").isdigit():
+                    return line
+                ack = int(value)
+                line = line[end + 1:]
+            elif line.startswith(WRONG_MESSAGE):
+                ack = None
+                line = line[len(WRONG_MESSAGE):]
+            else:
+                return line
+            if self.on_ack is not None:
+                self.on_ack(ack)
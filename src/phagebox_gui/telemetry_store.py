@@ -0,0 +1,202 @@
+"""
+Description:
+------------
+    This module holds the temperature history of a run in a
+    preallocated NumPy structured array (28 bytes per sample).
+
+    The store grows by doubling, so appends are amortised O(1). When
+    max_samples is given it becomes a bounded buffer instead: once
+    full, the oldest half is spilled to an on-disk file and the rest is
+    moved to the front, so the in-memory samples stay contiguous.
+
+    The plot and the exporter get views into the array, not copies.
+    A view is only valid until the next append, so callers fetch a new
+    one on every use. window() and chunks() also reach into the
+    spilled rows, so queries can still cover the whole run.
+
+Useful Methods/Classes
+----------------------
+    1. TELEMETRY_DTYPE - record layout of one sample.
+    2. TelemetryStore - growable/bounded telemetry history.
+"""
+# standard library
+import os
+# non-standard library
+import numpy as np
+# in-house packages
+
+
+
+TELEMETRY_DTYPE = np.dtype([
+    ("time", "<f8"),      # seconds since the start of the run
+    ("metal", "<f4"),     # metal temperature
+    ("front", "<f4"),     # front temperature
+    ("back", "<f4"),      # back temperature
+    ("front_set", "<f4"), # front set temperature
+    ("back_set", "<f4"),  # back set temperature
+])
+
+TEMPERATURE_FIELDS = ("metal", "front", "back", "front_set", "back_set")
+
+
+class TelemetryStore:
+    """
+    Description:
+        Telemetry history backed by a fixed-dtype structured array.
+    """
+
+    def __init__(self, initial_capacity=4096, max_samples=None, spill_path=None, dtype=TELEMETRY_DTYPE):
+        """
+        Description:
+            initial_capacity - rows allocated up front.
+            max_samples - if given, at most this many rows stay in memory.
+            spill_path - file the oldest rows are appended to once
+                         max_samples is reached (dropped if None).
+                         A file left from an earlier run is removed.
+        """
+        if max_samples is not None:
+            initial_capacity = min(initial_capacity, max_samples)
+        self.dtype = np.dtype(dtype)
+        self.max_samples = max_samples
+        self.spill_path = spill_path
+        self.spilled = 0 # rows no longer in memory
+        self._data = np.zeros(max(initial_capacity, 2), dtype=self.dtype)
+        self._size = 0
+        if spill_path is not None and os.path.exists(spill_path):
+            os.remove(spill_path)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        """
+        Description:
+            Bytes allocated for the in-memory rows.
+        """
+        return self._data.nbytes
+
+    def append(self, row):
+        """
+        Description:
+            Appends a single sample given as a tuple in dtype order.
+        """
+        if self._size == len(self._data):
+            self._make_room(1)
+        self._data[self._size] = row
+        self._size += 1
+
+    def extend(self, rows):
+        """
+        Description:
+            Appends many samples (a structured array or a list of tuples).
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        start = 0
+        while start < len(rows):
+            if self._size == len(self._data):
+                self._make_room(len(rows) - start)
+            count = min(len(rows) - start, len(self._data) - self._size)
+            self._data[self._size:self._size + count] = rows[start:start + count]
+            self._size += count
+            start += count
+
+    def view(self):
+        """
+        Description:
+            Structured view of the in-memory rows (no copy).
+        """
+        return self._data[:self._size]
+
+    def column(self, name):
+        """
+        Description:
+            View of a single column of the in-memory rows (no copy).
+        """
+        return self._data[name][:self._size]
+
+    def latest(self, name="time", default=0.0):
+        """
+        Description:
+            Most recent value of a column, or default if the store is empty.
+        """
+        if self._size == 0:
+            return default
+        return float(self._data[name][self._size - 1])
+
+    def spilled_rows(self):
+        """
+        Description:
+            Read-only memory map of the rows spilled to disk.
+        """
+        if self.spilled == 0 or self.spill_path is None:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.spill_path, dtype=self.dtype, mode="r", shape=(self.spilled,))
+
+    def chunks(self, size=None):
+        """
+        Description:
+            Yields every row, spilled ones first, as structured arrays
+            of at most size rows (default max_samples) each, so the
+            spilled history is never read into memory at once.
+        """
+        size = size or self.max_samples or max(self._size, 1)
+        spilled = self.spilled_rows()
+        for start in range(0, len(spilled), size):
+            yield spilled[start:start + size]
+        view = self.view()
+        for start in range(0, len(view), size):
+            yield view[start:start + size]
+
+    def window(self, x_low, x_high, name="time"):
+        """
+        Description:
+            Rows whose column name is between x_low and x_high, plus
+            one row either side, from the spilled and in-memory rows.
+            The column must be sorted (e.g. time). A view if the window
+            is in memory, otherwise a copy. Without a spill_path only
+            the in-memory rows are searched.
+        """
+        spilled, view = self.spilled_rows(), self.view()
+        # rows before x_low / up to x_high, counted over both parts
+        low = int(np.searchsorted(spilled[name], x_low)) + int(np.searchsorted(view[name], x_low))
+        high = (int(np.searchsorted(spilled[name], x_high, side="right"))
+                + int(np.searchsorted(view[name], x_high, side="right")))
+        start = max(low - 1, 0)
+        stop = min(high + 1, len(spilled) + len(view))
+        if start >= len(spilled):
+            return view[start - len(spilled):stop - len(spilled)]
+        return np.concatenate((spilled[start:stop], view[:max(stop - len(spilled), 0)]))
+
+    def clear(self):
+        """
+        Description:
+            Forgets every sample, keeping the allocated memory.
+        """
+        self._size = 0
+        self.spilled = 0
+        if self.spill_path is not None and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def _make_room(self, needed):
+        """
+        Description:
+            Doubles the buffer, or spills the oldest half once the
+            buffer has reached max_samples.
+        """
+        capacity = len(self._data)
+        if self.max_samples is None or capacity < self.max_samples:
+            new_capacity = max(capacity * 2, self._size + needed)
+            if self.max_samples is not None:
+                new_capacity = min(new_capacity, self.max_samples)
+            grown = np.zeros(new_capacity, dtype=self.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+            return
+        half = capacity // 2
+        if self.spill_path is not None:
+            with open(self.spill_path, "ab") as spill_file:
+                self._data[:half].tofile(spill_file)
+        self.spilled += half
+        self._data[:self._size - half] = self._data[half:self._size]
+        self._size -= half
@@ -0,0 +1,77 @@
+"""
+Description:
+------------
+    This module maps the PhageBox's millis() counter onto the host's
+    time.monotonic() clock, so samples can be stamped with the time
+    they were measured instead of the time they were read.
+
+    A sample can only arrive after it was measured, so for every
+    timestamped sample  receive_time - device_time  is an upper bound
+    of the clock offset, larger by the transfer and read delay. The
+    smallest bound seen so far is the best estimate: it is reached by
+    the samples that got through fastest, and UART queueing, USB
+    batching and a busy reader only ever make the bound larger.
+
+    Over hours the board's resonator drifts against the host clock
+    (up to ~0.5 %). When the device clock falls behind, every new bound
+    is larger than the estimate, so the estimate is moved up once the
+    samples are more than max_lag seconds late. A counter that goes
+    backwards (the board was reset) starts a new estimate.
+
+    Each host time therefore lies between receive_time - max_lag and
+    receive_time. A better estimate can only move the offset down, which
+    would stamp the next sample before the previous one, so host times
+    are held at the previous one until the device clock catches up:
+    they never go backwards, not even across a reset.
+
+Useful Methods/Classes
+----------------------
+    1. DeviceClock - device milliseconds -> host monotonic seconds.
+"""
+# standard library
+# non-standard library
+# in-house packages
+
+
+
+class DeviceClock:
+    """
+    Description:
+        Estimates the offset between the device's millis() counter and
+        time.monotonic() from the receive times of timestamped samples.
+    """
+
+    # most seconds a sample may seem to arrive late before the estimate
+    # is moved (clock drift, or a reading that was stuck in a buffer).
+    MAX_LAG = 0.5
+
+    def __init__(self, max_lag=MAX_LAG):
+        self.max_lag = max_lag
+        self.offset = None # host seconds - device seconds
+        self.last_ms = None
+        self.last_host = None
+        self.resets = 0 # times the estimate was restarted
+
+    def to_host(self, device_ms, received):
+        """
+        Description:
+            Host monotonic time at which a sample with the given device
+            timestamp (milliseconds) was measured. received is the
+            host monotonic time it was read at.
+        """
+        device_time = device_ms / 1000.0
+        bound = received - device_time
+        if self.offset is None or (self.last_ms is not None and device_ms < self.last_ms):
+            if self.offset is not None:
+                self.resets += 1
+            self.offset = bound
+        elif bound < self.offset:
+            self.offset = bound
+        elif bound - self.offset > self.max_lag:
+            self.offset = bound - self.max_lag
+        self.last_ms = device_ms
+        host = device_time + self.offset
+        if self.last_host is not None and host < self.last_host:
+            host = self.last_host
+        self.last_host = host
+        return host
@@ -0,0 +1,14 @@
+"""
+Description:
+    Puts the repository root (for src.phagebox_gui) and the flat script
+    directories on sys.path, the way the scripts import them.
+"""
+# standard library
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts" / "RE_PCR_analysis", ROOT / "scripts" / "magneto_meter_testing",
+             ROOT / "scripts" / "temperature_testing"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,70 @@
+# standard library
+import random
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+from batch_screen import screen
+from primer_index import GenomeIndex, find_products, search_primers
+from restriction_digest import RE_DB, digest
+from sequences import read_fasta, reverse_complement
+
+
+def write_genomes(directory):
+    generator = random.Random(5)
+    genomes = {"lambda": [("lambda", "".join(generator.choice("ACGT") for _ in range(8000)))],
+               "t7": [("t7", "".join(generator.choice("ACGT") for _ in range(3000))),
+                      ("t7_plasmid", "".join(generator.choice("ACGT") for _ in range(1200)))]}
+    paths = []
+    for name, records in genomes.items():
+        path = directory / f"{name}.fa"
+        path.write_text("".join(f">{record}\n{sequence}\n" for record, sequence in records))
+        paths.append(str(path))
+    lambda_sequence = genomes["lambda"][0][1]
+    pairs = [(lambda_sequence[start:start + 20], reverse_complement(lambda_sequence[start + 300:start + 320]))
+             for start in range(0, 5000, 1000)]
+    t7_sequence = genomes["t7"][0][1]
+    pairs.append((t7_sequence[100:118], reverse_complement(t7_sequence[900:918])))
+    return paths, pairs
+
+
+@pytest.fixture(scope="module")
+def screened(tmp_path_factory):
+    paths, pairs = write_genomes(tmp_path_factory.mktemp("genomes"))
+    serial = screen(paths, pairs, mismatches=1, circular=("t7",), jobs=1, chunk=2)
+    return paths, pairs, serial
+
+
+def test_pool_gives_the_same_result(screened):
+    paths, pairs, serial = screened
+    pooled = screen(paths, pairs, mismatches=1, circular=("t7",), jobs=2, chunk=4)
+    assert serial.keys() == pooled.keys()
+    for name in serial:
+        np.testing.assert_array_equal(serial[name], pooled[name], err_msg=name)
+
+
+def test_matches_screening_each_genome(screened):
+    paths, pairs, serial = screened
+    primers = [primer for pair in pairs for primer in pair]
+    for genome, path in enumerate(paths):
+        index = GenomeIndex.build(read_fasta(path))
+        hits = search_primers(index, primers, 1)
+        np.testing.assert_array_equal(serial["hits"][genome], np.bincount(hits["primer"], minlength=len(primers)))
+        products = find_products(hits, np.arange(len(primers)).reshape(-1, 2), [len(primer) for primer in primers])
+        designed = products[products["orientation"] == 1]
+        np.testing.assert_array_equal(serial["products"][genome], np.bincount(designed["pair"], minlength=len(pairs)))
+    assert serial["products"][0].tolist() == [1, 1, 1, 1, 1, 0]
+    assert serial["products"][1].tolist() == [0, 0, 0, 0, 0, 1]
+    assert serial["best_mismatches"][1].tolist() == [-1, -1, -1, -1, -1, 0]
+
+
+def test_fragments_match_digest(screened):
+    paths, pairs, serial = screened
+    lanes = digest(read_fasta(paths[0])[0][1], RE_DB)
+    counts = serial["fragment_counts"][0]
+    assert counts.tolist() == [len(lengths) for lengths in lanes.values()]
+    np.testing.assert_array_equal(serial["fragments"][:counts.sum()], np.concatenate(list(lanes.values())))
+    # every record of a genome is cut on its own
+    t7 = serial["fragments"][counts.sum():]
+    assert t7[-serial["fragment_counts"][1][-1]:].sum() == 3000 + 1200
+    assert np.all(serial["genome_lengths"] == [8000, 3000 + 1 + 1200])
@@ -0,0 +1,94 @@
+# standard library
+import math
+import random
+import struct
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.binary_protocol import (BinaryTelemetryParser, FRAME_SYNC, TAG_IDS, crc8,
+                                              encode_clock_frame, encode_frame)
+
+
+class Recorder:
+    """ parser with every sample and callback recorded """
+
+    def __init__(self):
+        self.current = [-1, -1, -1]
+        self.setpoints = [-1, -1]
+        self.samples = []
+        self.acks = []
+        self.clocks = []
+        self.parser = BinaryTelemetryParser(self.current, self.setpoints, on_sample=self.on_sample,
+                                            on_ack=self.acks.append, on_clock=self.clocks.append)
+
+    def on_sample(self):
+        self.samples.append((*self.current, *self.setpoints))
+
+
+def test_crc8_check_value():
+    # CRC-8/SMBUS (poly 0x07, init 0): check value of "123456789"
+    assert crc8(b"123456789") == 0xF4
+    assert crc8(b"") == 0
+
+
+def test_frame_round_trip_float16_and_float32():
+    generator = random.Random(0)
+    for half in (True, False):
+        recorder = Recorder()
+        expected = []
+        for _ in range(200):
+            tag_id = generator.randint(1, 5)
+            value = generator.uniform(-20.0, 120.0)
+            recorder.parser.feed(encode_frame(TAG_IDS[tag_id], value, half))
+            expected.append((tag_id, float(np.float16(value)) if half else float(np.float32(value))))
+        assert recorder.parser.frames == 200 and recorder.parser.frame_errors == 0
+        for (tag_id, value), sample in zip(expected, recorder.samples):
+            assert sample[tag_id - 1] == value # samples are (metal, front, back, front set, back set)
+
+
+def test_frame_sizes():
+    assert len(encode_frame(b"T_FRONT", 72.0)) == 5
+    assert len(encode_frame(b"T_FRONT", 72.0, half=False)) == 7
+    assert encode_frame(b"T_BACK", 1.0)[0] == FRAME_SYNC
+
+
+def test_float16_overflow_becomes_infinity():
+    recorder = Recorder()
+    recorder.parser.feed(encode_frame(b"T_METAL", 1e6) + encode_frame(b"T_BACK", -1e6))
+    assert recorder.current[0] == math.inf and recorder.current[2] == -math.inf
+
+
+def test_frames_mixed_with_text_in_any_chunking():
+    stream = (encode_frame(b"T_FRONT", 72.0) + b"<3>" + encode_clock_frame(2**32 + 5)
+              + b"T_BACK,50.00\r\n" + encode_frame(b"T_BACK_SET", 50.0, half=False)
+              + b"\nUpdating PCR..\n" + encode_frame(b"T_METAL", 25.5))
+    whole = Recorder()
+    assert whole.parser.feed(stream) == 4
+    assert whole.current == [25.5, 72.0, 50.0] and whole.setpoints == [-1, 50.0]
+    assert whole.acks == [3] and whole.clocks == [5]
+    generator = random.Random(2)
+    for _ in range(50):
+        chunked = Recorder()
+        position = 0
+        while position < len(stream):
+            size = generator.randint(1, 6)
+            chunked.parser.feed(stream[position:position + size])
+            position += size
+        assert chunked.samples == whole.samples
+        assert chunked.acks == whole.acks and chunked.clocks == whole.clocks
+
+
+def test_corrupted_frame_is_skipped():
+    broken = bytearray(encode_frame(b"T_FRONT", 80.0))
+    broken[3] ^= 0x10
+    recorder = Recorder()
+    recorder.parser.feed(encode_frame(b"T_FRONT", 70.0) + bytes(broken) + encode_frame(b"T_BACK", 60.0)
+                         + b"T_METAL,30.0\n")
+    assert recorder.parser.frame_errors == 1
+    assert recorder.current == [30.0, 70.0, 60.0]
+
+
+def test_clock_frame_payload():
+    frame = encode_clock_frame(123456789)
+    assert struct.unpack_from("<I", frame, 2)[0] == 123456789
+    assert frame[-1] == crc8(frame[1:-1])
@@ -0,0 +1,78 @@
+# standard library
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+from src.phagebox_gui.calibration import (Calibration, LinearModel, PiecewiseModel, PolynomialModel,
+                                          model_from_dict, recalibrate_log)
+from src.phagebox_gui.run_logger import RunLogger
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE
+
+RAW = np.linspace(20.0, 100.0, 81)
+
+
+@pytest.mark.parametrize("model", [
+    LinearModel(1.2, -2.0),
+    PolynomialModel([0.001, 1.05, -1.5]),
+    PiecewiseModel([20, 60, 95], [22, 70, 109]),
+])
+def test_invert_undoes_apply(model):
+    np.testing.assert_allclose(model.invert(model.apply(RAW)), RAW, atol=1e-3)
+    assert model_from_dict(model.to_dict()) == model
+
+
+def test_models_match_their_formulas():
+    np.testing.assert_allclose(LinearModel(1.2, -2.0).apply(RAW), 1.2 * RAW - 2.0)
+    np.testing.assert_allclose(PolynomialModel([0.001, 1.05, -1.5]).apply(RAW), 0.001 * RAW ** 2 + 1.05 * RAW - 1.5)
+    piecewise = PiecewiseModel([60, 20, 95], [70, 22, 109]) # sorted by raw
+    np.testing.assert_allclose(piecewise.apply([20, 40, 60, 95]), [22, 46, 70, 109])
+    # the end segments are extended, not clamped
+    np.testing.assert_allclose(piecewise.apply([10, 105]), [22 - 10 * 48 / 40, 109 + 10 * 39 / 35])
+
+
+def test_invalid_models_are_rejected():
+    with pytest.raises(ValueError):
+        PolynomialModel([1.0, 0.0, 0.0]) # x^2 turns around at 0
+    with pytest.raises(ValueError):
+        PiecewiseModel([20, 60], [50, 40])
+    with pytest.raises(ValueError):
+        PiecewiseModel([20], [22])
+    with pytest.raises(ValueError):
+        model_from_dict({"model": "spline"})
+    with pytest.raises(ValueError):
+        Calibration.from_dict({"middle": {"model": "linear"}})
+
+
+def test_per_sensor_calibration(tmp_path):
+    calibration = Calibration({"front": PolynomialModel([0.001, 1.05, -1.5]),
+                               "back": PiecewiseModel([20, 60, 95], [22, 70, 109])},
+                              default=LinearModel(1.2, -2.0))
+    path = str(tmp_path / "calibration.json")
+    calibration.save(path)
+    loaded = Calibration.load(path)
+    rows = np.zeros(len(RAW), dtype=TELEMETRY_DTYPE)
+    rows["time"] = np.arange(len(RAW))
+    for field in ("metal", "front", "back", "front_set", "back_set"):
+        rows[field] = RAW
+    calibrated = loaded.apply(rows)
+    np.testing.assert_array_equal(calibrated["time"], rows["time"])
+    np.testing.assert_allclose(calibrated["metal"], np.float32(1.2 * RAW - 2.0), rtol=1e-6)
+    # set points use the model of their sensor
+    np.testing.assert_array_equal(calibrated["front_set"], calibrated["front"])
+    np.testing.assert_array_equal(calibrated["back_set"], calibrated["back"])
+    assert loaded.to_raw("front_set", loaded.to_chip("front", 72.0)) == pytest.approx(72.0, abs=1e-3)
+    assert loaded.heaters(3) == [(1, "front"), (2, "back")]
+    assert Calibration.linear(1.2, -2.0).heaters(3) == [(3, "front")]
+
+
+def test_recalibrate_log(tmp_path):
+    path = str(tmp_path / "run.pblog")
+    logger = RunLogger(path)
+    for index, raw in enumerate(RAW):
+        logger.log((100.0 + index, raw, raw, raw, 90.0, 50.0))
+    logger.close()
+    columns = recalibrate_log(path, Calibration.linear(2.0, 1.0))
+    np.testing.assert_array_equal(columns["time"], np.arange(len(RAW)))
+    np.testing.assert_allclose(columns["front"], 2.0 * RAW + 1.0, rtol=1e-6)
+    np.testing.assert_allclose(columns["raw_front"], RAW, rtol=1e-6)
+    np.testing.assert_array_equal(columns["back_set"], 101.0)
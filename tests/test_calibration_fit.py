@@ -0,0 +1,107 @@
+# standard library
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+from src.phagebox_gui.calibration import LinearModel, PiecewiseModel, PolynomialModel
+from src.phagebox_gui.calibration_fit import (SweepAccumulator, batched_polyfit, fit_calibration, fit_model,
+                                              fit_positions, read_plotter_csv, read_sketch_log)
+
+SETPOINTS = (30.0, 50.0, 70.0, 90.0)
+
+
+def sweep(samples=40, noise=0.3, seed=0):
+    """ (set point, position, chip) rows; chip = (1 + 0.02 position) set point - position """
+    generator = np.random.default_rng(seed)
+    rows = []
+    for setpoint in SETPOINTS:
+        for position in range(4):
+            chip = (1 + 0.02 * position) * setpoint - position + generator.normal(0, noise, samples)
+            chip[:3] = 20.0 # still settling
+            rows.extend((setpoint, position, value) for value in chip)
+    return np.array(rows)
+
+
+def accumulate(rows, settle=3, chunk=None):
+    accumulator = SweepAccumulator(settle)
+    chunk = chunk or len(rows)
+    for start in range(0, len(rows), chunk):
+        part = rows[start:start + chunk]
+        for position in np.unique(part[:, 1]):
+            selected = part[part[:, 1] == position]
+            accumulator.add(selected[:, 0], str(int(position)), selected[:, 2])
+    return accumulator
+
+
+def test_position_fits_match_polyfit():
+    rows = sweep()
+    fits = fit_positions(accumulate(rows))
+    assert [fit["position"] for fit in fits] == ["0", "1", "2", "3"]
+    for fit in fits:
+        selected = rows[rows[:, 1] == int(fit["position"])]
+        steady = np.concatenate([selected[selected[:, 0] == setpoint][3:] for setpoint in SETPOINTS])
+        coefficients = np.polyfit(steady[:, 0], steady[:, 2], 1)
+        np.testing.assert_allclose(fit["coefficients"], coefficients, rtol=1e-9, atol=1e-9)
+        residual = steady[:, 2] - np.polyval(coefficients, steady[:, 0])
+        assert fit["rms"] == pytest.approx(np.sqrt(np.mean(residual ** 2)))
+        assert fit["samples"] == len(steady)
+
+
+def test_chunking_does_not_change_the_sums():
+    rows = sweep()
+    whole = accumulate(rows)
+    chunked = accumulate(rows, chunk=7)
+    order = [chunked.keys.index(key) for key in whole.keys] # groups are numbered as they are first seen
+    assert sorted(chunked.keys) == sorted(whole.keys)
+    np.testing.assert_array_equal(chunked.count[order], whole.count)
+    np.testing.assert_allclose(chunked.total[order], whole.total)
+    np.testing.assert_allclose(chunked.total_sq[order], whole.total_sq)
+
+
+def test_sensor_errors_are_skipped():
+    accumulator = SweepAccumulator(settle=0)
+    accumulator.add([50.0] * 5, "0", [49.0, -127.0, 51.0, 85.0, np.nan])
+    groups = accumulator.groups()
+    assert groups["count"].tolist() == [2] and groups["mean"].tolist() == [50.0]
+
+
+def test_batched_polyfit_matches_polyfit_per_group():
+    generator = np.random.default_rng(1)
+    group = np.repeat(np.arange(3), 20)
+    x = generator.uniform(0, 100, len(group))
+    y = 0.01 * x ** 2 + group * x + generator.normal(0, 1, len(group))
+    coefficients = batched_polyfit(group, x, y, np.ones(len(group)), 2, 4)
+    for index in range(3):
+        np.testing.assert_allclose(coefficients[index], np.polyfit(x[group == index], y[group == index], 2))
+    assert np.all(np.isnan(coefficients[3])) # no samples
+
+
+def test_fit_models_and_calibration():
+    accumulator = accumulate(sweep(noise=0.0))
+    linear = fit_model(accumulator, ["0"])
+    assert isinstance(linear, LinearModel)
+    assert (linear.slope, linear.intercept) == (pytest.approx(1.0), pytest.approx(0.0, abs=1e-9))
+    piecewise = fit_model(accumulator, ["3"], "piecewise")
+    assert isinstance(piecewise, PiecewiseModel)
+    np.testing.assert_allclose(piecewise.chip, [1.06 * setpoint - 3 for setpoint in SETPOINTS])
+    polynomial = fit_model(accumulator, None, "polynomial")
+    assert isinstance(polynomial, PolynomialModel)
+    calibration = fit_calibration(accumulator, {"front": ["1"], "back": ["2"]})
+    assert calibration.to_chip("front", 50.0) == pytest.approx(1.02 * 50 - 1)
+    assert calibration.to_chip("back_set", 50.0) == pytest.approx(1.04 * 50 - 2)
+    with pytest.raises(ValueError):
+        fit_calibration(accumulator, {"side": ["0"]})
+    with pytest.raises(ValueError):
+        fit_model(accumulator, ["7"])
+
+
+def test_readers(tmp_path):
+    plotter = tmp_path / "sweep.csv"
+    plotter.write_text("set temp,marker position,measured temperature,time,steady\n"
+                       "50,0,40.0,1.0,0\n50,0,49.5,2.0,1\n50,1,48.0,3.0,1\n")
+    chunks = [(setpoints.tolist(), position, chip.tolist()) for setpoints, position, chip in read_plotter_csv(str(plotter))]
+    assert chunks == [([50.0], "0", [49.5]), ([50.0], "1", [48.0])]
+    sketch = tmp_path / "capture.txt"
+    sketch.write_text("<Arduino is ready>\n49.0,47.5\n49.5,48.0\n")
+    chunks = [(setpoints.tolist(), position, chip.tolist()) for setpoints, position, chip in read_sketch_log(str(sketch), 50)]
+    assert chunks == [([50.0, 50.0], "front", [49.0, 49.5]), ([50.0, 50.0], "back", [47.5, 48.0])]
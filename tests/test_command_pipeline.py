@@ -0,0 +1,102 @@
+# standard library
+import threading
+# non-standard library
+import pytest
+# in-house packages
+from src.phagebox_gui.command_pipeline import ACKED, COALESCED, DROPPED, REJECTED, TIMED_OUT, CommandPipeline
+from src.phagebox_gui.commands import BACKLIGHT_TOGGLE, MAGNET_TOGGLE, expected_ack
+
+
+class Port:
+    """ records writes and signals each one """
+
+    def __init__(self):
+        self.written = []
+        self.wrote = threading.Semaphore(0)
+
+    def write(self, data):
+        self.written.append(data)
+        self.wrote.release()
+
+
+@pytest.fixture
+def port():
+    return Port()
+
+
+@pytest.fixture
+def pipeline(port):
+    pipeline = CommandPipeline(port.write, ack_timeout=0.5)
+    yield pipeline
+    pipeline.close()
+
+
+def test_expected_acks():
+    assert expected_ack(BACKLIGHT_TOGGLE) == 1
+    assert expected_ack(MAGNET_TOGGLE) == 0
+    assert expected_ack("<H,1,30,95,10,55,10,72,20>") == 30
+    assert expected_ack("<P,2>") == 2
+    assert expected_ack("<X>") is None
+
+
+def test_ack_completes_command(pipeline, port):
+    acked = []
+    command = pipeline.submit(BACKLIGHT_TOGGLE, expected_ack(BACKLIGHT_TOGGLE), on_ack=acked.append)
+    assert port.wrote.acquire(timeout=1)
+    pipeline.acknowledge(1)
+    assert command.wait(1)
+    assert command.status == ACKED and acked == [command]
+    assert command.latency is not None and pipeline.latency["B"].count == 1
+
+
+def test_mismatched_ack_is_dropped(port):
+    pipeline = CommandPipeline(port.write, ack_timeout=0.2)
+    try:
+        acked, failed = [], []
+        command = pipeline.submit(BACKLIGHT_TOGGLE, expected_ack(BACKLIGHT_TOGGLE),
+                                  on_ack=acked.append, on_fail=failed.append)
+        assert port.wrote.acquire(timeout=1)
+        # a late magnet echo must not complete the backlight toggle
+        pipeline.acknowledge(0)
+        assert not command.done() and command.ack is None
+        assert pipeline.mismatched_acks == 1
+        assert command.wait(1)
+        assert command.status == TIMED_OUT and acked == [] and failed == [command]
+    finally:
+        pipeline.close()
+
+
+def test_mismatched_ack_then_own_ack(pipeline, port):
+    command = pipeline.submit(BACKLIGHT_TOGGLE, expected_ack(BACKLIGHT_TOGGLE))
+    assert port.wrote.acquire(timeout=1)
+    pipeline.acknowledge(0)
+    pipeline.acknowledge(1)
+    assert command.wait(1) and command.status == ACKED and command.ack == 1
+
+
+def test_rejected(pipeline, port):
+    failed = []
+    command = pipeline.submit("<B,9>", on_fail=failed.append)
+    assert port.wrote.acquire(timeout=1)
+    pipeline.acknowledge(None)
+    assert command.wait(1) and command.status == REJECTED and failed == [command]
+
+
+def test_unexpected_ack(pipeline):
+    pipeline.acknowledge(1)
+    assert pipeline.unexpected_acks == 1
+
+
+def test_coalesce_and_drop(port):
+    blocked = threading.Event()
+    pipeline = CommandPipeline(lambda data: blocked.wait(), ack_timeout=0.1, max_pending=2)
+    try:
+        pipeline.submit("<X,1>")
+        # the writer holds the first command; these queue behind it
+        toggles = [pipeline.submit(MAGNET_TOGGLE, coalesce_key="magnet") for _ in range(2)]
+        assert [toggle.status for toggle in toggles] == [COALESCED, COALESCED]
+        queued = [pipeline.submit(f"<X,{value}>") for value in range(3)]
+        assert queued[-1].status == DROPPED
+    finally:
+        blocked.set()
+        pipeline.close()
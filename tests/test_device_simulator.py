@@ -0,0 +1,64 @@
+# standard library
+import time
+# non-standard library
+# in-house packages
+from src.phagebox_gui.arduino_controller import ArduinoController
+from src.phagebox_gui.binary_protocol import BINARY_F16_PROTOCOL, TEXT_PROTOCOL
+from src.phagebox_gui.command_pipeline import ACKED, TIMED_OUT
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_controller_against_the_simulator():
+    with PhageBoxSimulator(rate=200) as simulator:
+        controller = ArduinoController(simulator.port, max_baudrate=115200, device_time=True)
+        try:
+            assert controller.is_ready()
+            samples = controller.buffer_samples()
+            assert controller.commands.flush(timeout=10)
+            assert controller.protocol == BINARY_F16_PROTOCOL and simulator.protocol == BINARY_F16_PROTOCOL
+            assert controller.ser.baudrate == 115200 and simulator.timestamps
+
+            toggle = controller.toggleMagnet()
+            assert toggle.wait(5) and toggle.status == ACKED
+            assert controller.magnetOn and simulator.magnet_on
+            commands = controller.start_pcr(1, 3, 90, 2, 50, 2, 72, 2)
+            assert all(command.wait(5) and command.status == ACKED for command in commands)
+            assert wait_for(lambda: simulator.peltiers[0].cycle_count == 3)
+
+            assert wait_for(lambda: len(samples) > 100)
+            taken = [sample.monotonic for sample in list(samples)]
+            assert taken == sorted(taken)
+            assert all(sample.device_ms is not None for sample in list(samples)[-10:])
+        finally:
+            controller.stop_now()
+
+
+def test_older_firmware_keeps_the_text_protocol():
+    with PhageBoxSimulator(rate=200, binary_frames=False) as simulator:
+        controller = ArduinoController(simulator.port, max_baudrate=115200)
+        try:
+            assert controller.commands.flush(timeout=10)
+            assert controller.protocol == TEXT_PROTOCOL and controller.ser.baudrate == 9600
+            # the toggle is still acknowledged over text
+            assert controller.toggleBacklight().wait(5) and controller.backlightOn
+        finally:
+            controller.stop_now()
+
+
+def test_unanswered_toggle_does_not_change_the_state():
+    with PhageBoxSimulator(rate=50, binary_frames=False) as simulator:
+        controller = ArduinoController(simulator.port, ack_timeout=0.3, protocol=TEXT_PROTOCOL)
+        try:
+            simulator.handle_command = lambda message: None # the box stops answering
+            toggle = controller.toggleMagnet()
+            assert toggle.wait(5) and toggle.status == TIMED_OUT
+            assert not controller.magnetOn
+        finally:
+            controller.stop_now()
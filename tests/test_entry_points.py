@@ -0,0 +1,56 @@
+# standard library
+import argparse
+# non-standard library
+import pytest
+# in-house packages
+import phagebox_headless
+from src.phagebox_gui import calibration_choice
+from src.phagebox_gui.calibration_choice import (CALIBRATION_FILE, DEFAULT_INTERCEPT, DEFAULT_SLOPE,
+                                                 add_calibration_arguments, check_calibration_arguments,
+                                                 choose_calibration)
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def parse(argv):
+    parser = argparse.ArgumentParser()
+    add_calibration_arguments(parser)
+    args = parser.parse_args(argv)
+    check_calibration_arguments(parser, args)
+    return args
+
+
+def choose(argv):
+    return choose_calibration(parse(argv))
+
+
+def test_defaults_without_calibration_file(in_tmp):
+    assert choose([]) == (None, DEFAULT_SLOPE, DEFAULT_INTERCEPT)
+
+
+def test_calibration_file_is_picked_up(in_tmp):
+    (in_tmp / CALIBRATION_FILE).write_text("{}")
+    assert choose([])[0] == CALIBRATION_FILE
+
+
+def test_slope_and_intercept_win_over_calibration_file(in_tmp):
+    (in_tmp / CALIBRATION_FILE).write_text("{}")
+    assert choose(["-m", "1.5"]) == (None, 1.5, DEFAULT_INTERCEPT)
+    assert choose(["-b", "0"]) == (None, DEFAULT_SLOPE, 0.0)
+
+
+def test_calibration_with_slope_is_an_error(in_tmp):
+    with pytest.raises(SystemExit):
+        parse(["-c", "calibration.json", "-m", "1.5"])
+    assert choose(["-c", "calibration.json"])[0] == "calibration.json"
+
+
+def test_headless_uses_the_shared_rule(in_tmp):
+    assert phagebox_headless.choose_calibration is calibration_choice.choose_calibration
+    with pytest.raises(SystemExit):
+        phagebox_headless.parseArgs(["-c", "calibration.json", "-b", "0"])
+    assert choose_calibration(phagebox_headless.parseArgs(["-m", "2"])) == (None, 2.0, DEFAULT_INTERCEPT)
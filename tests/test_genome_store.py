@@ -0,0 +1,53 @@
+# standard library
+import os
+# non-standard library
+import numpy as np
+# in-house packages
+from genome_store import cache_files, load_genome
+from sequences import encode_records, read_fasta, reverse_complement
+
+RECORDS = [("chromosome", "ACGTTGCANNGGATCCAAGT" * 10), ("plasmid", "TTGACCRYAG" * 5)]
+
+
+def write_fasta(path, records):
+    with open(path, "w") as fasta_file:
+        for name, sequence in records:
+            fasta_file.write(f">{name} description\n")
+            fasta_file.writelines(sequence[line:line + 60] + "\n" for line in range(0, len(sequence), 60))
+
+
+def test_cached_genome_matches_the_fasta(tmp_path):
+    path = str(tmp_path / "phage.fa")
+    write_fasta(path, RECORDS)
+    first = load_genome(path)
+    assert all(os.path.exists(cache_path) for cache_path in cache_files(path))
+    second = load_genome(path)
+    assert isinstance(second.codes, np.memmap)
+    codes, records = encode_records(read_fasta(path))
+    for genome in (first, second):
+        np.testing.assert_array_equal(genome.codes, codes)
+        assert genome.records == records and genome.name == "phage"
+    _, start, _ = records[1]
+    assert second.sequence(start, start + 10) == "TTGACCNNAG" # ambiguity codes read as N
+    np.testing.assert_array_equal(second.record("plasmid"), second.record(1))
+
+
+def test_edited_fasta_is_encoded_again(tmp_path):
+    path = str(tmp_path / "phage.fa")
+    write_fasta(path, RECORDS)
+    load_genome(path)
+    write_fasta(path, RECORDS[:1])
+    genome = load_genome(path)
+    assert len(genome.records) == 1 and len(genome) == len(RECORDS[0][1])
+
+
+def test_reverse_complement_view(tmp_path):
+    path = str(tmp_path / "phage.fa")
+    write_fasta(path, RECORDS[:1])
+    genome = load_genome(path)
+    view = genome.reverse_complement()
+    expected = reverse_complement(RECORDS[0][1])
+    assert len(view) == len(genome) and view.sequence() == expected
+    assert view.sequence(5, 25) == expected[5:25]
+    np.testing.assert_array_equal(np.asarray(view), encode_records([("rc", expected)])[0])
+    assert view.reverse_complement() is genome
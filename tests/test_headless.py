@@ -0,0 +1,70 @@
+# standard library
+import io
+# non-standard library
+import pytest
+# in-house packages
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+from src.phagebox_gui.headless import HeadlessRunner, parse_program, read_program_file
+from src.phagebox_gui.run_logger import read_log
+
+
+HEADER = "Time,Front-temp,Front-temp Setting,Back-temp,Back-temp Setting,Metal Temp"
+
+
+def test_parse_program():
+    assert parse_program("1,32,15,90,20,50,60,72") == {
+        "peltier": 1, "cycles": 32, "d_time": 15.0, "d_temp": 90.0,
+        "a_time": 20.0, "a_temp": 50.0, "e_time": 60.0, "e_temp": 72.0}
+    assert parse_program(" 3, 2, 1.5,95 ,1,55,1,72 ")["d_time"] == 1.5
+
+
+@pytest.mark.parametrize("program", [
+    "1,32,15,90,20,50,60",         # too few values
+    "1,32,15,90,20,50,60,72,5",    # too many
+    "1,32,15,hot,20,50,60,72",     # not a number
+    "4,32,15,90,20,50,60,72",      # no such peltier
+    "",
+])
+def test_parse_program_rejects_bad_input(program):
+    with pytest.raises(ValueError):
+        parse_program(program)
+
+
+def test_read_program_file(tmp_path):
+    path = tmp_path / "programs.txt"
+    path.write_text("# front, then back\n1,32,15,90,20,50,60,72\n\n2,10,5,95,5,55,5,72  # short\n")
+    programs = read_program_file(path)
+    assert [program["peltier"] for program in programs] == [1, 2]
+    assert programs[1]["cycles"] == 10
+    path.write_text("1,32,15,90,20,50,60,72\n1,32\n")
+    with pytest.raises(ValueError):
+        read_program_file(path)
+
+
+def test_runner_streams_csv():
+    output = io.StringIO()
+    with PhageBoxSimulator(rate=200) as simulator:
+        runner = HeadlessRunner(simulator.port, y_int=0.0, slope=1.0, output=output)
+        assert runner.model.wait_until_ready()
+        runner.run([parse_program("1,2,30,90,30,50,30,72")], duration=1.5)
+        assert simulator.commands[-1] == "H,1,2,30.0,90.0,30.0,50.0,30.0,72.0"
+    lines = output.getvalue().splitlines()
+    assert lines[0] == HEADER
+    rows = [[float(value) for value in line.split(",")] for line in lines[1:]]
+    assert len(rows) > 20 and all(len(row) == 6 for row in rows)
+    times = [row[0] for row in rows]
+    assert times == sorted(times) and 0.0 <= times[0] and times[-1] < 3.0
+    # ambient readings before the program, the denature set point once it runs
+    assert rows[-1][2] == 90.0 and rows[-1][5] == 25.0
+    assert all(row[4] == 0.0 for row in rows)
+
+
+def test_runner_writes_a_run_log(tmp_path):
+    path = tmp_path / "run.pblog"
+    with PhageBoxSimulator(rate=200) as simulator:
+        runner = HeadlessRunner(simulator.port, y_int=-2.0, slope=1.2, log_file=path)
+        runner.run([], duration=1.0)
+    records = read_log(path)
+    assert len(records) > 20
+    # the run log keeps the raw readings
+    assert set(records["metal"]) == {25.0}
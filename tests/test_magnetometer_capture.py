@@ -0,0 +1,80 @@
+# standard library
+import threading
+import time
+# non-standard library
+import numpy as np
+# in-house packages
+from magnetometer_capture import MagnetometerCapture, SwitchAnnotations, TripletAssembler
+from src.phagebox_gui.run_format import load_run
+
+
+class FakeSerial:
+    """ serial port fed from the test """
+
+    def __init__(self):
+        self.chunks = []
+        self.lock = threading.Lock()
+
+    def feed(self, data):
+        with self.lock:
+            self.chunks.append(data)
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def read(self, size):
+        with self.lock:
+            if self.chunks:
+                return self.chunks.pop(0)
+        time.sleep(0.001)
+        return b""
+
+    def close(self):
+        pass
+
+
+def test_assembler_completes_triplets_across_reads():
+    assembler = TripletAssembler()
+    assert assembler.feed(b"x:1.5\ny:2", 1.0) == []
+    assert assembler.feed(b".5\nz:-3\nx:4\n", 2.0) == [(2.0, 1.5, 2.5, -3.0)]
+    assert assembler.feed(b"y:5\nhello\nz:6\n", 3.0) == [(3.0, 4.0, 5.0, 6.0)]
+    assert assembler.other == 1
+
+
+def test_assembler_drops_partial_triplets():
+    assembler = TripletAssembler()
+    completed = assembler.feed(b"x:1\ny:2\nx:3\ny:4\nz:5\nz:6\nx:7\ny:8\nz:9\n", 0.5)
+    assert completed == [(0.5, 3.0, 4.0, 5.0), (0.5, 7.0, 8.0, 9.0)]
+    assert assembler.partial == 1 and assembler.triplets == 2
+
+
+def test_switch_events_share_the_triplet_clock(tmp_path):
+    serial = FakeSerial()
+    annotations = SwitchAnnotations()
+    capture = MagnetometerCapture("fake", path=str(tmp_path / "capture.pbrun"), annotations=annotations,
+                                  serial=serial).start()
+    serial.feed(b"x:1\ny:1\nz:1\n")
+    time.sleep(0.05)
+    event = annotations.set("ON")
+    time.sleep(0.05)
+    serial.feed(b"x:2\ny:2\nz:2\n")
+    time.sleep(0.05)
+    columns = capture.stop()
+    np.testing.assert_array_equal(columns["switch"], [-1, 0])
+    # seconds since the capture started, between the two triplets
+    assert columns["time"][0] < event["time"] < columns["time"][1] < 1.0
+    columns, metadata = load_run(str(tmp_path / "capture.pbrun"))
+    assert metadata["switch_events"] == [event]
+
+
+def test_csv_capture_writes_switch_times_since_start(tmp_path):
+    serial = FakeSerial()
+    path = str(tmp_path / "capture.csv")
+    capture = MagnetometerCapture("fake", path=path, serial=serial).start()
+    capture.annotations.set("OFF", timestamp=1.25)
+    serial.feed(b"x:1\ny:2\nz:3\n")
+    time.sleep(0.05)
+    capture.stop()
+    with open(path + ".switches.csv") as switch_file:
+        assert switch_file.read() == "switch,time,label\n0,1.2500,OFF\n"
@@ -0,0 +1,61 @@
+# standard library
+import asyncio
+import time
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+from src.phagebox_gui.multibox import MultiBoxController
+
+
+def test_toggles_follow_the_acknowledgement():
+    async def run(ports):
+        async with MultiBoxController(ports) as boxes:
+            assert await boxes[0].toggleMagnet()
+            assert await boxes[1].toggleBacklight()
+            assert await boxes[1].toggleBacklight()
+            assert await boxes[0].start_pcr(1, 2, 90, 1, 50, 1, 72, 1)
+            assert await boxes.toggleMagnet(1) and await boxes.toggleMagnet(1)
+            assert await boxes.start_pcr(1, 2, 2, 90, 1, 50, 1, 72, 1) is True
+            await asyncio.sleep(0.3)
+            return boxes
+
+    with PhageBoxSimulator(rate=100) as first, PhageBoxSimulator(rate=100) as second:
+        start = time.monotonic()
+        boxes = asyncio.run(run([first.port, second.port]))
+        elapsed = time.monotonic() - start
+        assert first.magnet_on and not second.led_on
+    assert boxes[0].magnetOn and not boxes[0].backlightOn
+    assert not boxes[1].magnetOn and not boxes[1].backlightOn
+    assert boxes[0].timed_out == boxes[1].timed_out == 0
+    rows = boxes.store.view()
+    assert set(np.unique(rows["box"])) == {0, 1}
+    # monotonic seconds since open(), not wall-clock times
+    assert 0 <= rows["time"].min() and rows["time"].max() <= elapsed
+    assert boxes.store.max_samples == MultiBoxController.MAX_HISTORY
+
+
+def test_unanswered_toggle_leaves_the_state_alone():
+    async def run(port):
+        async with MultiBoxController([port], ack_timeout=0.2) as boxes:
+            simulator.handle_command = lambda message: None # the box stops answering
+            acked = await boxes.toggleMagnet(0)
+            return boxes, acked
+
+    with PhageBoxSimulator(rate=100) as simulator:
+        boxes, acked = asyncio.run(run(simulator.port))
+    assert not acked and not boxes[0].magnetOn and boxes[0].timed_out == 1
+
+
+def test_stale_acknowledgement_is_dropped():
+    async def run(port):
+        async with MultiBoxController([port], ack_timeout=0.2) as boxes:
+            box = boxes[0]
+            simulator.handle_command = lambda message: simulator.write(b"<0>") # magnet's echo, never the light's
+            acked = await box.toggleBacklight()
+            return box, acked
+
+    with PhageBoxSimulator(rate=100) as simulator:
+        box, acked = asyncio.run(run(simulator.port))
+    assert not acked and not box.backlightOn
+    assert box.mismatched_acks == 1 and box.timed_out == 1
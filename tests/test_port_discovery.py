@@ -0,0 +1,98 @@
+# standard library
+import os
+import threading
+import tty
+# non-standard library
+import pytest
+# in-house packages
+from src.phagebox_gui.binary_protocol import encode_clock_frame, encode_frame
+from src.phagebox_gui.device_simulator import PhageBoxSimulator
+from src.phagebox_gui.port_discovery import discover_phageboxes, is_phagebox_output, probe_port
+
+
+# what another serial device might send: echoes, sync bytes with tag ids, broken frames and lines
+NOISE = (b"<0>\xa5\x02garbage\r\n<1>\xa5\x81\x00\x00\x00T_FRONT,\r\nT_BACKx,12.5\n"
+         + encode_frame(b"T_FRONT", 72.0)[:-1] + b"\x00\xa5")
+
+
+class NoisyPort:
+    """ a pty sending NOISE over and over and echoing '<0>' to everything it receives """
+
+    def __init__(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def run(self):
+        os.set_blocking(self.master_fd, False)
+        while not self.stop_event.wait(0.02):
+            try:
+                if os.read(self.master_fd, 4096):
+                    os.write(self.master_fd, b"<0>")
+            except BlockingIOError:
+                pass
+            os.write(self.master_fd, NOISE)
+
+
+@pytest.mark.parametrize("data", [
+    b"<Arduino is ready>\r\n",
+    b"T_FRONT,72.00\n",
+    b"<3>T_BACK_SET,-1.5\r\n",
+    b"junk\xa5" + encode_frame(b"T_BACK", 40.0, half=False),
+    encode_frame(b"T_METAL", 25.0),
+    b"WRONG SERIAL MSG.",
+])
+def test_phagebox_output(data):
+    assert is_phagebox_output(data)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"<0>",
+    b"\xa5\x02",
+    b"\xa5\x81\x00\x00\x00",
+    encode_frame(b"T_FRONT", 72.0)[:-1] + b"\x00", # bad CRC
+    encode_clock_frame(1000), # timestamps alone are not telemetry
+    b"T_FRONT,72.00", # no end of line yet
+    b"T_FRONT,hot\n",
+    NOISE * 3,
+])
+def test_not_phagebox_output(data):
+    assert not is_phagebox_output(data)
+
+
+def test_probe_finds_the_simulator():
+    with PhageBoxSimulator(rate=20) as simulator:
+        assert probe_port(simulator.port, timeout=2.0)
+
+
+def test_probe_pings_an_idle_box():
+    # opening the port flushes the banner the simulator printed at start,
+    # like a box that has been up for a while and says nothing
+    with PhageBoxSimulator(report_idle=False) as simulator:
+        assert probe_port(simulator.port, timeout=1.0)
+        assert simulator.commands == ["?"]
+        assert not simulator.led_on and not simulator.magnet_on
+
+
+def test_probe_rejects_noise():
+    with NoisyPort() as noisy:
+        assert not probe_port(noisy.port, timeout=1.0)
+
+
+def test_discover_only_returns_phageboxes(tmp_path):
+    with PhageBoxSimulator(rate=20) as simulator, NoisyPort() as noisy:
+        missing = str(tmp_path / "ttyMISSING")
+        assert discover_phageboxes([noisy.port, missing, simulator.port], timeout=1.0) == [simulator.port]
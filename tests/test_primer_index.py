@@ -0,0 +1,118 @@
+# standard library
+import random
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+from primer_index import GenomeIndex, find_products, screen_genome, search_primers
+from sequences import reverse_complement
+
+
+def random_records(seed=0):
+    generator = random.Random(seed)
+    records = []
+    for name, length in (("chromosome", 6000), ("plasmid", 1500)):
+        sequence = list("".join(generator.choice("ACGT") for _ in range(length)))
+        for position in generator.sample(range(length), 20): # unknown bases never match
+            sequence[position] = "N"
+        records.append((name, "".join(sequence)))
+    return records
+
+
+def mutate(sequence, changes, generator):
+    sequence = list(sequence)
+    for position in generator.sample(range(len(sequence)), changes):
+        sequence[position] = generator.choice([base for base in "ACGT" if base != sequence[position]])
+    return "".join(sequence)
+
+
+def make_primers(records, seed=1):
+    """ primers taken from the genome (either strand, some mutated) and a few random ones """
+    generator = random.Random(seed)
+    primers = []
+    for length in (12, 18, 20, 25, 32, 36):
+        for _ in range(3):
+            name, sequence = generator.choice(records)
+            start = generator.randrange(len(sequence) - length)
+            primer = sequence[start:start + length].replace("N", "A")
+            if generator.random() < 0.5:
+                primer = reverse_complement(primer)
+            primers.append(mutate(primer, generator.randint(0, 2), generator))
+        primers.append("".join(generator.choice("ACGT") for _ in range(length)))
+    return primers
+
+
+def brute_force_hits(records, primers, max_mismatches):
+    """ {(primer, strand, record, start, mismatches)} by comparing every position """
+    hits = set()
+    for number, primer in enumerate(primers):
+        for strand, query in ((1, primer), (-1, reverse_complement(primer))):
+            for record, (_, sequence) in enumerate(records):
+                for start in range(len(sequence) - len(query) + 1):
+                    mismatches = sum(base != expected for base, expected in zip(sequence[start:start + len(query)], query))
+                    if mismatches <= max_mismatches:
+                        hits.add((number, strand, record, start, mismatches))
+    return hits
+
+
+def as_set(hits):
+    return {(int(hit["primer"]), int(hit["strand"]), int(hit["record"]), int(hit["start"]), int(hit["mismatches"]))
+            for hit in hits}
+
+
+@pytest.mark.parametrize("max_mismatches", [0, 1, 2])
+def test_search_matches_brute_force(max_mismatches):
+    records = random_records()
+    primers = make_primers(records)
+    index = GenomeIndex.build(records, k=8)
+    hits = search_primers(index, primers, max_mismatches)
+    assert as_set(hits) == brute_force_hits(records, primers, max_mismatches)
+    assert len(hits) == len(as_set(hits)) # each site once
+    order = np.lexsort((hits["start"], hits["record"], -hits["strand"], hits["primer"]))
+    np.testing.assert_array_equal(order, np.arange(len(hits)))
+
+
+def test_products_match_brute_force():
+    records = random_records(seed=2)
+    chromosome = records[0][1]
+    # a designed product, plus primers that also bind in the other orientation
+    forward, reverse = chromosome[1000:1020], reverse_complement(chromosome[1400:1420])
+    pairs = [(forward, reverse), (reverse, forward), (chromosome[3000:3018], reverse_complement(chromosome[200:218]))]
+    primers = [primer for pair in pairs for primer in pair]
+    index = GenomeIndex.build(records, k=8)
+    hits = search_primers(index, primers, 1)
+    products = find_products(hits, np.arange(len(primers)).reshape(-1, 2), [len(primer) for primer in primers], 1000)
+
+    expected = set()
+    for pair in range(len(pairs)):
+        for orientation, (left, right) in ((1, (2 * pair, 2 * pair + 1)), (-1, (2 * pair + 1, 2 * pair))):
+            for _, l_strand, l_record, l_start, l_mismatches in (hit for hit in as_set(hits) if hit[0] == left):
+                for _, r_strand, r_record, r_start, r_mismatches in (hit for hit in as_set(hits) if hit[0] == right):
+                    end = r_start + len(primers[right])
+                    if (l_strand, r_strand) == (1, -1) and l_record == r_record and l_start <= r_start \
+                            and end - l_start <= 1000:
+                        expected.add((pair, orientation, l_record, l_start, end, end - l_start,
+                                      l_mismatches + r_mismatches))
+    found = {tuple(int(product[field]) for field in product.dtype.names) for product in products}
+    assert found == expected
+    assert (0, 1, 0, 1000, 1420, 420, 0) in found and (1, -1, 0, 1000, 1420, 420, 0) in found
+
+
+def test_cached_index_gives_the_same_hits(tmp_path):
+    records = random_records(seed=3)
+    fasta = tmp_path / "genome.fa"
+    fasta.write_text("".join(f">{name} test\n{sequence}\n" for name, sequence in records))
+    primers = make_primers(records, seed=4)
+    built = search_primers(GenomeIndex.build(records), primers, 1)
+    GenomeIndex.cached(str(fasta)) # builds the cache
+    cached = GenomeIndex.cached(str(fasta))
+    assert isinstance(cached.kmers, np.memmap)
+    np.testing.assert_array_equal(search_primers(cached, primers, 1), built)
+    hits, products = screen_genome(str(fasta), [(primers[0], primers[1])], 1)
+    np.testing.assert_array_equal(hits, search_primers(cached, primers[:2], 1))
+
+
+def test_too_many_mismatches_for_the_length():
+    index = GenomeIndex.build([("genome", "ACGTACGTAC")], k=4)
+    with pytest.raises(ValueError):
+        search_primers(index, ["ACG"], 3)
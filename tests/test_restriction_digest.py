@@ -0,0 +1,88 @@
+# standard library
+import random
+import re
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+import restriction_digest
+from restriction_digest import IUPAC, RE_DB, Enzyme, digest, find_sites, fragment_lengths
+from sequences import reverse_complement
+
+TABLE = dict(RE_DB, BsaI="GGTCTC(1/5)", BsiHKAI="GWGCW^C", AcuI="CTGAAG(16/14)", Sau3AI="^GATC")
+
+
+def random_genome(length, seed):
+    generator = random.Random(seed)
+    genome = "".join(generator.choice("ACGT") for _ in range(length))
+    # plant sites, some across the origin, and a few unknown bases
+    for site in ("GGATCC", "GAATTC", "GGTCTC", "GAGACC", "CTGAAG", "AGCTGC"):
+        for _ in range(5):
+            position = generator.randrange(length - len(site))
+            genome = genome[:position] + site + genome[position + len(site):]
+    genome = "GACC" + genome[4:-2] + "GA" # GGTCTC's reverse complement GAGACC spans the origin
+    return genome[:100] + "NN" + genome[102:]
+
+
+def regex_sites(genome, enzymes, circular):
+    """ {(enzyme, strand, start)} found with a regular expression per site """
+    found = set()
+    for number, enzyme in enumerate(enzymes):
+        strands = [(1, enzyme.site)]
+        if not enzyme.palindromic:
+            strands.append((-1, reverse_complement(enzyme.site)))
+        for strand, site in strands:
+            pattern = re.compile("(?=" + "".join(f"[{IUPAC[letter]}]" for letter in site) + ")")
+            text = genome + genome[:len(site) - 1] if circular else genome
+            found.update((number, strand, match.start()) for match in pattern.finditer(text)
+                         if match.start() < len(genome))
+    return found
+
+
+@pytest.mark.parametrize("circular", [False, True])
+@pytest.mark.parametrize("block", [7, 1 << 20])
+def test_sites_match_a_regex_scan(monkeypatch, circular, block):
+    monkeypatch.setattr(restriction_digest, "SCAN_BLOCK", block)
+    genome = random_genome(3000, seed=block)
+    enzymes = [Enzyme(name, site) for name, site in TABLE.items()]
+    sites = find_sites(genome, enzymes, circular)
+    assert {(int(site["enzyme"]), int(site["strand"]), int(site["start"])) for site in sites} \
+        == regex_sites(genome, enzymes, circular)
+    assert np.all(np.diff(sites["cut"]) >= 0)
+    bsai = list(TABLE).index("BsaI")
+    assert circular == bool(np.any((sites["enzyme"] == bsai) & (sites["start"] == len(genome) - 2)))
+
+
+def test_cut_positions():
+    enzymes = [Enzyme("EcoRI", "G^AATTC"), Enzyme("BsaI", "GGTCTC(1/5)")]
+    assert (enzymes[0].cut, enzymes[0].bottom_cut, enzymes[0].palindromic) == (1, 5, True)
+    assert (enzymes[1].cut, enzymes[1].bottom_cut, enzymes[1].palindromic) == (7, 11, False)
+    sites = find_sites("AAGAATTCAAGGTCTCAAAAAAAAAAGAGACCAA", enzymes)
+    rows = [(int(site["enzyme"]), int(site["strand"]), int(site["start"]), int(site["cut"]), int(site["bottom_cut"]))
+            for site in sites]
+    # the bottom strand BsaI site (GAGACC at 26) cuts the top strand 5 bases and
+    # the bottom strand 1 base before it; sites are sorted by cut
+    assert rows == [(0, 1, 2, 3, 7), (1, 1, 10, 17, 21), (1, -1, 26, 21, 25)]
+
+
+def test_fragments_cover_the_genome():
+    genome = random_genome(5000, seed=3)
+    for circular in (False, True):
+        lanes = digest(genome, RE_DB, circular)
+        assert set(lanes) == set(RE_DB) | {"all"}
+        for lengths in lanes.values():
+            assert lengths.sum() == len(genome) and np.all(lengths > 0)
+        sites = find_sites(genome, RE_DB, circular)
+        assert len(lanes["all"]) == len(np.unique(sites["cut"])) + (0 if circular else 1)
+    assert fragment_lengths(np.zeros(0, dtype=restriction_digest.SITE_DTYPE), 100, circular=True).tolist() == [100]
+
+
+def test_short_circular_genome():
+    # a site longer than half the genome still wraps around it
+    sites = find_sites("ATTCGA", {"EcoRI": "G^AATTC"}, circular=True)
+    assert sites["start"].tolist() == [4] and sites["cut"].tolist() == [5]
+
+
+def test_invalid_site():
+    with pytest.raises(ValueError):
+        Enzyme("bad", "GAXTC")
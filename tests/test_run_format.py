@@ -0,0 +1,44 @@
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.run_format import load_run, read_header, save_csv, save_run
+
+
+def overnight_columns(rows=1000):
+    time = 30 * 3600 + np.arange(rows) * 0.1 # 30 h into a run, 10 samples/s
+    return {"time": time,
+            "front": np.linspace(20, 95, rows).astype(np.float32),
+            "switch": np.arange(rows, dtype=np.int16) % 2}
+
+
+def test_run_round_trip(tmp_path):
+    columns = overnight_columns()
+    path = tmp_path / "run.pbrun"
+    save_run(path, columns, {"port": "/dev/null"})
+    for mmap in (True, False):
+        loaded, metadata = load_run(path, mmap=mmap)
+        assert metadata == {"port": "/dev/null"}
+        for name, column in columns.items():
+            assert loaded[name].dtype == column.dtype
+            np.testing.assert_array_equal(loaded[name], column)
+    assert read_header(path)["length"] == 1000
+
+
+def test_empty_run(tmp_path):
+    save_run(tmp_path / "empty.pbrun", {"time": np.zeros(0)})
+    loaded, _ = load_run(tmp_path / "empty.pbrun")
+    assert len(loaded["time"]) == 0
+
+
+def test_csv_keeps_time_resolution(tmp_path):
+    columns = overnight_columns()
+    path = tmp_path / "run.csv"
+    save_csv(path, columns, names=["Time", "Front-temp", "Switch"])
+    with open(path) as csv_file:
+        assert csv_file.readline().strip() == "Time,Front-temp,Switch"
+    loaded = np.loadtxt(path, delimiter=",", skiprows=1)
+    # no duplicate timestamps 30 h into the run
+    assert len(np.unique(loaded[:, 0])) == len(loaded)
+    np.testing.assert_allclose(loaded[:, 0], columns["time"], atol=5e-4)
+    np.testing.assert_allclose(loaded[:, 1], columns["front"], atol=5e-5)
+    np.testing.assert_array_equal(loaded[:, 2], columns["switch"])
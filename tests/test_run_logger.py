@@ -0,0 +1,77 @@
+# standard library
+import os
+import threading
+# non-standard library
+import numpy as np
+import pytest
+# in-house packages
+from src.phagebox_gui.run_logger import HEADER_SIZE, RunLogger, read_log
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE
+
+
+def rows(start, count):
+    return [(float(index), 20.0 + index, 30.0, 40.0, 50.0, 60.0) for index in range(start, start + count)]
+
+
+class StalledLogger(RunLogger):
+    """ a RunLogger whose writer thread takes nothing off the queue until resume is set """
+
+    def __init__(self, *args, **kwargs):
+        self.resume = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def next_batch(self):
+        self.resume.wait()
+        return super().next_batch()
+
+
+def test_torn_record_is_ignored(tmp_path):
+    path = tmp_path / "run.pblog"
+    logger = RunLogger(path, batch_size=16)
+    for row in rows(0, 100):
+        assert logger.log(row)
+    assert logger.flush()
+    # a crash while the writer was half way through the next record
+    size = HEADER_SIZE + 100 * TELEMETRY_DTYPE.itemsize
+    assert os.path.getsize(path) == size
+    with open(path, "ab") as log_file:
+        log_file.write(np.array(rows(100, 1), dtype=TELEMETRY_DTYPE).tobytes()[:TELEMETRY_DTYPE.itemsize // 2])
+    records = read_log(path)
+    assert len(records) == 100
+    assert np.array_equal(records, np.array(rows(0, 100), dtype=TELEMETRY_DTYPE))
+    logger.close()
+
+
+def test_truncated_log_keeps_the_complete_records(tmp_path):
+    path = tmp_path / "run.pblog"
+    logger = RunLogger(path)
+    for row in rows(0, 50):
+        logger.log(row)
+    logger.close()
+    os.truncate(path, HEADER_SIZE + 30 * TELEMETRY_DTYPE.itemsize + 7)
+    records = read_log(path)
+    assert np.array_equal(records, np.array(rows(0, 30), dtype=TELEMETRY_DTYPE))
+    os.truncate(path, HEADER_SIZE + 3)
+    assert len(read_log(path)) == 0
+
+
+def test_full_queue_drops_rows(tmp_path):
+    path = tmp_path / "run.pblog"
+    logger = StalledLogger(path, max_queue=8)
+    accepted = [logger.log(row) for row in rows(0, 12)]
+    assert accepted == [True] * 8 + [False] * 4
+    assert logger.rows_logged == 8 and logger.rows_dropped == 4
+    logger.resume.set()
+    assert logger.flush()
+    # the queue has room again
+    assert logger.log(rows(12, 1)[0])
+    logger.close()
+    expected = rows(0, 8) + rows(12, 1)
+    assert np.array_equal(read_log(path), np.array(expected, dtype=TELEMETRY_DTYPE))
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "run.pblog"
+    path.write_bytes(b"not a log" + b" " * HEADER_SIZE)
+    with pytest.raises(ValueError):
+        read_log(path)
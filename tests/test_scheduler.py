@@ -0,0 +1,109 @@
+# in-house packages
+from src.phagebox_gui.scheduler import Scheduler
+
+
+class FakeTimers:
+    """ a manual clock and after(): advance() fires the timers that are due """
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = [] # (fire time, function)
+
+    def clock(self):
+        return self.now
+
+    def after(self, milliseconds, function):
+        self.timers.append((self.now + milliseconds / 1000, function))
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while self.timers and min(self.timers, key=lambda timer: timer[0])[0] <= end:
+            timer = min(self.timers, key=lambda timer: timer[0])
+            self.timers.remove(timer)
+            self.now = max(self.now, timer[0])
+            timer[1]()
+        self.now = end
+
+    def fire_early(self, seconds):
+        """
+        fires the next timer seconds before it is due, like a Tk timer
+        after the wall clock jumped forward.
+        """
+        timer = min(self.timers, key=lambda timer: timer[0])
+        self.timers.remove(timer)
+        self.now = timer[0] - seconds
+        timer[1]()
+
+
+def make_scheduler(timers):
+    return Scheduler(timers.after, clock=timers.clock)
+
+
+def test_runs_tasks_at_their_rates():
+    timers = FakeTimers()
+    scheduler = make_scheduler(timers)
+    runs = {"fast": 0, "slow": 0}
+    scheduler.add("fast", 0.1, lambda: runs.__setitem__("fast", runs["fast"] + 1))
+    scheduler.add("slow", 0.5, lambda: runs.__setitem__("slow", runs["slow"] + 1))
+    scheduler.start()
+    timers.advance(1.05)
+    assert runs == {"fast": 10, "slow": 2}
+
+
+def test_early_timer_rearms():
+    timers = FakeTimers()
+    scheduler = make_scheduler(timers)
+    runs = []
+    scheduler.add("capture", 1.0, lambda: runs.append(timers.now))
+    scheduler.start()
+    timers.fire_early(0.5)
+    assert runs == []
+    # the early tick re-armed the timer, so capture carries on
+    assert len(timers.timers) == 1
+    timers.advance(5.0)
+    assert len(runs) == 5
+
+
+def test_stale_timer_is_ignored():
+    timers = FakeTimers()
+    scheduler = make_scheduler(timers)
+    runs = []
+    scheduler.add("slow", 5.0, lambda: runs.append("slow"))
+    scheduler.start()
+    scheduler.add("fast", 1.0, lambda: runs.append("fast"))
+    assert len(timers.timers) == 2
+    timers.advance(5.0)
+    assert runs.count("fast") == 5 and runs.count("slow") == 1
+    # the replaced 5 s timer did not tick on its own
+    assert scheduler.ticks <= 6 and len(timers.timers) == 1
+
+
+def test_raising_callback_keeps_scheduler_alive(capsys):
+    timers = FakeTimers()
+    scheduler = make_scheduler(timers)
+    runs = []
+
+    def broken():
+        raise RuntimeError("plot failed")
+
+    scheduler.add("plot", 0.1, broken)
+    scheduler.add("capture", 0.1, lambda: runs.append(timers.now))
+    scheduler.start()
+    timers.advance(1.05)
+    assert len(runs) == 10
+    assert scheduler.metrics()["plot"]["errors"] == 10
+    output = capsys.readouterr()
+    assert "plot failed" in output.out + output.err
+
+
+def test_missed_ticks_are_dropped():
+    timers = FakeTimers()
+    scheduler = make_scheduler(timers)
+    runs = []
+    scheduler.add("capture", 0.1, lambda: runs.append(timers.now))
+    scheduler.start()
+    timers.timers.clear()
+    timers.now = 1.05
+    scheduler.tick()
+    assert len(runs) == 1
+    assert scheduler.metrics()["capture"]["missed"] == 9
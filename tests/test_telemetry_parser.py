@@ -0,0 +1,73 @@
+# standard library
+import random
+# non-standard library
+# in-house packages
+from src.phagebox_gui.telemetry_parser import MAX_PENDING, TelemetryParser
+
+
+class Recorder:
+    """ parser with every callback recorded """
+
+    def __init__(self):
+        self.current = [-1, -1, -1]
+        self.setpoints = [-1, -1]
+        self.samples = []
+        self.acks = []
+        self.clocks = []
+        self.unknown = []
+        self.parser = TelemetryParser(self.current, self.setpoints, on_unknown=self.unknown.append,
+                                      on_sample=self.on_sample, on_ack=self.acks.append,
+                                      on_clock=self.clocks.append)
+
+    def on_sample(self):
+        self.samples.append((*self.current, *self.setpoints))
+
+
+STREAM = (b"<Arduino is ready>\r\n"
+          b"T_METAL,25.50\r\nT_FRONT,72.00\r\nT_BACK,71.25\r\n"
+          b"T_MILLIS,123456\r\n"
+          b"T_FRONT_SET,72.00\r\nT_BACK_SET,50.00\r\n"
+          b"\nUpdating PCR..\n<3>T_FRONT,90.50\r\n"
+          b"WRONG SERIAL MSG.T_BACK,-1.5\r\n"
+          b"T_FRONT,not a number\r\n")
+
+
+def test_parses_tags_acks_and_clock():
+    recorder = Recorder()
+    assert recorder.parser.feed(STREAM) == 7
+    assert recorder.current == [25.5, 90.5, -1.5]
+    assert recorder.setpoints == [72.0, 50.0]
+    assert recorder.acks == [3, None]
+    assert recorder.clocks == [123456]
+    assert recorder.unknown == [b"<Arduino is ready>\r", b"Updating PCR..", b"T_FRONT,not a number\r"]
+
+
+def test_any_chunking_gives_the_same_result():
+    whole = Recorder()
+    whole.parser.feed(STREAM)
+    generator = random.Random(1)
+    for _ in range(50):
+        chunked = Recorder()
+        position = 0
+        while position < len(STREAM):
+            size = generator.randint(1, 12)
+            chunked.parser.feed(bytearray(STREAM[position:position + size]))
+            position += size
+        assert chunked.samples == whole.samples
+        assert chunked.acks == whole.acks and chunked.clocks == whole.clocks
+
+
+def test_echo_without_newline_is_reported_right_away():
+    recorder = Recorder()
+    recorder.parser.feed(b"T_FRONT,70.0\n<1>")
+    assert recorder.acks == [1]
+    recorder.parser.feed(b"T_BACK,60.0\n")
+    assert recorder.current == [-1, 70.0, 60.0] and recorder.acks == [1]
+
+
+def test_long_noise_without_newline_is_dropped():
+    recorder = Recorder()
+    recorder.parser.feed(b"x" * (MAX_PENDING + 1))
+    assert recorder.parser.pending == b""
+    recorder.parser.feed(b"T_METAL,30.0\n")
+    assert recorder.current[0] == 30.0 and recorder.unknown == []
@@ -0,0 +1,93 @@
+# standard library
+# non-standard library
+import numpy as np
+# in-house packages
+from src.phagebox_gui.decimation import MinMaxDecimator, decimate_window
+from src.phagebox_gui.telemetry_store import TELEMETRY_DTYPE, TEMPERATURE_FIELDS, TelemetryStore
+
+
+def make_rows(count, start=0):
+    rows = np.zeros(count, dtype=TELEMETRY_DTYPE)
+    rows["time"] = np.arange(start, start + count) * 0.1
+    for offset, field in enumerate(TEMPERATURE_FIELDS):
+        rows[field] = np.sin(np.arange(start, start + count) * 0.01 + offset)
+    return rows
+
+
+def test_grows_past_initial_capacity():
+    store = TelemetryStore(initial_capacity=4)
+    rows = make_rows(100)
+    for row in rows[:10]:
+        store.append(row)
+    store.extend(rows[10:])
+    assert len(store) == 100 and store.spilled == 0
+    np.testing.assert_array_equal(store.view(), rows)
+    assert store.latest() == rows["time"][-1]
+
+
+def test_bounded_store_spills_oldest_rows(tmp_path):
+    spill_path = tmp_path / "run.spill"
+    store = TelemetryStore(initial_capacity=16, max_samples=64, spill_path=str(spill_path))
+    rows = make_rows(1000)
+    store.extend(rows[:500])
+    store.extend(rows[500:])
+    assert len(store) <= 64 and store.spilled + len(store) == 1000
+    np.testing.assert_array_equal(store.spilled_rows(), rows[:store.spilled])
+    np.testing.assert_array_equal(store.view(), rows[store.spilled:])
+    np.testing.assert_array_equal(np.concatenate(list(store.chunks(100))), rows)
+    store.clear()
+    assert not spill_path.exists() and len(store) == 0
+
+
+def test_stale_spill_file_is_removed(tmp_path):
+    spill_path = tmp_path / "run.spill"
+    spill_path.write_bytes(b"left over from an earlier run")
+    store = TelemetryStore(max_samples=8, spill_path=str(spill_path))
+    rows = make_rows(20)
+    store.extend(rows)
+    np.testing.assert_array_equal(store.spilled_rows(), rows[:store.spilled])
+
+
+def test_window_reaches_spilled_rows(tmp_path):
+    store = TelemetryStore(max_samples=64, spill_path=str(tmp_path / "run.spill"))
+    rows = make_rows(1000)
+    store.extend(rows)
+    for first, last in ((0, 10), (100, 990), (store.spilled - 3, store.spilled + 3), (990, 999)):
+        window = store.window(rows["time"][first], rows["time"][last])
+        np.testing.assert_array_equal(window, rows[max(first - 1, 0):last + 2])
+    assert len(store.window(1e6, 2e6)) == 1 # the last row, so lines reach the edge
+
+
+def test_decimate_window_covers_spilled_history(tmp_path):
+    store = TelemetryStore(max_samples=64, spill_path=str(tmp_path / "run.spill"))
+    rows = make_rows(10000)
+    store.extend(rows)
+    data = decimate_window(store, ["metal"], 0.0, rows["time"][-1], buckets=50)
+    x, y = data["metal"]
+    assert x[0] == rows["time"][0] and x[-1] == rows["time"][-1]
+    assert y.min() == rows["metal"].min() and y.max() == rows["metal"].max()
+    # a short window is returned at full resolution
+    x, y = decimate_window(store, ["metal"], 10.0, 12.0, buckets=50)["metal"]
+    np.testing.assert_array_equal(x, rows["time"][99:122])
+
+
+def test_decimator_rebuild_includes_spilled_rows(tmp_path):
+    store = TelemetryStore(max_samples=64, spill_path=str(tmp_path / "run.spill"))
+    rows = make_rows(5000)
+    store.extend(rows[:3000])
+    decimator = MinMaxDecimator(["front"])
+    decimator.set_resolution(store, 0.0, 10.0)
+    store.extend(rows[3000:])
+    decimator.update(store)
+    width_ids = (rows["time"] // 10.0).astype(np.int64)
+    np.testing.assert_array_equal(decimator.ids, np.unique(width_ids))
+    expected = [rows["front"][width_ids == bucket].max() for bucket in decimator.ids]
+    np.testing.assert_array_equal(decimator.maxs[0], expected)
+    assert decimator.first[0] == 0.0 and decimator.last[-1] == rows["time"][-1]
+
+
+def test_window_without_spill_file_searches_memory():
+    store = TelemetryStore(max_samples=64)
+    rows = make_rows(1000)
+    store.extend(rows)
+    np.testing.assert_array_equal(store.window(0.0, rows["time"][-1]), store.view())
@@ -0,0 +1,86 @@
+# standard library
+import csv
+import itertools
+import time
+# non-standard library
+import pytest
+# in-house packages
+from src.phagebox_gui.calibration_fit import read_plotter_csv
+from temperature_plotter import ArduinoTempMonitor, SteadyStateDetector, read_schedule
+
+
+class FakeMonitor(ArduinoTempMonitor):
+    """ an ArduinoTempMonitor reading from a list of temperatures instead of a serial port """
+
+    def __init__(self, temperatures, period=0.005):
+        self.temperatures = temperatures
+        self.period = period
+
+    def read_measurements(self):
+        time.sleep(self.period)
+        temperature = next(self.temperatures)
+        return [] if temperature is None else [(time.time(), temperature)]
+
+
+def read_rows(path):
+    with open(path) as output:
+        return list(csv.DictReader(output))
+
+
+def test_steady_state_detector():
+    detector = SteadyStateDetector(window=10.0, tolerance=0.5)
+    assert not detector.add(0.0, 50.0) # the window is not covered yet
+    assert not any(detector.add(t, 50.0 + 0.1 * (t % 2)) for t in range(1, 9))
+    assert detector.add(9.0, 50.2)
+    assert not detector.add(10.0, 51.0) # spread above tolerance
+    # steady again once the 51.0 reading left the window
+    assert not any(detector.add(t, 50.0) for t in range(11, 21))
+    assert detector.add(21.0, 50.0)
+    detector.reset()
+    assert not detector.add(21.0, 50.0)
+
+
+def test_read_schedule(tmp_path):
+    path = tmp_path / "schedule.csv"
+    path.write_text("# set temp,position,dwell\n60,0,30\n\n60,1,30.5 # next marker\n70,0,10\n")
+    assert read_schedule(path) == [(60.0, 0, 30.0), (60.0, 1, 30.5), (70.0, 0, 10.0)]
+    path.write_text("60,0,30\n60,1\n")
+    with pytest.raises(ValueError, match=":2:"):
+        read_schedule(path)
+
+
+def test_steady_step_is_recorded_as_steady(tmp_path):
+    output = tmp_path / "sweep.csv"
+    monitor = FakeMonitor(itertools.repeat(60.0))
+    monitor.runSchedule(output, [(60.0, 3, 0.1)], SteadyStateDetector(window=0.05, tolerance=0.5),
+                        move_time=0.0, max_settle=5.0)
+    rows = read_rows(output)
+    assert rows[0]["steady"] == "0" and rows[-1]["steady"] == "1"
+    assert {row["marker position"] for row in rows} == {"3"}
+
+
+def test_timed_out_step_is_not_recorded_as_steady(tmp_path, capsys):
+    output = tmp_path / "sweep.csv"
+    monitor = FakeMonitor(itertools.cycle([55.0, 65.0]))
+    start = time.time()
+    monitor.runSchedule(output, [(60.0, 0, 0.1), (70.0, 1, 0.1)], SteadyStateDetector(window=0.05, tolerance=0.5),
+                        move_time=0.0, max_settle=0.1)
+    assert time.time() - start < 2.0
+    rows = read_rows(output)
+    assert rows and all(row["steady"] == "0" for row in rows)
+    assert {row["marker position"] for row in rows} == {"0", "1"}
+    printed = capsys.readouterr().out
+    assert printed.count("WARNING: not steady") == 2
+    assert "2 steps timed out" in printed
+    # nothing of the sweep goes into a calibration fit
+    assert all(len(temperatures) == 0 for _, _, temperatures in read_plotter_csv(output))
+
+
+def test_silent_sensor_does_not_stall_the_sweep(tmp_path, capsys):
+    output = tmp_path / "sweep.csv"
+    monitor = FakeMonitor(itertools.repeat(None))
+    start = time.time()
+    monitor.runSchedule(output, [(60.0, 0, 0.05)], SteadyStateDetector(), move_time=0.0, max_settle=0.1)
+    assert time.time() - start < 2.0
+    assert read_rows(output) == []
+    assert "1 steps timed out" in capsys.readouterr().out
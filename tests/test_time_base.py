@@ -0,0 +1,79 @@
+# standard library
+import random
+# non-standard library
+import pytest
+# in-house packages
+from src.phagebox_gui.time_base import DeviceClock
+
+
+def run(clock, samples):
+    """ host times of (device_ms, received) samples, checked against the bounds of time_base """
+    host_times = []
+    for device_ms, received in samples:
+        host = clock.to_host(device_ms, received)
+        assert received - clock.max_lag - 1e-9 <= host <= received + 1e-9
+        host_times.append(host)
+    assert all(later >= earlier for earlier, later in zip(host_times, host_times[1:]))
+    return host_times
+
+
+def jittered(rng, start, count, period_ms=100, skew=1.0, delay=0.002, jitter=0.05):
+    """ (device_ms, received) of samples taken every period_ms, the device running skew times host speed """
+    for index in range(count):
+        device_ms = index * period_ms
+        taken = start + device_ms / 1000.0 / skew
+        yield device_ms, taken + delay + rng.expovariate(1.0 / jitter)
+
+
+def test_offset_is_the_smallest_bound():
+    clock = DeviceClock()
+    assert clock.to_host(1000, 101.3) == pytest.approx(101.3) # first sample: no better estimate yet
+    assert clock.to_host(1100, 101.2) == pytest.approx(101.3) # better estimate, but held at the previous time
+    assert clock.offset == pytest.approx(100.1)
+    assert clock.to_host(1500, 101.9) == pytest.approx(101.6)
+    assert clock.to_host(1600, 102.1) == pytest.approx(101.7) # a late sample keeps the estimate
+    assert clock.resets == 0
+
+
+def test_jitter_converges_to_the_fastest_samples():
+    rng = random.Random(1)
+    clock = DeviceClock()
+    host_times = run(clock, jittered(rng, 50.0, 2000))
+    # the estimate ends within the fixed delay and the luckiest jitter of the true offset
+    assert 50.002 <= clock.offset <= 50.002 + 0.001
+    taken = [50.0 + index * 0.1 for index in range(2000)]
+    errors = [host - true for host, true in zip(host_times[100:], taken[100:])]
+    assert max(abs(error) for error in errors) < 0.005
+
+
+def test_device_clock_falling_behind_is_followed():
+    rng = random.Random(2)
+    clock = DeviceClock(max_lag=0.5)
+    # 0.5 % slow for an hour: the device loses 18 s against the host
+    samples = list(jittered(rng, 10.0, 36000, skew=0.995, jitter=0.01))
+    host_times = run(clock, samples)
+    lags = [received - host for (_, received), host in zip(samples, host_times)]
+    assert max(lags[-1000:]) <= 0.5 + 1e-9
+    assert clock.resets == 0
+
+
+def test_device_clock_running_fast_is_followed():
+    rng = random.Random(3)
+    clock = DeviceClock()
+    samples = list(jittered(rng, 10.0, 36000, skew=1.005, jitter=0.01))
+    host_times = run(clock, samples)
+    lags = [received - host for (_, received), host in zip(samples, host_times)]
+    assert max(lags[-1000:]) < 0.1
+
+
+def test_board_reset_starts_a_new_estimate():
+    rng = random.Random(4)
+    clock = DeviceClock()
+    before = list(jittered(rng, 100.0, 500))
+    # the board resets 60 s into the run and millis() starts over
+    after = list(jittered(rng, 160.0, 500))
+    host_times = run(clock, before + after)
+    assert clock.resets == 1
+    assert clock.offset == pytest.approx(160.002, abs=0.01)
+    assert host_times[500] >= host_times[499]
+    assert host_times[-1] == pytest.approx(160.0 + 49.9, abs=0.01)